@@ -0,0 +1,383 @@
+"""
+Runs every action of the cloudformation handler against the fake databricks server and reports wall time, http
+calls, bytes transferred and peak memory per action and request type.
+
+Usage, from the aws-lambda directory:
+
+    PYTHONPATH=src python -m benchmarks.actions --latency-ms 50 --output baseline.json
+    PYTHONPATH=src python -m benchmarks.actions --latency-ms 50 --compare baseline.json
+"""
+import argparse
+import logging
+import platform
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_server_process import FakeServerProcess
+from benchmarks.harness import (
+    Measurement,
+    benchmark_environment,
+    compare,
+    format_table,
+    load_baseline,
+    measure,
+    save_baseline,
+)
+from benchmarks.seed import scaled_counts
+from databricks_cdk.resources.handler import DatabricksEvent, process_event
+from databricks_cdk.utils import get_authorization_headers
+from tests.fake_databricks import LatencyProfile
+
+ROLE_ARN = "arn:aws:iam::123456789012:role/databricks"
+
+
+def _acl(count: int, permission_level: str) -> List[dict]:
+    return [{"user_name": f"user-{i}@example.com", "permission_level": permission_level} for i in range(count)]
+
+
+def resource_properties(url: str, refs: Dict[str, Any], counts: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    """
+    Properties per action, for create a new object is used, update and delete target the seeded "bench" objects.
+    Returned as {action: {"new": properties, "existing": properties, "physical_resource_id": id}}.
+    """
+    new_cluster = {"spark_version": "13.3.x-scala2.12", "aws_attributes": {}, "num_workers": 1}
+    members = [{"user_name": f"user-{i}@example.com"} for i in range(counts["group_members"] // 2, counts["users"])][
+        : counts["group_members"]
+    ]
+    grants = [
+        {"principal": f"principal-{i}@example.com", "privileges": ["USE_CATALOG"]} for i in range(counts["grants"])
+    ]
+    volume_grants = [{"principal": f"principal-{i}@example.com", "privileges": ["WRITE_VOLUME"]} for i in range(50)]
+
+    def same(properties: dict, physical_resource_id: Optional[str] = None) -> dict:
+        return {"new": properties, "existing": properties, "physical_resource_id": physical_resource_id}
+
+    def job(name: str) -> dict:
+        return {
+            "name": name,
+            "tasks": [{"task_key": f"task-{i}", "notebook_task": {"notebook_path": "/nb"}} for i in range(10)],
+            "job_clusters": [{"job_cluster_key": "default", "new_cluster": new_cluster}],
+            "schedule": None,
+        }
+
+    def metastore_assignment(workspace_id: str) -> dict:
+        return {
+            "workspace_id": workspace_id,
+            "metastore_name": "bench-metastore",
+            "default_catalog_name": "main",
+        }
+
+    return {
+        "credentials": {
+            "new": {"credentials_name": "new-credentials", "role_arn": ROLE_ARN},
+            "existing": {"credentials_name": "credentials-0", "role_arn": "arn:aws:iam::123456789012:role/r0"},
+            "physical_resource_id": refs["credentials_id"],
+        },
+        "storage-configurations": {
+            "new": {"storage_configuration_name": "new-storage", "bucket_name": "new-bucket"},
+            "existing": {"storage_configuration_name": "storage-0", "bucket_name": "bucket-0"},
+            "physical_resource_id": "storage-0",
+        },
+        "networks": {
+            "new": {
+                "network_name": "new-network",
+                "vpc_id": "vpc-new",
+                "subnet_ids": ["subnet-a"],
+                "security_group_ids": ["sg-a"],
+            },
+            "existing": {
+                "network_name": "network-0",
+                "vpc_id": "vpc-0",
+                "subnet_ids": ["subnet-a", "subnet-b"],
+                "security_group_ids": ["sg-a"],
+            },
+            "physical_resource_id": "network-0",
+        },
+        "workspaces": {
+            "new": {
+                "workspace_name": "new-workspace",
+                "aws_region": "eu-west-1",
+                "credentials_id": "cred-0",
+                "storage_configuration_id": "storage-0",
+            },
+            "existing": {
+                "workspace_name": "workspace-0",
+                "aws_region": "eu-west-1",
+                "credentials_id": "cred-0",
+                "storage_configuration_id": "storage-0",
+            },
+            "physical_resource_id": str(refs["workspace_id"]),
+        },
+        "instance-profile": {
+            "new": {"instance_profile_arn": "arn:aws:iam::123456789012:instance-profile/new"},
+            "existing": {"instance_profile_arn": refs["instance_profile_arn"]},
+            "physical_resource_id": refs["instance_profile_arn"],
+        },
+        "cluster": {
+            "new": {"cluster": {**new_cluster, "cluster_name": "new-cluster"}},
+            "existing": {"cluster": {**new_cluster, "cluster_name": "bench-cluster", "num_workers": 2}},
+            "physical_resource_id": refs["cluster_id"],
+        },
+        "cluster-permissions": same(
+            {"cluster_id": refs["cluster_id"], "access_control_list": _acl(50, "CAN_RESTART")}, refs["cluster_id"]
+        ),
+        "cluster-policy": {
+            "new": {"cluster_policy": {"name": "new-policy", "definition": {"a": {"type": "fixed", "value": "1"}}}},
+            "existing": {
+                "cluster_policy": {"name": "bench-policy", "definition": {"a": {"type": "fixed", "value": "2"}}}
+            },
+            "physical_resource_id": refs["policy_id"],
+        },
+        "cluster-policy-permissions": same(
+            {"cluster_policy_id": refs["policy_id"], "access_control_list": _acl(50, "CAN_USE")}, refs["policy_id"]
+        ),
+        "user": {
+            "new": {"user_name": "new-user@example.com"},
+            "existing": {"user_name": refs["user_name"]},
+            "physical_resource_id": refs["user_id"],
+        },
+        "job-permissions": same(
+            {
+                "job_id": str(refs["job_id"]),
+                "access_control_list": _acl(50, "CAN_MANAGE_RUN"),
+                "owner": {"user_name": "owner@example.com"},
+            },
+            f"{refs['job_id']}/permissions",
+        ),
+        "group": {
+            "new": {"group_name": "new-group", "members": members},
+            "existing": {"group_name": "bench-group", "members": members},
+            "physical_resource_id": "bench-group",
+        },
+        "dbfs-file": same({"path": "/FileStore/bench.txt", "base64_bytes": "YmVuY2g=" * 1000}, "/FileStore/bench.txt"),
+        "secret-scope": {
+            "new": {"scope": "new-scope", "initial_manage_principal": "users"},
+            "existing": {"scope": "bench-scope", "initial_manage_principal": "users"},
+            "physical_resource_id": "bench-scope",
+        },
+        "secret": same({"scope": "bench-scope", "key": "bench-key", "string_value": "value"}, "bench-scope/bench-key"),
+        "job": {
+            "new": {"job": job("new-job")},
+            "existing": {"job": job("bench-job")},
+            "physical_resource_id": str(refs["job_id"]),
+        },
+        "instance-pool": {
+            "new": {
+                "instance_pool": {
+                    "instance_pool_name": "new-pool",
+                    "node_type_id": "m5.large",
+                    "preloaded_spark_versions": [],
+                }
+            },
+            "existing": {
+                "instance_pool": {
+                    "instance_pool_name": "bench-pool",
+                    "node_type_id": "m5.large",
+                    "preloaded_spark_versions": [],
+                    "max_capacity": 10,
+                }
+            },
+            "physical_resource_id": refs["instance_pool_id"],
+        },
+        "warehouse": {
+            "new": {"warehouse": {"name": "new-warehouse", "cluster_size": "Small", "max_num_clusters": 1}},
+            "existing": {"warehouse": {"name": "bench-warehouse", "cluster_size": "Medium", "max_num_clusters": 2}},
+            "physical_resource_id": refs["warehouse_id"],
+        },
+        "warehouse-permissions": same(
+            {"endpoint_id": refs["warehouse_id"], "access_control_list": _acl(50, "CAN_USE")}, refs["warehouse_id"]
+        ),
+        "metastore": {
+            "new": {
+                "metastore": {"name": "new-metastore", "storage_root": "s3://new-bucket/root"},
+                "iam_role": ROLE_ARN,
+            },
+            "existing": {
+                "metastore": {"name": "bench-metastore", "storage_root": "s3://bench-bucket/root"},
+                "iam_role": ROLE_ARN,
+            },
+            "physical_resource_id": refs["metastore_id"],
+        },
+        "metastore-assignment": same(metastore_assignment("1234"), "1234"),
+        "catalog": {
+            "new": {"catalog": {"name": "new_catalog"}},
+            "existing": {"catalog": {"name": "bench_catalog", "comment": "updated"}},
+            "physical_resource_id": "bench_catalog",
+        },
+        "schema": {
+            "new": {"schema": {"name": "new_schema", "catalog_name": "bench_catalog"}},
+            "existing": {"schema": {"name": "bench_schema", "catalog_name": "bench_catalog", "comment": "updated"}},
+            "physical_resource_id": "bench_catalog.bench_schema",
+        },
+        "catalog-permission": same(
+            {"sec_type": "catalog", "sec_id": "bench_catalog", "permissions": {"privilege_assignments": grants}},
+            "catalog/bench_catalog",
+        ),
+        "registered-model-permission": same(
+            {"registered_model_id": "bench-model-id", "access_control_list": _acl(50, "CAN_READ")},
+            "bench-model-id/permissions",
+        ),
+        "volume-permissions": same(
+            {"volume_name": "bench_catalog.bench_schema.bench_volume", "privilege_assignments": volume_grants},
+            "bench_catalog.bench_schema.bench_volume/permissions",
+        ),
+        "experiment-permission": same(
+            {"experiment_id": refs["experiment_id"], "access_control_list": _acl(50, "CAN_READ")},
+            f"{refs['experiment_id']}/permissions",
+        ),
+        "token": {
+            "new": {"token_name": "new-token", "lifetime_seconds": 3600, "comment": "new"},
+            "existing": {"token_name": "bench-token", "lifetime_seconds": None, "comment": "b"},
+            "physical_resource_id": refs["token_id"],
+        },
+        "unity-storage-credentials": {
+            "new": {"storage_credential": {"name": "new-credential", "aws_iam_role": {"role_arn": ROLE_ARN}}},
+            "existing": {"storage_credential": {"name": "bench-credential", "aws_iam_role": {"role_arn": ROLE_ARN}}},
+            "physical_resource_id": "bench-credential",
+        },
+        "unity-external-location": {
+            "new": {
+                "external_location": {"name": "new-location", "url": "s3://new/location", "credential_name": "root"}
+            },
+            "existing": {
+                "external_location": {
+                    "name": "bench-location",
+                    "url": "s3://bench-bucket/location",
+                    "credential_name": "root",
+                }
+            },
+            "physical_resource_id": "bench-location",
+        },
+        "mlflow-experiment": {
+            "new": {"name": "/Shared/new-experiment"},
+            "existing": {"name": "/Shared/bench-experiment-renamed", "description": "updated"},
+            "physical_resource_id": refs["experiment_id"],
+        },
+        "mlflow-registered-model": {
+            "new": {"name": "new-model", "description": "new", "tags": [{"key": "a", "value": "b"}]},
+            "existing": {"name": "bench-model", "description": "updated", "tags": [{"key": "new", "value": "tag"}]},
+            "physical_resource_id": "bench-model",
+        },
+        "volume": {
+            "new": {"volume": {"name": "new_volume", "catalog_name": "bench_catalog", "schema_name": "bench_schema"}},
+            "existing": {
+                "volume": {
+                    "name": "bench_volume",
+                    "catalog_name": "bench_catalog",
+                    "schema_name": "bench_schema",
+                    "comment": "updated",
+                }
+            },
+            "physical_resource_id": refs["volume_id"],
+        },
+        "service-principal": {
+            "new": {"service_principal": {"display_name": "new-sp"}},
+            "existing": {"service_principal": {"display_name": "bench-sp", "id": refs["service_principal_id"]}},
+            "physical_resource_id": refs["service_principal_id"],
+        },
+        "service-principal-secrets": {
+            "new": {"service_principal_id": int(refs["service_principal_id"])},
+            "existing": {"service_principal_id": int(refs["service_principal_id"])},
+            "physical_resource_id": refs["service_principal_secret_id"],
+        },
+    }
+
+
+def build_events(url: str, refs: Dict[str, Any], counts: Dict[str, int]) -> Dict[str, dict]:
+    """Cloudformation events per scenario, named <action>:<request type>"""
+    events = {}
+    for action, properties in resource_properties(url, refs, counts).items():
+        for request_type, key, physical_resource_id in [
+            ("Create", "new", None),
+            ("Update", "existing", properties["physical_resource_id"]),
+            ("Delete", "existing", properties["physical_resource_id"]),
+        ]:
+            events[f"{action}:{request_type}"] = {
+                "RequestType": request_type,
+                "ResourceProperties": {"action": action, "workspace_url": url, **properties[key]},
+                "PhysicalResourceId": physical_resource_id,
+            }
+    return events
+
+
+def run(
+    latency_ms: float = 0.0,
+    distribution: str = "fixed",
+    scale: float = 1.0,
+    repeats: int = 3,
+    trace_memory: bool = True,
+    only: Optional[str] = None,
+) -> Dict[str, Measurement]:
+    latency = [LatencyProfile(distribution=distribution, mean_ms=latency_ms, stddev_ms=latency_ms / 2)]
+    counts = scaled_counts(scale)
+    results: Dict[str, Measurement] = {}
+    with FakeServerProcess(latency=latency if latency_ms else None, seed=1) as server:
+        refs = server.seed(counts)
+        url = server.url or ""
+        with benchmark_environment(url):
+            # authenticate once, like a warm lambda that already has a token
+            get_authorization_headers()
+            scenarios = {
+                name: event
+                for name, event in build_events(url, refs, counts).items()
+                if only is None or re.search(only, name)
+            }
+            for name, event in scenarios.items():
+                results[name] = measure(
+                    lambda: process_event(DatabricksEvent(**event)),
+                    server,
+                    prepare=lambda: server.seed(counts),
+                    repeats=repeats,
+                    trace_memory=trace_memory,
+                )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean latency added to every response")
+    parser.add_argument("--distribution", default="fixed", help="fixed, uniform, normal or lognormal")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the seeded object counts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--only", help="Regex on scenario names, for example '^cluster:'")
+    parser.add_argument("--output", help="Write results as json baseline to this file")
+    parser.add_argument("--compare", help="Baseline json to compare against, exits 1 on regressions")
+    parser.add_argument("--max-time-regression", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    results = run(
+        latency_ms=args.latency_ms,
+        distribution=args.distribution,
+        scale=args.scale,
+        repeats=args.repeats,
+        trace_memory=not args.no_memory,
+        only=args.only,
+    )
+    baseline = load_baseline(args.compare) if args.compare else None
+    print(format_table(results, baseline))
+
+    if args.output:
+        meta = {
+            "latency_ms": args.latency_ms,
+            "distribution": args.distribution,
+            "scale": args.scale,
+            "repeats": args.repeats,
+            "python": platform.python_version(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        save_baseline(args.output, meta, results)
+
+    if baseline is not None:
+        regressions = compare(baseline, results, args.max_time_regression)
+        if regressions:
+            print("\nRegressions:\n" + "\n".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
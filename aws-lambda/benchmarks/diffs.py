@@ -0,0 +1,289 @@
+"""
+Micro benchmarks of the cpu bound diff routines: the unity catalog grant diffs and the group member loops. Every
+case runs against generated inputs of increasing size and reports wall time, peak memory and the allocations left
+after the call, plus the scaling exponent between sizes so an accidental O(n^2) shows up directly.
+
+Usage, from the aws-lambda directory:
+
+    PYTHONPATH=src python -m benchmarks.diffs --output diffs.json
+    PYTHONPATH=src python -m benchmarks.diffs --sizes 10000,100000 --compare diffs.json
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+from databricks.sdk.service.catalog import PermissionsList as SdkPermissionsList
+from databricks.sdk.service.catalog import Privilege, PrivilegeAssignment
+from pydantic import BaseModel
+
+from databricks_cdk.resources.groups.group import GroupProperties, UserMember, create_or_update_group
+from databricks_cdk.resources.permissions.changes import get_permission_changes
+from databricks_cdk.resources.unity_catalog.permissions import Permissions, PermissionsList, create_diff
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+PRIVILEGES = [p for p in Privilege]
+
+# fraction of principals that is added, removed or gets other privileges between current and desired state
+CHANGE_FRACTION = 0.1
+
+
+class DiffMeasurement(BaseModel):
+    case: str
+    size: int
+    wall_seconds: float
+    wall_seconds_all: List[float]
+    peak_memory_bytes: Optional[int] = None
+    allocated_blocks: Optional[int] = None
+    skipped: bool = False
+
+
+def generate_grants(size: int, seed: int = 0) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """Current and desired grants of `size` principals, with a fraction added, removed and changed"""
+    rng = random.Random(seed)
+    changes = int(size * CHANGE_FRACTION)
+    current = {f"principal-{i}@example.com": rng.sample(PRIVILEGES, 3) for i in range(size)}
+    desired = {k: list(v) for k, v in list(current.items())[changes:]}
+    for principal in list(desired)[:changes]:
+        desired[principal] = rng.sample(PRIVILEGES, 3)
+    for i in range(changes):
+        desired[f"new-principal-{i}@example.com"] = rng.sample(PRIVILEGES, 2)
+    return (
+        {k: [p.value for p in v] for k, v in current.items()},
+        {k: [p.value for p in v] for k, v in desired.items()},
+    )
+
+
+def generate_members(size: int) -> Tuple[List[str], List[str]]:
+    """Current and desired group members, with a fraction added and removed"""
+    changes = int(size * CHANGE_FRACTION)
+    current = [f"user-{i}@example.com" for i in range(size)]
+    desired = current[changes:] + [f"new-user-{i}@example.com" for i in range(changes)]
+    return current, desired
+
+
+def permission_changes_case(size: int) -> Callable[[], Any]:
+    current, desired = generate_grants(size)
+    on_databricks = SdkPermissionsList.from_dict(
+        {"privilege_assignments": [{"principal": k, "privileges": v} for k, v in current.items()]}
+    )
+    from_properties = [
+        PrivilegeAssignment(principal=k, privileges=[Privilege(p) for p in v]) for k, v in desired.items()
+    ]
+    return lambda: get_permission_changes(on_databricks, from_properties)
+
+
+def create_diff_case(size: int) -> Callable[[], Any]:
+    current, desired = generate_grants(size)
+    current_list = PermissionsList(
+        privilege_assignments=[Permissions(principal=k, privileges=v) for k, v in current.items()]
+    )
+    desired_list = PermissionsList(
+        privilege_assignments=[Permissions(principal=k, privileges=v) for k, v in desired.items()]
+    )
+    return lambda: create_diff(current=current_list, new=desired_list)
+
+
+def group_members_case(size: int) -> Callable[[], Any]:
+    """Only the member loops of create_or_update_group, the http calls are replaced by no-ops"""
+    current, desired = generate_members(size)
+    current_group = GroupProperties(
+        workspace_url="https://workspace", group_name="group", members=[UserMember(user_name=u) for u in current]
+    )
+    properties = GroupProperties(
+        workspace_url="https://workspace", group_name="group", members=[UserMember(user_name=u) for u in desired]
+    )
+
+    def run():
+        with patch(
+            "databricks_cdk.resources.groups.group.get_current_group_members", return_value=current_group
+        ), patch("databricks_cdk.resources.groups.group.post_request"):
+            return create_or_update_group(properties)
+
+    return run
+
+
+CASES: Dict[str, Callable[[int], Callable[[], Any]]] = {
+    "permissions.get_permission_changes": permission_changes_case,
+    "unity_catalog.create_diff": create_diff_case,
+    "groups.create_or_update_group": group_members_case,
+}
+
+
+def measure(
+    case: str,
+    size: int,
+    repeats: int = 3,
+    trace_memory: bool = True,
+    max_seconds: Optional[float] = None,
+    timer: Callable[[], float] = time.perf_counter,
+) -> DiffMeasurement:
+    """
+    Median wall time of `repeats` runs, memory is measured in a separate run because tracemalloc is slow. Runs
+    slower than `max_seconds` are not repeated.
+    """
+    fn = CASES[case](size)
+    timings: List[float] = []
+    for _ in range(repeats):
+        start = timer()
+        fn()
+        timings.append(timer() - start)
+        if max_seconds is not None and timings[-1] > max_seconds:
+            break
+
+    peak_memory = allocated_blocks = None
+    if trace_memory and (max_seconds is None or max(timings) <= max_seconds):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        # the snapshot is taken while the result is still alive, so the blocks it holds are counted
+        _, after = fn(), tracemalloc.take_snapshot()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        allocated_blocks = sum(s.count_diff for s in after.compare_to(before, "lineno") if s.count_diff > 0)
+
+    return DiffMeasurement(
+        case=case,
+        size=size,
+        wall_seconds=statistics.median(timings),
+        wall_seconds_all=timings,
+        peak_memory_bytes=peak_memory,
+        allocated_blocks=allocated_blocks,
+    )
+
+
+def run(
+    sizes: Optional[List[int]] = None,
+    repeats: int = 3,
+    trace_memory: bool = True,
+    only: Optional[str] = None,
+    max_seconds: float = 30.0,
+    timer: Callable[[], float] = time.perf_counter,
+) -> Dict[str, DiffMeasurement]:
+    """
+    Runs every case for every size, in increasing order. A size is skipped when the time extrapolated from the
+    smaller sizes is above `max_seconds`, so a quadratic case doesn't block the run for hours. `timer` is replaceable
+    so the skipping can be tested without depending on the speed of the machine.
+    """
+    results: Dict[str, DiffMeasurement] = {}
+    for case in CASES:
+        if only is not None and only not in case:
+            continue
+        measured: List[DiffMeasurement] = []
+        for size in sorted(sizes or DEFAULT_SIZES):
+            key = f"{case}[{size}]"
+            if measured and _extrapolate(measured, size) > max_seconds:
+                results[key] = DiffMeasurement(case=case, size=size, wall_seconds=0, wall_seconds_all=[], skipped=True)
+                continue
+            results[key] = measure(
+                case, size, repeats=repeats, trace_memory=trace_memory, max_seconds=max_seconds, timer=timer
+            )
+            measured.append(results[key])
+    return results
+
+
+def _extrapolate(measured: List[DiffMeasurement], size: int) -> float:
+    """Expected wall time at `size`, assuming at least linear scaling"""
+    last = measured[-1]
+    exponent = 1.0
+    if len(measured) >= 2 and measured[-2].wall_seconds > 0:
+        previous = measured[-2]
+        exponent = max(1.0, math.log(last.wall_seconds / previous.wall_seconds) / math.log(last.size / previous.size))
+    return last.wall_seconds * (size / last.size) ** exponent
+
+
+def scaling_exponents(results: Dict[str, DiffMeasurement]) -> Dict[str, float]:
+    """Exponent k of time ~ n^k between the two largest measured sizes of each case, 1 is linear, 2 quadratic"""
+    exponents = {}
+    for case in CASES:
+        measured = sorted(
+            (r for r in results.values() if r.case == case and not r.skipped and r.wall_seconds > 0),
+            key=lambda r: r.size,
+        )
+        if len(measured) >= 2:
+            small, large = measured[-2], measured[-1]
+            exponents[case] = math.log(large.wall_seconds / small.wall_seconds) / math.log(large.size / small.size)
+    return exponents
+
+
+def compare(
+    baseline: Dict[str, DiffMeasurement], results: Dict[str, DiffMeasurement], max_time_regression: float = 0.5
+) -> List[str]:
+    """Returns the cases that got slower than the threshold or allocate more blocks than the baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or base.skipped:
+            continue
+        if result.skipped:
+            regressions.append(f"{name}: now skipped, slower than the time limit")
+            continue
+        if base.wall_seconds > 0 and result.wall_seconds > base.wall_seconds * (1 + max_time_regression):
+            regressions.append(f"{name}: wall time {base.wall_seconds:.4f}s -> {result.wall_seconds:.4f}s")
+        if base.allocated_blocks and result.allocated_blocks and result.allocated_blocks > base.allocated_blocks * 1.1:
+            regressions.append(f"{name}: allocated blocks {base.allocated_blocks} -> {result.allocated_blocks}")
+    return regressions
+
+
+def format_table(results: Dict[str, DiffMeasurement]) -> str:
+    header = f"{'case':<50} {'wall ms':>11} {'peak KB':>10} {'blocks':>10}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        if r.skipped:
+            lines.append(f"{name:<50} {'skipped':>11}")
+            continue
+        peak = f"{r.peak_memory_bytes / 1024:.0f}" if r.peak_memory_bytes is not None else "-"
+        blocks = str(r.allocated_blocks) if r.allocated_blocks is not None else "-"
+        lines.append(f"{name:<50} {r.wall_seconds * 1000:>11.2f} {peak:>10} {blocks:>10}")
+    exponents = scaling_exponents(results)
+    if exponents:
+        lines.append("")
+        lines += [f"{case:<50} scales as n^{exponent:.2f}" for case, exponent in exponents.items()]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Comma separated sizes")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--only", help="Only run cases containing this string")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="Skip larger sizes after a slower run")
+    parser.add_argument("--output", help="Write results as json baseline to this file")
+    parser.add_argument("--compare", help="Baseline json to compare against, exits 1 on regressions")
+    parser.add_argument("--max-time-regression", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    results = run(
+        sizes=[int(s) for s in args.sizes.split(",")],
+        repeats=args.repeats,
+        trace_memory=not args.no_memory,
+        only=args.only,
+        max_seconds=args.max_seconds,
+    )
+    print(format_table(results))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({k: v.dict() for k, v in results.items()}, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {k: DiffMeasurement(**v) for k, v in json.load(f).items()}
+        regressions = compare(baseline, results, args.max_time_regression)
+        if regressions:
+            print("\nRegressions:\n" + "\n".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
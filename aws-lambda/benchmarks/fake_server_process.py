@@ -0,0 +1,91 @@
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+from benchmarks.seed import seed_state
+from tests.fake_databricks import FakeDatabricksServer, FaultRule, LatencyProfile, RateLimit, RequestRecord
+
+
+def _serve(conn, options: Dict[str, Any]):
+    server = FakeDatabricksServer(**options).start()
+    conn.send(server.url)
+    while True:
+        command, kwargs = conn.recv()
+        try:
+            if command == "stop":
+                server.stop()
+                conn.send(None)
+                return
+            elif command == "seed":
+                server.api.state.__init__(server.api.state.account_id)
+                result: Any = seed_state(server.api.state, **kwargs)
+            elif command == "configure":
+                for key, value in kwargs.items():
+                    setattr(server.api.state, key, value)
+                result = None
+            elif command == "records":
+                with server._lock:
+                    result = [r.dict() for r in server.records]
+                    server.records = []
+            else:
+                raise ValueError(f"Unknown command: {command}")
+            conn.send(result)
+        except Exception as e:
+            conn.send(e)
+
+
+class FakeServerProcess:
+    """
+    Runs the fake databricks server in a separate process, so its cpu time and allocations don't end up in the
+    measurements of the code under test.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[List[LatencyProfile]] = None,
+        faults: Optional[List[FaultRule]] = None,
+        rate_limit: Optional[RateLimit] = None,
+        seed: Optional[int] = None,
+    ):
+        self.options = {"latency": latency, "faults": faults, "rate_limit": rate_limit, "seed": seed}
+        self.url: Optional[str] = None
+        self._conn = None
+        self._process = None
+
+    def start(self) -> "FakeServerProcess":
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child_conn, self.options), daemon=True)
+        self._process.start()
+        self.url = self._conn.recv()
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._call("stop")
+            self._process.join(timeout=5)
+            self._process = None
+
+    def __enter__(self) -> "FakeServerProcess":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _call(self, command: str, **kwargs) -> Any:
+        self._conn.send((command, kwargs))
+        result = self._conn.recv()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def seed(self, counts: Dict[str, int]) -> Dict[str, Any]:
+        """Resets the state and seeds it, returns the ids of the objects targeted by the scenarios"""
+        return self._call("seed", counts=counts)
+
+    def configure(self, **state_attributes):
+        """Sets attributes on the fake state, for example run_running_seconds"""
+        self._call("configure", **state_attributes)
+
+    def records(self) -> List[RequestRecord]:
+        """Returns and clears the requests recorded since the last call"""
+        return [RequestRecord(**r) for r in self._call("records")]
@@ -0,0 +1,220 @@
+import functools
+import json
+import re
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+from pydantic import BaseModel
+
+from benchmarks.fake_server_process import FakeServerProcess
+from databricks_cdk import utils
+from tests.fake_databricks import RequestRecord
+
+ACCOUNT_ID = "fake-account-id"
+
+# modules that import ACCOUNTS_BASE_URL or get_account_client by name
+ACCOUNTS_BASE_URL_MODULES = [
+    "databricks_cdk.utils",
+    "databricks_cdk.resources.account.networks",
+    "databricks_cdk.resources.account.storage_config",
+    "databricks_cdk.resources.account.workspace",
+]
+ACCOUNT_CLIENT_MODULES = [
+    "databricks_cdk.resources.account.credentials",
+    "databricks_cdk.resources.service_principals.service_principal",
+    "databricks_cdk.resources.service_principals.service_principal_secrets",
+]
+
+
+class _ResourceNotFoundException(Exception):
+    pass
+
+
+class FakeSecretsManager:
+    """
+    Minimal in memory secrets manager client, covers the calls done by the token and service principal secrets
+    resources. Secrets that are not there are treated as existing, because the seeded objects have no secrets.
+    """
+
+    class exceptions:
+        ResourceNotFoundException = _ResourceNotFoundException
+
+    def __init__(self):
+        self.secrets: Dict[str, str] = {}
+
+    def _arn(self, name: str) -> str:
+        return f"arn:aws:secretsmanager:eu-west-1:123456789012:secret:{name}"
+
+    def create_secret(self, Name: str, SecretString: str, **kwargs) -> dict:
+        self.secrets[Name] = SecretString
+        return {"ARN": self._arn(Name), "Name": Name}
+
+    def update_secret(self, SecretId: str, SecretString: str, **kwargs) -> dict:
+        self.secrets[SecretId] = SecretString
+        return {"ARN": self._arn(SecretId), "Name": SecretId}
+
+    def describe_secret(self, SecretId: str) -> dict:
+        return {"ARN": self._arn(SecretId), "Name": SecretId}
+
+    def delete_secret(self, SecretId: str, **kwargs) -> dict:
+        self.secrets.pop(SecretId, None)
+        return {"ARN": self._arn(SecretId), "Name": SecretId}
+
+    def list_secrets(self, Filters: List[dict], **kwargs) -> dict:
+        names = [v for f in Filters for v in f["Values"]]
+        return {"SecretList": [{"Name": n, "ARN": self._arn(n)} for n in names if n in self.secrets]}
+
+
+@contextmanager
+def benchmark_environment(url: str, account_id: str = ACCOUNT_ID) -> Iterator[FakeSecretsManager]:
+    """
+    Points all workspace and account calls to the fake server: ssm parameters are faked, the accounts base url is
+    replaced and secrets manager is kept in memory.
+    """
+    params = {
+        utils.ACCOUNT_PARAM: account_id,
+        utils.CLIENT_ID_PARAM: "benchmark-client-id",
+        utils.CLIENT_SECRET_PARAM: "benchmark-client-secret",
+    }
+    secrets_manager = FakeSecretsManager()
+    account_client = functools.partial(utils.get_account_client, host=url)
+
+    with ExitStack() as stack:
+        stack.enter_context(
+            patch("databricks_cdk.utils.get_param", side_effect=lambda name, required=False: params[name])
+        )
+        stack.enter_context(patch("boto3.client", return_value=secrets_manager))
+        for module in ACCOUNTS_BASE_URL_MODULES:
+            stack.enter_context(patch(f"{module}.ACCOUNTS_BASE_URL", url))
+        for module in ACCOUNT_CLIENT_MODULES:
+            stack.enter_context(patch(f"{module}.get_account_client", account_client))
+        utils.get_authentication_config.cache_clear()
+        try:
+            yield secrets_manager
+        finally:
+            utils.get_authentication_config.cache_clear()
+
+
+_ID_SEGMENT = re.compile(r"/(?=[^/]*\d)(?:\d+|[^/]{6,})(?=/|$)")
+
+
+def endpoint(record: RequestRecord) -> str:
+    """Method and path with id-like segments replaced, so calls can be grouped and compared between runs"""
+    return f"{record.method} {_ID_SEGMENT.sub('/{id}', record.path)}"
+
+
+class Measurement(BaseModel):
+    wall_seconds: float
+    wall_seconds_all: List[float]
+    http_calls: int
+    bytes_sent: int
+    bytes_received: int
+    peak_memory_bytes: Optional[int] = None
+    calls_by_endpoint: Dict[str, int] = {}
+    error: Optional[str] = None
+
+
+def measure(
+    fn: Callable[[], Any],
+    server: FakeServerProcess,
+    prepare: Optional[Callable[[], None]] = None,
+    repeats: int = 3,
+    trace_memory: bool = True,
+) -> Measurement:
+    """
+    Runs fn `repeats` times, each time after calling prepare (for example reseeding the server), and reports the
+    median wall time. Http calls are taken from the first run. Peak memory is measured in an extra run with
+    tracemalloc enabled, because tracing slows down the code a lot.
+    """
+    timings = []
+    records: List[RequestRecord] = []
+    error = None
+    for i in range(repeats):
+        if prepare is not None:
+            prepare()
+        server.records()
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        timings.append(time.perf_counter() - start)
+        if i == 0:
+            records = server.records()
+
+    peak_memory = None
+    if trace_memory:
+        if prepare is not None:
+            prepare()
+        tracemalloc.start()
+        try:
+            fn()
+        except Exception:
+            pass
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return Measurement(
+        wall_seconds=statistics.median(timings),
+        wall_seconds_all=timings,
+        http_calls=len(records),
+        bytes_sent=sum(r.request_bytes for r in records),
+        bytes_received=sum(r.response_bytes for r in records),
+        peak_memory_bytes=peak_memory,
+        calls_by_endpoint=dict(Counter(endpoint(r) for r in records)),
+        error=error,
+    )
+
+
+def save_baseline(path: str, meta: Dict[str, Any], results: Dict[str, Measurement]):
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": {k: v.dict() for k, v in results.items()}}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, Measurement]:
+    with open(path) as f:
+        return {k: Measurement(**v) for k, v in json.load(f)["results"].items()}
+
+
+def compare(
+    baseline: Dict[str, Measurement], results: Dict[str, Measurement], max_time_regression: float = 0.25
+) -> List[str]:
+    """Returns the regressions: more http calls than the baseline, or a wall time increase above the threshold"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result.http_calls > base.http_calls:
+            regressions.append(f"{name}: http calls {base.http_calls} -> {result.http_calls}")
+        if base.wall_seconds > 0 and result.wall_seconds > base.wall_seconds * (1 + max_time_regression):
+            regressions.append(f"{name}: wall time {base.wall_seconds:.4f}s -> {result.wall_seconds:.4f}s")
+        if base.error is None and result.error is not None:
+            regressions.append(f"{name}: now fails with {result.error}")
+    return regressions
+
+
+def format_table(results: Dict[str, Measurement], baseline: Optional[Dict[str, Measurement]] = None) -> str:
+    header = f"{'scenario':<42} {'wall ms':>9} {'calls':>6} {'sent KB':>8} {'recv KB':>9} {'peak KB':>9}"
+    if baseline is not None:
+        header += f" {'Δ calls':>8} {'Δ wall':>8}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        peak = f"{r.peak_memory_bytes / 1024:.0f}" if r.peak_memory_bytes is not None else "-"
+        line = (
+            f"{name:<42} {r.wall_seconds * 1000:>9.1f} {r.http_calls:>6} {r.bytes_sent / 1024:>8.1f}"
+            f" {r.bytes_received / 1024:>9.1f} {peak:>9}"
+        )
+        base = (baseline or {}).get(name)
+        if base is not None:
+            wall_delta = (r.wall_seconds / base.wall_seconds - 1) * 100 if base.wall_seconds else 0.0
+            line += f" {r.http_calls - base.http_calls:>+8} {wall_delta:>+7.0f}%"
+        if r.error:
+            line += f"  ERROR {r.error[:80]}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,305 @@
+"""
+Simulates many concurrent custom resource invocations against one rate limited workspace, like cloudformation does
+when it creates independent resources in parallel, and reports throughput, 429 rates, retry amplification and tail
+latency. Use it to compare retry and limiter settings before rolling them out.
+
+Usage, from the aws-lambda directory:
+
+    PYTHONPATH=src python -m benchmarks.load_test --invocations 200 --concurrency 40 --requests-per-second 30
+    PYTHONPATH=src python -m benchmarks.load_test --mode processes --retry-attempts 8 --retry-max-wait 30
+"""
+import argparse
+import itertools
+import logging
+import multiprocessing
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from requests import HTTPError
+from tenacity import stop_after_attempt, wait_exponential
+
+from benchmarks.actions import build_events
+from benchmarks.fake_server_process import FakeServerProcess
+from benchmarks.harness import benchmark_environment, endpoint
+from benchmarks.seed import scaled_counts
+from databricks_cdk import utils
+from databricks_cdk.resources.handler import DatabricksEvent, process_event
+from tests.fake_databricks import LatencyProfile, RateLimit, RequestRecord
+
+# Actions that are cheap to run many times against the same seeded state
+DEFAULT_SCENARIOS = r"^(cluster|job|warehouse|instance-pool|cluster-policy):(Create|Update)$"
+
+
+class RetrySettings(BaseModel):
+    attempts: int = 5
+    min_wait: float = 1.0
+    max_wait: float = 10.0
+    multiplier: float = 1.0
+
+
+class InvocationResult(BaseModel):
+    scenario: str
+    seconds: float
+    error: Optional[str] = None
+    gave_up_on_429: bool = False
+
+
+class LoadTestReport(BaseModel):
+    invocations: int
+    concurrency: int
+    mode: str
+    wall_seconds: float
+    throughput_per_second: float
+    failed: int
+    gave_up_on_429: int
+    http_requests: int
+    http_429: int
+    rate_429: float
+    retry_amplification: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    latency_max: float
+    requests_by_endpoint: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+
+
+def apply_retry_settings(settings: RetrySettings):
+    """Changes the retry policy of utils._do_request, every call copies it so this affects all later requests"""
+    utils._do_request.retry.stop = stop_after_attempt(settings.attempts)  # type: ignore
+    utils._do_request.retry.wait = wait_exponential(  # type: ignore
+        multiplier=settings.multiplier, min=settings.min_wait, max=settings.max_wait
+    )
+
+
+def _invoke(scenario: str, event: dict) -> InvocationResult:
+    start = time.perf_counter()
+    try:
+        process_event(DatabricksEvent(**event))
+        return InvocationResult(scenario=scenario, seconds=time.perf_counter() - start)
+    except Exception as e:
+        gave_up = isinstance(e, HTTPError) and e.response is not None and e.response.status_code == 429
+        return InvocationResult(
+            scenario=scenario,
+            seconds=time.perf_counter() - start,
+            error=f"{type(e).__name__}: {re.sub(r'https?://[^/]+', '', str(e))[:120]}",
+            gave_up_on_429=gave_up,
+        )
+
+
+# state of a worker process, kept open for the lifetime of the process
+_worker_stack: Optional[ExitStack] = None
+
+
+def _init_worker(url: str, retry_settings: RetrySettings):
+    global _worker_stack
+    logging.basicConfig(level=logging.ERROR)
+    _worker_stack = ExitStack()
+    _worker_stack.enter_context(benchmark_environment(url))
+    apply_retry_settings(retry_settings)
+    _authenticate()
+
+
+def _authenticate(attempts: int = 20):
+    """Fetches the oauth token up front, the token endpoint is rate limited too when all workers start at once"""
+    for attempt in range(attempts):
+        try:
+            utils.get_authorization_headers()
+            return
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
+
+
+def _invoke_in_worker(args: Tuple[str, dict]) -> dict:
+    return _invoke(*args).dict()
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(percentile / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def summarize(
+    results: List[InvocationResult], records: List[RequestRecord], wall_seconds: float, concurrency: int, mode: str
+) -> LoadTestReport:
+    """
+    Retry amplification is the number of http requests per logical request: a logical request ends in one non 429
+    response, or in a 429 when the client gave up retrying.
+    """
+    http_429 = sum(1 for r in records if r.status_code == 429)
+    gave_up = sum(1 for r in results if r.gave_up_on_429)
+    logical_requests = len(records) - http_429 + gave_up
+    latencies = [r.seconds for r in results]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r.error:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    requests_by_endpoint: Dict[str, int] = {}
+    for record in records:
+        key = endpoint(record)
+        requests_by_endpoint[key] = requests_by_endpoint.get(key, 0) + 1
+
+    return LoadTestReport(
+        invocations=len(results),
+        concurrency=concurrency,
+        mode=mode,
+        wall_seconds=wall_seconds,
+        throughput_per_second=len(results) / wall_seconds if wall_seconds else 0.0,
+        failed=sum(1 for r in results if r.error),
+        gave_up_on_429=gave_up,
+        http_requests=len(records),
+        http_429=http_429,
+        rate_429=http_429 / len(records) if records else 0.0,
+        retry_amplification=len(records) / logical_requests if logical_requests else 0.0,
+        latency_p50=statistics.median(latencies) if latencies else 0.0,
+        latency_p95=_percentile(latencies, 95),
+        latency_p99=_percentile(latencies, 99),
+        latency_max=max(latencies, default=0.0),
+        requests_by_endpoint=requests_by_endpoint,
+        errors=errors,
+    )
+
+
+def run(
+    invocations: int = 100,
+    concurrency: int = 20,
+    mode: str = "threads",
+    scenarios: str = DEFAULT_SCENARIOS,
+    requests_per_second: Optional[float] = 20.0,
+    burst: int = 10,
+    retry_after: Optional[int] = 1,
+    latency_ms: float = 0.0,
+    retry_settings: Optional[RetrySettings] = None,
+    scale: float = 0.01,
+) -> LoadTestReport:
+    """
+    Runs `invocations` handler invocations, at most `concurrency` at the same time, cycling through the scenarios
+    matching the regex. Threads share one process like a single busy lambda container would not, so use processes
+    to also include the per container authentication and cpu contention.
+    """
+    retry_settings = retry_settings or RetrySettings()
+    latency = [LatencyProfile(mean_ms=latency_ms)] if latency_ms else None
+    rate_limit = (
+        RateLimit(requests_per_second=requests_per_second, burst=burst, retry_after=retry_after)
+        if requests_per_second
+        else None
+    )
+    counts = scaled_counts(scale)
+
+    with FakeServerProcess(latency=latency, rate_limit=rate_limit, seed=1) as server:
+        refs = server.seed(counts)
+        url = server.url or ""
+        events = {name: e for name, e in build_events(url, refs, counts).items() if re.search(scenarios, name)}
+        if not events:
+            raise ValueError(f"No scenarios match {scenarios}")
+        work = list(itertools.islice(itertools.cycle(events.items()), invocations))
+
+        if mode == "threads":
+            with benchmark_environment(url):
+                original_stop, original_wait = utils._do_request.retry.stop, utils._do_request.retry.wait  # type: ignore
+                apply_retry_settings(retry_settings)
+                try:
+                    _authenticate()
+                    server.records()
+                    start = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                        results = list(executor.map(lambda w: _invoke(*w), work))
+                    wall_seconds = time.perf_counter() - start
+                finally:
+                    utils._do_request.retry.stop = original_stop  # type: ignore
+                    utils._do_request.retry.wait = original_wait  # type: ignore
+        elif mode == "processes":
+            with ProcessPoolExecutor(
+                max_workers=concurrency,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(url, retry_settings),
+            ) as executor:
+                # start all workers before measuring, so process start up is not part of the results
+                list(executor.map(time.sleep, [0.1] * concurrency))
+                server.records()
+                start = time.perf_counter()
+                results = [InvocationResult(**r) for r in executor.map(_invoke_in_worker, work)]
+                wall_seconds = time.perf_counter() - start
+        else:
+            raise ValueError(f"Unknown mode: {mode}")
+
+        records = server.records()
+
+    return summarize(results, records, wall_seconds, concurrency, mode)
+
+
+def format_report(report: LoadTestReport) -> str:
+    lines = [
+        f"invocations          {report.invocations} ({report.mode}, concurrency {report.concurrency})",
+        f"wall time            {report.wall_seconds:.2f}s",
+        f"throughput           {report.throughput_per_second:.2f} invocations/s",
+        f"failed               {report.failed} ({report.gave_up_on_429} gave up on 429)",
+        f"http requests        {report.http_requests}",
+        f"429 responses        {report.http_429} ({report.rate_429:.1%})",
+        f"retry amplification  {report.retry_amplification:.2f}x",
+        f"latency p50/p95/p99  {report.latency_p50:.3f}s / {report.latency_p95:.3f}s / {report.latency_p99:.3f}s",
+        f"latency max          {report.latency_max:.3f}s",
+    ]
+    if report.errors:
+        lines.append("errors:")
+        lines += [f"  {count:>5}  {error}" for error, count in sorted(report.errors.items(), key=lambda e: -e[1])]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invocations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mode", choices=["threads", "processes"], default="threads")
+    parser.add_argument("--scenarios", default=DEFAULT_SCENARIOS, help="Regex on the scenario names of actions.py")
+    parser.add_argument("--requests-per-second", type=float, default=20.0, help="Server rate limit, 0 disables it")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After header of 429 responses")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--retry-attempts", type=int, default=5)
+    parser.add_argument("--retry-min-wait", type=float, default=1.0)
+    parser.add_argument("--retry-max-wait", type=float, default=10.0)
+    parser.add_argument("--retry-multiplier", type=float, default=1.0)
+    parser.add_argument("--scale", type=float, default=0.01, help="Multiplier for the seeded object counts")
+    parser.add_argument("--output", help="Write the report as json to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    report = run(
+        invocations=args.invocations,
+        concurrency=args.concurrency,
+        mode=args.mode,
+        scenarios=args.scenarios,
+        requests_per_second=args.requests_per_second,
+        burst=args.burst,
+        retry_after=args.retry_after,
+        latency_ms=args.latency_ms,
+        retry_settings=RetrySettings(
+            attempts=args.retry_attempts,
+            min_wait=args.retry_min_wait,
+            max_wait=args.retry_max_wait,
+            multiplier=args.retry_multiplier,
+        ),
+        scale=args.scale,
+    )
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report.json(indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
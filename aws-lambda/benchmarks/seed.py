@@ -0,0 +1,259 @@
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from tests.fake_databricks import FakeDatabricksState
+
+# Object counts of a large, but realistic, workspace and account
+DEFAULT_COUNTS = {
+    "clusters": 1000,
+    "users": 5000,
+    "grants": 500,
+    "jobs": 1000,
+    "group_members": 500,
+    "warehouses": 100,
+    "instance_pools": 100,
+    "instance_profiles": 100,
+    "policies": 100,
+    "secret_scopes": 200,
+    "secrets": 200,
+    "tokens": 200,
+    "catalogs": 200,
+    "schemas": 200,
+    "volumes": 200,
+    "metastores": 10,
+    "storage_credentials": 100,
+    "external_locations": 100,
+    "experiments": 200,
+    "registered_models": 200,
+    "service_principals": 200,
+    "account_objects": 50,
+}
+
+
+def scaled_counts(scale: float = 1.0, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    counts = {k: max(1, int(v * scale)) for k, v in DEFAULT_COUNTS.items()}
+    counts.update(overrides or {})
+    return counts
+
+
+def seed_state(state: FakeDatabricksState, counts: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Fills the fake state with the given object counts, every kind gets one "bench" object that the update and
+    delete scenarios target. Returns the ids of those objects, these are the same every time the state is seeded.
+    """
+    # ids are derived from a fixed seed, so reseeding gives the same ids
+    rng = random.Random(0)
+    refs: Dict[str, Any] = {}
+    now = int(time.time() * 1000)
+
+    for i in range(counts["clusters"]):
+        state.add_cluster(f"cluster-{i}", spark_version="13.3.x-scala2.12", num_workers=2, aws_attributes={})
+    refs["cluster_id"] = state.add_cluster(
+        "bench-cluster", spark_version="13.3.x-scala2.12", num_workers=1, aws_attributes={}
+    )["cluster_id"]
+
+    for i in range(counts["users"]):
+        state.add_user(f"user-{i}@example.com")
+    refs["user_name"] = "bench-user@example.com"
+    refs["user_id"] = state.add_user(refs["user_name"])["id"]
+
+    for i in range(counts["jobs"]):
+        state.add_job({"name": f"job-{i}", "tasks": [{"task_key": "main"}], "format": "MULTI_TASK"})
+    refs["job_id"] = state.add_job({"name": "bench-job", "tasks": [{"task_key": "main"}], "format": "MULTI_TASK"})[
+        "job_id"
+    ]
+
+    state.groups["bench-group"] = [{"user_name": f"user-{i}@example.com"} for i in range(counts["group_members"])]
+    for i in range(counts["warehouses"]):
+        state.warehouses[f"wh{i}"] = {"id": f"wh{i}", "name": f"warehouse-{i}", "cluster_size": "Small"}
+    refs["warehouse_id"] = "bench-wh"
+    state.warehouses["bench-wh"] = {
+        "id": "bench-wh",
+        "name": "bench-warehouse",
+        "cluster_size": "Small",
+        "max_num_clusters": 1,
+    }
+
+    for i in range(counts["instance_pools"]):
+        state.instance_pools[f"pool-{i}"] = {"instance_pool_id": f"pool-{i}", "instance_pool_name": f"pool-{i}"}
+    refs["instance_pool_id"] = "bench-pool"
+    state.instance_pools["bench-pool"] = {
+        "instance_pool_id": "bench-pool",
+        "instance_pool_name": "bench-pool",
+        "node_type_id": "m5.large",
+    }
+
+    for i in range(counts["instance_profiles"]):
+        arn = f"arn:aws:iam::123456789012:instance-profile/profile-{i}"
+        state.instance_profiles[arn] = {"instance_profile_arn": arn, "is_meta_instance_profile": False}
+    refs["instance_profile_arn"] = "arn:aws:iam::123456789012:instance-profile/bench"
+    state.instance_profiles[refs["instance_profile_arn"]] = {
+        "instance_profile_arn": refs["instance_profile_arn"],
+        "is_meta_instance_profile": False,
+    }
+
+    for i in range(counts["policies"]):
+        state.policies[f"POLICY{i}"] = {"policy_id": f"POLICY{i}", "name": f"policy-{i}", "definition": "{}"}
+    refs["policy_id"] = "BENCHPOLICY"
+    state.policies["BENCHPOLICY"] = {
+        "policy_id": "BENCHPOLICY",
+        "name": "bench-policy",
+        "definition": json.dumps({"spark_version": {"type": "fixed", "value": "13.3.x-scala2.12"}}),
+    }
+
+    for i in range(counts["secret_scopes"]):
+        state.secret_scopes[f"scope-{i}"] = {}
+    state.secret_scopes["bench-scope"] = {f"key-{i}": "value" for i in range(counts["secrets"])}
+    state.secret_scopes["bench-scope"]["bench-key"] = "value"
+
+    for i in range(counts["tokens"]):
+        token_id = uuid.UUID(int=rng.getrandbits(128)).hex
+        state.tokens[token_id] = {"token_id": token_id, "creation_time": now, "expiry_time": -1, "comment": f"t{i}"}
+    refs["token_id"] = "bench-token"
+    state.tokens["bench-token"] = {"token_id": "bench-token", "creation_time": now, "expiry_time": -1, "comment": "b"}
+
+    for i in range(counts["catalogs"]):
+        state.catalogs[f"catalog_{i}"] = {"name": f"catalog_{i}", "full_name": f"catalog_{i}"}
+    state.catalogs["bench_catalog"] = {"name": "bench_catalog", "full_name": "bench_catalog"}
+    for i in range(counts["schemas"]):
+        name = f"bench_catalog.schema_{i}"
+        state.schemas[name] = {"name": f"schema_{i}", "catalog_name": "bench_catalog", "full_name": name}
+    state.schemas["bench_catalog.bench_schema"] = {
+        "name": "bench_schema",
+        "catalog_name": "bench_catalog",
+        "full_name": "bench_catalog.bench_schema",
+    }
+    for i in range(counts["volumes"]):
+        name = f"bench_catalog.bench_schema.volume_{i}"
+        state.volumes[name] = {
+            "name": f"volume_{i}",
+            "catalog_name": "bench_catalog",
+            "schema_name": "bench_schema",
+            "full_name": name,
+            "volume_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "volume_type": "MANAGED",
+        }
+    refs["volume_id"] = str(uuid.UUID(int=rng.getrandbits(128)))
+    state.volumes["bench_catalog.bench_schema.bench_volume"] = {
+        "name": "bench_volume",
+        "catalog_name": "bench_catalog",
+        "schema_name": "bench_schema",
+        "full_name": "bench_catalog.bench_schema.bench_volume",
+        "volume_id": refs["volume_id"],
+        "volume_type": "MANAGED",
+    }
+
+    # grants are split over the securables that have a permissions action
+    grants = {f"principal-{i}@example.com": ["USE_CATALOG", "SELECT"] for i in range(counts["grants"])}
+    state.grants["catalog/bench_catalog"] = {k: list(v) for k, v in grants.items()}
+    state.grants["volume/bench_catalog.bench_schema.bench_volume"] = {
+        k: ["READ_VOLUME"] for k in list(grants)[: counts["grants"]]
+    }
+
+    for i in range(counts["metastores"]):
+        metastore_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        state.metastores[metastore_id] = {
+            "metastore_id": metastore_id,
+            "name": f"metastore-{i}",
+            "storage_root": f"s3://bucket-{i}/root",
+        }
+    refs["metastore_id"] = str(uuid.UUID(int=rng.getrandbits(128)))
+    state.metastores[refs["metastore_id"]] = {
+        "metastore_id": refs["metastore_id"],
+        "name": "bench-metastore",
+        "storage_root": "s3://bench-bucket/root",
+        "global_metastore_id": f"aws:eu-west-1:{refs['metastore_id']}",
+    }
+    for i in range(counts["storage_credentials"]):
+        state.storage_credentials[f"credential-{i}"] = {
+            "name": f"credential-{i}",
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        }
+    state.storage_credentials["root"] = {"name": "root", "id": str(uuid.UUID(int=rng.getrandbits(128)))}
+    state.storage_credentials["bench-credential"] = {
+        "name": "bench-credential",
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+    }
+    for i in range(counts["external_locations"]):
+        state.external_locations[f"location-{i}"] = {"name": f"location-{i}", "url": f"s3://bucket/{i}"}
+    state.external_locations["bench-location"] = {"name": "bench-location", "url": "s3://bench-bucket/location"}
+
+    for i in range(counts["experiments"]):
+        experiment_id = str(state.next_id())
+        state.experiments[experiment_id] = {"experiment_id": experiment_id, "name": f"/Shared/experiment-{i}"}
+    refs["experiment_id"] = str(state.next_id())
+    state.experiments[refs["experiment_id"]] = {
+        "experiment_id": refs["experiment_id"],
+        "name": "/Shared/bench-experiment",
+        "lifecycle_stage": "active",
+        "tags": [{"key": "mlflow.note.content", "value": "old"}],
+    }
+    for i in range(counts["registered_models"]):
+        state.registered_models[f"model-{i}"] = {"name": f"model-{i}", "id": uuid.UUID(int=rng.getrandbits(128)).hex}
+    state.registered_models["bench-model"] = {
+        "name": "bench-model",
+        "id": uuid.UUID(int=rng.getrandbits(128)).hex,
+        "description": "old",
+        "tags": [{"key": "old", "value": "tag"}],
+    }
+
+    for i in range(counts["service_principals"]):
+        sp_id = str(state.next_id())
+        sp = {"id": sp_id, "displayName": f"sp-{i}", "applicationId": str(uuid.UUID(int=rng.getrandbits(128)))}
+        state.service_principals[sp_id] = sp
+        state.account_service_principals[sp_id] = dict(sp)
+    refs["service_principal_id"] = str(state.next_id())
+    bench_sp = {
+        "id": refs["service_principal_id"],
+        "displayName": "bench-sp",
+        "applicationId": str(uuid.UUID(int=rng.getrandbits(128))),
+    }
+    state.service_principals[refs["service_principal_id"]] = bench_sp
+    state.account_service_principals[refs["service_principal_id"]] = dict(bench_sp)
+    refs["service_principal_secret_id"] = "bench-secret"
+    state.service_principal_secrets[refs["service_principal_id"]] = [
+        {"id": "bench-secret", "status": "ACTIVE", "create_time": "2024-01-01T00:00:00Z"}
+    ]
+
+    account = {"account_id": state.account_id, "creation_time": now}
+    for i in range(counts["account_objects"]):
+        state.credentials[f"cred-{i}"] = {
+            **account,
+            "credentials_id": f"cred-{i}",
+            "credentials_name": f"credentials-{i}",
+            "aws_credentials": {"sts_role": {"role_arn": f"arn:aws:iam::123456789012:role/r{i}", "external_id": "x"}},
+        }
+        state.storage_configurations[f"storage-{i}"] = {
+            **account,
+            "storage_configuration_id": f"storage-{i}",
+            "storage_configuration_name": f"storage-{i}",
+            "root_bucket_info": {"bucket_name": f"bucket-{i}"},
+        }
+        state.networks[f"network-{i}"] = {
+            **account,
+            "network_id": f"network-{i}",
+            "network_name": f"network-{i}",
+            "vpc_id": f"vpc-{i}",
+            "subnet_ids": ["subnet-a", "subnet-b"],
+            "security_group_ids": ["sg-a"],
+        }
+        workspace_id = state.next_id()
+        state.workspaces[workspace_id] = {
+            **account,
+            "workspace_id": workspace_id,
+            "workspace_name": f"workspace-{i}",
+            "deployment_name": f"dbc-{i}",
+            "aws_region": "eu-west-1",
+            "credentials_id": f"cred-{i}",
+            "storage_configuration_id": f"storage-{i}",
+            "workspace_status": "RUNNING",
+        }
+    refs["credentials_id"] = "cred-0"
+    refs["storage_configuration_id"] = "storage-0"
+    refs["network_id"] = "network-0"
+    refs["workspace_id"] = next(iter(state.workspaces))
+
+    return refs
@@ -0,0 +1,332 @@
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from databricks_cdk.profiling import upload_to_s3
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_RECORD_DIR_ENV = "CASSETTE_RECORD_DIR"
+CASSETTE_S3_PREFIX_ENV = "CASSETTE_S3_PREFIX"
+
+REDACTED = "REDACTED"
+
+# Only these response headers are kept, everything else (cookies, request ids) is dropped
+RECORDED_RESPONSE_HEADERS = ["Content-Type", "Retry-After"]
+
+
+class CassetteError(Exception):
+    pass
+
+
+class ScrubRule(BaseModel):
+    """
+    Replaces secrets before an interaction is written. With `json_key` the value of every matching key in json
+    request and response bodies is replaced, with `pattern` every regex match in urls and bodies is replaced.
+    """
+
+    json_key: Optional[str] = None
+    pattern: Optional[str] = None
+    replacement: str = REDACTED
+
+
+DEFAULT_SCRUB_RULES = [
+    ScrubRule(
+        json_key=r"(?i)^(token_value|access_token|refresh_token|id_token|client_secret|secret|string_value"
+        r"|bytes_value|password|personal_access_token|private_key|contents)$"
+    ),
+    ScrubRule(pattern=r"dapi[0-9a-f]{32}(-\d+)?", replacement="dapiREDACTED"),
+    ScrubRule(pattern=r"(?i)(client_secret|client_assertion|password)=[^&\s\"]+", replacement=r"\1=REDACTED"),
+    ScrubRule(pattern=r"(?i)bearer [A-Za-z0-9._~+/=-]+", replacement="Bearer REDACTED"),
+]
+
+
+class Interaction(BaseModel):
+    method: str
+    path: str
+    query: str = ""
+    request_body: Any = None
+    status_code: int
+    response_headers: Dict[str, str] = {}
+    response_body: str = ""
+    # seconds since the start of the recording and the duration of the request
+    offset_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+
+class Cassette(BaseModel):
+    version: int = 1
+    recorded_at: Optional[str] = None
+    interactions: List[Interaction] = []
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:  # type: ignore
+            return cls.parse_obj(json.load(f))
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt") as f:  # type: ignore
+            json.dump(self.dict(), f, indent=1)
+
+
+def _key_replacement(key: str, rules: List[ScrubRule]) -> Optional[str]:
+    for rule in rules:
+        if rule.json_key and re.search(rule.json_key, key):
+            return rule.replacement
+    return None
+
+
+def _scrub_json(value: Any, rules: List[ScrubRule]) -> Any:
+    if isinstance(value, dict):
+        scrubbed = {}
+        for k, v in value.items():
+            replacement = _key_replacement(k, rules)
+            scrubbed[k] = replacement if replacement is not None and v is not None else _scrub_json(v, rules)
+        return scrubbed
+    if isinstance(value, list):
+        return [_scrub_json(v, rules) for v in value]
+    if isinstance(value, str):
+        return _scrub_text(value, rules)
+    return value
+
+
+def _scrub_text(text: str, rules: List[ScrubRule]) -> str:
+    for rule in rules:
+        if rule.pattern:
+            text = re.sub(rule.pattern, rule.replacement, text)
+    return text
+
+
+def scrub_body(body: Any, rules: List[ScrubRule]) -> Any:
+    """
+    Parses the body as json when possible and scrubs it, other bodies are scrubbed as text. Streamed request bodies
+    can't be read without consuming them, so they are not recorded.
+    """
+    if not isinstance(body, (str, bytes)):
+        return None
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    try:
+        return _scrub_json(json.loads(body), rules)
+    except ValueError:
+        return _scrub_text(body, rules)
+
+
+def _split_url(url: str) -> Tuple[str, str]:
+    """Path and normalized (sorted) query string, hosts are not recorded or matched on"""
+    parsed = urlparse(url)
+    return parsed.path.rstrip("/") or "/", urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+
+
+def _body_key(body: Any) -> str:
+    return json.dumps(body, sort_keys=True) if body is not None else ""
+
+
+class _AdapterPatch:
+    """Replaces HTTPAdapter.send, the transport below both the requests calls in utils and the sdk clients"""
+
+    _lock = threading.Lock()
+    _active: Optional[Any] = None
+    _original_send = HTTPAdapter.send
+
+    @classmethod
+    def install(cls, handler):
+        with cls._lock:
+            if cls._active is not None:
+                raise CassetteError("Another cassette is already recording or replaying")
+            cls._active = handler
+
+            def send(adapter, request, **kwargs):
+                return handler(adapter, request, **kwargs)
+
+            HTTPAdapter.send = send  # type: ignore
+
+    @classmethod
+    def uninstall(cls):
+        with cls._lock:
+            HTTPAdapter.send = cls._original_send  # type: ignore
+            cls._active = None
+
+
+class Recorder:
+    """Records every request done while active into a cassette, scrubbing secrets on the way"""
+
+    def __init__(self, scrub_rules: Optional[List[ScrubRule]] = None):
+        self.scrub_rules = scrub_rules if scrub_rules is not None else DEFAULT_SCRUB_RULES
+        self.cassette = Cassette(recorded_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, adapter: HTTPAdapter, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        offset = time.perf_counter() - self._start
+        response = _AdapterPatch._original_send(adapter, request, **kwargs)
+        elapsed = time.perf_counter() - self._start - offset
+        # reading the content here is fine, the databricks api's don't stream responses
+        content = response.content
+        path, query = _split_url(request.url or "")
+        interaction = Interaction(
+            method=request.method or "GET",
+            path=path,
+            query=_scrub_text(query, self.scrub_rules),
+            request_body=scrub_body(request.body, self.scrub_rules),
+            status_code=response.status_code,
+            response_headers={h: response.headers[h] for h in RECORDED_RESPONSE_HEADERS if h in response.headers},
+            response_body=self._scrub_response(content),
+            offset_seconds=offset,
+            elapsed_seconds=elapsed,
+        )
+        with self._lock:
+            self.cassette.interactions.append(interaction)
+        return response
+
+    def _scrub_response(self, content: bytes) -> str:
+        scrubbed = scrub_body(content, self.scrub_rules)
+        if isinstance(scrubbed, str):
+            return scrubbed
+        return json.dumps(scrubbed)
+
+
+class Player:
+    """
+    Answers requests from a cassette without network access. Requests are matched on method, path, query and
+    optionally body. Identical requests get the recorded responses in recorded order, so polling sequences replay
+    as they happened. `time_scale` controls the delays: 0 replays instantly, 1 with the recorded durations and for
+    example 0.1 ten times faster.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        time_scale: float = 0.0,
+        match_body: bool = False,
+        allow_repeats: bool = True,
+    ):
+        self.cassette = cassette
+        self.time_scale = time_scale
+        self.match_body = match_body
+        self.allow_repeats = allow_repeats
+        self.played: List[Interaction] = []
+        self._queues: Dict[Tuple[str, ...], List[Interaction]] = {}
+        self._last: Dict[Tuple[str, ...], Interaction] = {}
+        self._lock = threading.Lock()
+        for interaction in cassette.interactions:
+            self._queues.setdefault(
+                self._key(interaction.method, interaction.path, interaction.query, interaction.request_body), []
+            ).append(interaction)
+
+    def _key(self, method: str, path: str, query: str, body: Any) -> Tuple[str, ...]:
+        return (method, path, query, _body_key(body) if self.match_body else "")
+
+    def __call__(self, adapter: HTTPAdapter, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        path, query = _split_url(request.url or "")
+        body = scrub_body(request.body, DEFAULT_SCRUB_RULES) if self.match_body else None
+        key = self._key(request.method or "GET", path, _scrub_text(query, DEFAULT_SCRUB_RULES), body)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                interaction = queue.pop(0)
+                self._last[key] = interaction
+            elif self.allow_repeats and key in self._last:
+                interaction = self._last[key]
+            else:
+                raise CassetteError(f"No recorded interaction for {request.method} {path}?{query}")
+            self.played.append(interaction)
+
+        if self.time_scale > 0:
+            time.sleep(interaction.elapsed_seconds * self.time_scale)
+        return self._build_response(request, interaction)
+
+    @staticmethod
+    def _build_response(request: requests.PreparedRequest, interaction: Interaction) -> requests.Response:
+        response = requests.Response()
+        response.status_code = interaction.status_code
+        response.headers = CaseInsensitiveDict(interaction.response_headers)
+        response._content = interaction.response_body.encode()
+        response.headers["Content-Length"] = str(len(response._content))
+        response.encoding = "utf-8"
+        response.url = request.url or ""
+        response.request = request
+        response.reason = requests.status_codes._codes.get(interaction.status_code, [""])[0].upper()  # type: ignore
+        return response
+
+
+@contextmanager
+def record(path: Optional[str] = None, scrub_rules: Optional[List[ScrubRule]] = None) -> Iterator[Recorder]:
+    """Records all http traffic of the wrapped block, saved to path (.json or .json.gz) when given"""
+    recorder = Recorder(scrub_rules)
+    _AdapterPatch.install(recorder)
+    try:
+        yield recorder
+    finally:
+        _AdapterPatch.uninstall()
+        if path is not None:
+            recorder.cassette.save(path)
+
+
+@contextmanager
+def replay(
+    cassette: Union[str, Cassette], time_scale: float = 0.0, match_body: bool = False, allow_repeats: bool = True
+) -> Iterator[Player]:
+    """Replays a cassette (or path to one) for all http traffic of the wrapped block"""
+    player = Player(
+        Cassette.load(cassette) if isinstance(cassette, str) else cassette,
+        time_scale=time_scale,
+        match_body=match_body,
+        allow_repeats=allow_repeats,
+    )
+    _AdapterPatch.install(player)
+    try:
+        yield player
+    finally:
+        _AdapterPatch.uninstall()
+
+
+@contextmanager
+def record_invocation(name: str) -> Iterator[Optional[Recorder]]:
+    """
+    Records the http traffic of an invocation when CASSETTE_RECORD_DIR is set, optionally uploaded to
+    CASSETTE_S3_PREFIX. Does nothing otherwise.
+    """
+    record_dir = os.environ.get(CASSETTE_RECORD_DIR_ENV)
+    if not record_dir:
+        yield None
+        return
+
+    path = os.path.join(record_dir, f"{name}-{int(time.time() * 1000)}.json.gz")
+    recorder: Optional[Recorder] = None
+    try:
+        with record(scrub_rules=DEFAULT_SCRUB_RULES) as recorder:
+            yield recorder
+    finally:
+        # Failing invocations are the ones worth replaying, so they are saved as well
+        if recorder is not None:
+            _save_recording(recorder, name, path)
+
+
+def _save_recording(recorder: Recorder, name: str, path: str):
+    try:
+        recorder.cassette.save(path)
+        s3_prefix = os.environ.get(CASSETTE_S3_PREFIX_ENV)
+        if s3_prefix:
+            path = upload_to_s3(path, s3_prefix)
+        logger.info(f"Recorded {len(recorder.cassette.interactions)} requests of {name} to {path}")
+    except Exception as e:
+        # Recording should never break the actual invocation
+        logger.exception(e)
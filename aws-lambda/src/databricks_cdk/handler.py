@@ -7,14 +7,38 @@ def handler(event, context):
     if lambda_method == "cfn-deploy":
         from databricks_cdk.resources.handler import handler
 
-        handler(event, context)
+        return handler(event, context)
     elif lambda_method == "submit-job":
         from databricks_cdk.jobs.submit_job import handler
 
-        handler(event, context)
+        return handler(event, context)
     elif lambda_method == "job-status":
         from databricks_cdk.jobs.job_status import handler
 
-        handler(event, context)
+        return handler(event, context)
+    elif lambda_method == "run-output":
+        from databricks_cdk.jobs.run_output import handler
+
+        return handler(event, context)
+    elif lambda_method == "submit-run":
+        from databricks_cdk.jobs.submit_run import handler
+
+        return handler(event, context)
+    elif lambda_method == "repair-run":
+        from databricks_cdk.jobs.repair_run import handler
+
+        return handler(event, context)
+    elif lambda_method == "run-dag":
+        from databricks_cdk.jobs.run_dag import handler
+
+        return handler(event, context)
+    elif lambda_method == "job-callback":
+        from databricks_cdk.jobs.callback import handler
+
+        return handler(event, context)
+    elif lambda_method == "callback-sweep":
+        from databricks_cdk.jobs.callback import sweep_handler
+
+        return sweep_handler(event, context)
     else:
         raise RuntimeError(f"Lambda method does not exists: {lambda_method}")
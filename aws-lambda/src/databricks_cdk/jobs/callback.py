@@ -0,0 +1,260 @@
+"""
+Completes step functions waitForTaskToken tasks when databricks runs finish, instead of polling job-status.
+
+submit-job and submit-run register the task token of a run, the job-callback method receives the databricks webhook
+notifications of the run and sends the task success or failure. callback-sweep is the slow safety net for missed
+webhooks and is meant to run on a schedule.
+"""
+import base64
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+from pydantic import BaseModel
+
+from databricks_cdk.cassette import record_invocation
+from databricks_cdk.jobs.job_status import TERMINAL_LIFE_CYCLE_STATES, get_runs_status
+from databricks_cdk.jobs.projection import project_run
+from databricks_cdk.profiling import profile_invocation
+from databricks_cdk.utils import get_param, get_request
+
+logger = logging.getLogger(__name__)
+
+# Registrations are dropped by the table ttl after this, step functions tasks should time out before it
+CALLBACK_TTL_SECONDS = 14 * 24 * 3600
+# Basic auth credentials of the databricks notification destination that posts to the job-callback function url
+CALLBACK_USERNAME = os.environ.get("CALLBACK_USERNAME", "databricks")
+CALLBACK_PASSWORD_PARAM = os.environ.get("CALLBACK_PASSWORD_PARAM", "/databricks/callback/password")
+# Errors of send_task_* for tasks that can't be completed anymore, the registration is removed
+GONE_TASK_ERRORS = ["TaskTimedOut", "TaskDoesNotExist", "InvalidToken"]
+
+
+class CallbackRegistration(BaseModel):
+    run_id: int
+    task_token: str
+    workspace_url: str
+    registered_at: float
+
+
+class InMemoryCallbackStore:
+    """Stand-in for the table in tests and local runs, only shared within one process so never used by default"""
+
+    def __init__(self):
+        self._registrations: Dict[Tuple[str, int], CallbackRegistration] = {}
+        self._lock = threading.Lock()
+
+    def put(self, registration: CallbackRegistration):
+        with self._lock:
+            self._registrations[(registration.workspace_url, registration.run_id)] = registration
+
+    def get(self, workspace_url: str, run_id: int) -> Optional[CallbackRegistration]:
+        with self._lock:
+            return self._registrations.get((workspace_url, run_id))
+
+    def find(self, run_id: int) -> List[CallbackRegistration]:
+        with self._lock:
+            return [r for r in self._registrations.values() if r.run_id == run_id]
+
+    def delete(self, workspace_url: str, run_id: int):
+        with self._lock:
+            self._registrations.pop((workspace_url, run_id), None)
+
+    def list(self) -> List[CallbackRegistration]:
+        with self._lock:
+            return list(self._registrations.values())
+
+
+class DynamoDbCallbackStore:
+    """
+    Registrations in a dynamodb table with string partition key run_id, string sort key workspace_url and ttl attribute
+    expires_at. Run ids are only unique within a workspace, notifications don't tell the workspace so they query all
+    registrations of the run id.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.client = boto3.client("dynamodb", endpoint_url=os.environ.get("DYNAMODB_ENDPOINT_URL"))
+
+    def put(self, registration: CallbackRegistration):
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={
+                "run_id": {"S": str(registration.run_id)},
+                "task_token": {"S": registration.task_token},
+                "workspace_url": {"S": registration.workspace_url},
+                "registered_at": {"N": str(registration.registered_at)},
+                "expires_at": {"N": str(int(registration.registered_at + CALLBACK_TTL_SECONDS))},
+            },
+        )
+
+    @staticmethod
+    def _from_item(item: dict) -> CallbackRegistration:
+        return CallbackRegistration(
+            run_id=int(item["run_id"]["S"]),
+            task_token=item["task_token"]["S"],
+            workspace_url=item["workspace_url"]["S"],
+            registered_at=float(item["registered_at"]["N"]),
+        )
+
+    @staticmethod
+    def _key(workspace_url: str, run_id: int) -> dict:
+        return {"run_id": {"S": str(run_id)}, "workspace_url": {"S": workspace_url}}
+
+    def get(self, workspace_url: str, run_id: int) -> Optional[CallbackRegistration]:
+        item = self.client.get_item(
+            TableName=self.table_name, Key=self._key(workspace_url, run_id), ConsistentRead=True
+        ).get("Item")
+        return self._from_item(item) if item is not None else None
+
+    def find(self, run_id: int) -> List[CallbackRegistration]:
+        paginator = self.client.get_paginator("query")
+        pages = paginator.paginate(
+            TableName=self.table_name,
+            KeyConditionExpression="run_id = :run_id",
+            ExpressionAttributeValues={":run_id": {"S": str(run_id)}},
+            ConsistentRead=True,
+        )
+        return [self._from_item(item) for page in pages for item in page["Items"]]
+
+    def delete(self, workspace_url: str, run_id: int):
+        self.client.delete_item(TableName=self.table_name, Key=self._key(workspace_url, run_id))
+
+    def list(self) -> List[CallbackRegistration]:
+        paginator = self.client.get_paginator("scan")
+        return [
+            self._from_item(item) for page in paginator.paginate(TableName=self.table_name) for item in page["Items"]
+        ]
+
+
+class CallbackStoreNotConfiguredError(Exception):
+    pass
+
+
+def get_callback_store():
+    """
+    The table of CALLBACK_TABLE. Without it a registered task token would only live in the memory of one lambda and
+    its task would never complete, so that is an error. Tests inject the in memory stand-in instead.
+    """
+    table_name = os.environ.get("CALLBACK_TABLE")
+    if not table_name:
+        raise CallbackStoreNotConfiguredError(
+            "CALLBACK_TABLE is not set, task tokens can't be registered. Enable callbacks on the step functions lambdas"
+        )
+    return DynamoDbCallbackStore(table_name)
+
+
+def get_sfn_client():
+    return boto3.client("stepfunctions", endpoint_url=os.environ.get("STEPFUNCTIONS_ENDPOINT_URL"))
+
+
+def register_callback(workspace_url: str, run_id: int, task_token: str, store=None):
+    """Registers the task token of a run, get the store before starting the run so a missing table starts nothing"""
+    (store or get_callback_store()).put(
+        CallbackRegistration(
+            run_id=run_id, task_token=task_token, workspace_url=workspace_url, registered_at=time.time()
+        )
+    )
+    logger.info(f"Registered the task token of run {run_id}")
+
+
+def complete_callback(registration: CallbackRegistration, store=None, sfn_client=None) -> bool:
+    """
+    Sends the task success or failure when the run is done, returns whether it was. The state is read from databricks
+    instead of taken from the notification, so a notification can't complete a task early.
+    """
+    store = store or get_callback_store()
+    url = f"{registration.workspace_url}/api/2.1/jobs/runs/get"
+    run = get_request(url, params={"run_id": registration.run_id})
+    state = run.get("state", {})
+    if state.get("life_cycle_state") not in TERMINAL_LIFE_CYCLE_STATES:
+        return False
+
+    sfn_client = sfn_client or get_sfn_client()
+    try:
+        if state.get("result_state") != "SUCCESS":
+            sfn_client.send_task_failure(
+                taskToken=registration.task_token,
+                error=f"Databricks.{state.get('result_state') or state.get('life_cycle_state')}",
+                cause=state.get("state_message") or f"Run {registration.run_id} did not succeed",
+            )
+        else:
+            sfn_client.send_task_success(
+                taskToken=registration.task_token, output=json.dumps(project_run(run, profile="minimal"))
+            )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in GONE_TASK_ERRORS:
+            raise
+        logger.warning(f"The task of run {registration.run_id} can't be completed anymore: {e}")
+    store.delete(registration.workspace_url, registration.run_id)
+    logger.info(f"Completed the task of run {registration.run_id}: {state}")
+    return True
+
+
+def _notification_run_id(event: dict) -> Optional[int]:
+    """Run id of a databricks webhook notification, from a lambda function url request or the payload itself"""
+    payload = event
+    if "body" in event:
+        body = base64.b64decode(event["body"]) if event.get("isBase64Encoded") else event["body"]
+        payload = json.loads(body or "{}")
+    run_id = payload.get("run", {}).get("run_id")
+    return int(run_id) if run_id is not None else None
+
+
+def _is_authorized(event: dict) -> bool:
+    """Whether the function url request has the basic auth credentials of the notification destination"""
+    headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+    credentials = f"{CALLBACK_USERNAME}:{get_param(CALLBACK_PASSWORD_PARAM, required=True)}"
+    expected = f"Basic {base64.b64encode(credentials.encode()).decode()}"
+    return hmac.compare_digest(headers.get("authorization", "").encode(), expected.encode())
+
+
+def receive_notification(event: dict) -> dict:
+    """
+    Handles a notification posted to the function url, which needs the basic auth credentials. Direct invocations
+    with the payload itself are already authorized by IAM.
+    """
+    if "body" in event and not _is_authorized(event):
+        logger.warning("Rejected a notification without valid credentials")
+        return {"statusCode": 401, "body": json.dumps({"message": "Unauthorized"})}
+    run_id = _notification_run_id(event)
+    store = get_callback_store()
+    registrations = store.find(run_id) if run_id is not None else []
+    if not registrations:
+        logger.info(f"No task registered for run {run_id}")
+        return {"statusCode": 200, "body": json.dumps({"completed": False})}
+    # The same run id can be registered in several workspaces, only the finished runs complete their task
+    completed = [complete_callback(registration, store) for registration in registrations]
+    return {"statusCode": 200, "body": json.dumps({"completed": any(completed)})}
+
+
+def sweep_callbacks() -> dict:
+    """Completes the registered tasks of runs that finished without a notification coming through"""
+    store = get_callback_store()
+    registrations = store.list()
+    by_workspace: Dict[str, List[CallbackRegistration]] = {}
+    for registration in registrations:
+        by_workspace.setdefault(registration.workspace_url, []).append(registration)
+    completed = 0
+    for workspace_url, workspace_registrations in by_workspace.items():
+        status = get_runs_status(f"{workspace_url}/api/2.1/jobs/runs/get", [r.run_id for r in workspace_registrations])
+        for registration in workspace_registrations:
+            if status.runs[str(registration.run_id)].life_cycle_state in TERMINAL_LIFE_CYCLE_STATES:
+                completed += complete_callback(registration, store)
+    logger.info(f"Completed {completed} of {len(registrations)} registered tasks")
+    return {"registered": len(registrations), "completed": completed}
+
+
+def handler(event, context):
+    with record_invocation("job-callback"), profile_invocation("job-callback", event):
+        return receive_notification(event)
+
+
+def sweep_handler(event, context):
+    with record_invocation("callback-sweep"), profile_invocation("callback-sweep", event):
+        return sweep_callbacks()
@@ -1,14 +1,221 @@
-from pydantic import BaseModel
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 
-from databricks_cdk.utils import get_request
+from pydantic import BaseModel, root_validator
+
+from databricks_cdk.cassette import record_invocation
+from databricks_cdk.jobs.projection import project_run
+from databricks_cdk.jobs.run_cache import TERMINAL_LIFE_CYCLE_STATES, get_run_cache
+from databricks_cdk.jobs.storage import store_json
+from databricks_cdk.profiling import profile_invocation
+from databricks_cdk.utils import get_host_rate_limiter, get_remaining_seconds, get_request, get_session, lambda_deadline
+
+logger = logging.getLogger(__name__)
+
+FAILED_RESULT_STATES = ["FAILED", "TIMEDOUT", "CANCELED", "MAXIMUM_CONCURRENT_RUNS_REACHED", "UPSTREAM_FAILED"]
+WAIT_MIN_DELAY_SECONDS = 2.0
+WAIT_MAX_DELAY_SECONDS = 30.0
+DEFAULT_MAX_CONCURRENCY = 10
+# Time kept free to return the status, only a response has to be sent so it is smaller than the cloudformation margin
+STATUS_DEADLINE_MARGIN_SECONDS = float(os.environ.get("STATUS_DEADLINE_MARGIN_SECONDS", "3"))
+# runs/get requests per second per workspace, the read endpoint allows more than the default host limit
+STATUS_REQUESTS_PER_SECOND = float(os.environ.get("STATUS_REQUESTS_PER_SECOND", "30"))
+# Runs are not fetched anymore with less time left than this, they are returned as NOT_FETCHED
+FETCH_MIN_REMAINING_SECONDS = 1.0
+NOT_FETCHED = "NOT_FETCHED"
+
+T = TypeVar("T")
 
 
 class StatusJobEvent(BaseModel):
     workspace_url: str
-    run_id: int
+    run_id: Optional[int] = None
+    # Status of many runs at once, returned as a compact RunsStatus instead of the full runs/get responses. Runs are
+    # fetched at STATUS_REQUESTS_PER_SECOND, so 300 runs take about 10 seconds and need a lambda timeout of 15 seconds or
+    # more. The runs left when the deadline comes are returned as NOT_FETCHED with `partial` set.
+    run_ids: Optional[List[int]] = None
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    # Keep polling within the invocation until the run is finished, or in one of wait_for_states
+    wait: bool = False
+    wait_for_states: List[str] = []
+    max_wait_seconds: Optional[float] = None
+    # Only return these field paths (like `tasks[*].state`), or the fields of a profile from projection.PROFILES
+    fields: Optional[List[str]] = None
+    profile: Optional[str] = None
+    # s3://bucket/prefix (or local directory) to store the full runs/get response in
+    full_response_destination: Optional[str] = None
+
+    @root_validator
+    def check_run_id_or_run_ids(cls, values):
+        if (values.get("run_id") is None) == (values.get("run_ids") is None):
+            raise ValueError("Either run_id or run_ids should be given")
+        return values
+
+
+class RunState(BaseModel):
+    life_cycle_state: Optional[str] = None
+    result_state: Optional[str] = None
+    state_message: Optional[str] = None
+    error: Optional[str] = None
+    # Http status of the failed runs/get request, 404 for runs that don't exist anymore
+    error_status_code: Optional[int] = None
+
+
+class RunsStatus(BaseModel):
+    runs: Dict[str, RunState]
+    all_terminal: bool
+    any_failed: bool
+    counts: Dict[str, int]
+    # Some runs were not fetched before the lambda deadline
+    partial: bool = False
+    still_running: Optional[bool] = None
+
+
+def is_done(run: dict, wait_for_states: List[str]) -> bool:
+    life_cycle_state = run.get("state", {}).get("life_cycle_state")
+    return life_cycle_state in TERMINAL_LIFE_CYCLE_STATES or life_cycle_state in wait_for_states
+
+
+def _poll(fetch: Callable[[], T], done: Callable[[T], bool], max_wait_seconds: Optional[float]) -> Tuple[T, bool]:
+    """
+    Fetches with backoff until done or the remaining lambda time (or max_wait_seconds) runs out, returns the last
+    result and whether it is still not done
+    """
+    deadline = time.monotonic() + max_wait_seconds if max_wait_seconds is not None else None
+    delay = WAIT_MIN_DELAY_SECONDS
+    while True:
+        result = fetch()
+        if done(result):
+            return result, False
+        remaining = get_remaining_seconds()
+        if deadline is not None and (remaining is None or deadline - time.monotonic() < remaining):
+            remaining = deadline - time.monotonic()
+        if remaining is not None and remaining < delay:
+            return result, True
+        time.sleep(delay)
+        delay = min(delay * 1.5, WAIT_MAX_DELAY_SECONDS)
+
+
+def get_run(url: str, run_id: int, minimal: bool = False) -> dict:
+    """
+    runs/get through the run cache, so concurrent polls of the same run share one request. Nested values are shared
+    with the cache and should not be changed. With `minimal` only the minimal projection of the run is needed.
+    """
+
+    def fetch() -> dict:
+        get_host_rate_limiter(url, "runs/get", STATUS_REQUESTS_PER_SECOND).acquire()
+        return get_request(url, params={"run_id": run_id}, session=get_session())
+
+    return dict(get_run_cache().get_run(url, run_id, fetch, minimal))
+
+
+def wait_for_run(
+    url: str, run_id: int, wait_for_states: Optional[List[str]] = None, max_wait_seconds: Optional[float] = None
+) -> dict:
+    """
+    Polls the run with backoff until it is done or the remaining lambda time (or max_wait_seconds) runs out. The
+    returned run has `still_running` set to tell the two apart, so step functions only loops when it's needed.
+    """
+    states = wait_for_states or []
+    run, still_running = _poll(lambda: get_run(url, run_id), lambda r: is_done(r, states), max_wait_seconds)
+    if still_running:
+        logger.info(f"Run {run_id} is {run['state'].get('life_cycle_state')}, returning before the deadline")
+    return {**run, "still_running": still_running}
+
+
+def _get_run_state(url: str, run_id: int, fetch_until: Optional[float] = None) -> RunState:
+    if fetch_until is not None and time.monotonic() > fetch_until:
+        return RunState(error=NOT_FETCHED)
+    try:
+        state = get_run(url, run_id, minimal=True).get("state", {})
+        return RunState(
+            life_cycle_state=state.get("life_cycle_state"),
+            result_state=state.get("result_state"),
+            state_message=state.get("state_message"),
+        )
+    except Exception as e:
+        logger.warning(f"Failed to get the state of run {run_id}: {e}")
+        response = getattr(e, "response", None)
+        return RunState(error=f"{type(e).__name__}: {e}", error_status_code=getattr(response, "status_code", None))
+
+
+def get_runs_status(url: str, run_ids: List[int], max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> RunsStatus:
+    """
+    Gets the states of the runs concurrently, runs that can't be fetched have an error and count as not done. Near the
+    lambda deadline the remaining runs are skipped, and counted as NOT_FETCHED.
+    """
+    states: List[RunState] = []
+    # The lambda deadline is not visible in the worker threads
+    remaining = get_remaining_seconds()
+    fetch_until = time.monotonic() + remaining - FETCH_MIN_REMAINING_SECONDS if remaining is not None else None
+    if run_ids:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(run_ids)))) as executor:
+            states = list(executor.map(lambda run_id: _get_run_state(url, run_id, fetch_until), run_ids))
+    counts: Dict[str, int] = {}
+    for state in states:
+        key = state.life_cycle_state or (NOT_FETCHED if state.error == NOT_FETCHED else "ERROR")
+        counts[key] = counts.get(key, 0) + 1
+    return RunsStatus(
+        runs={str(run_id): state for run_id, state in zip(run_ids, states)},
+        all_terminal=all(s.life_cycle_state in TERMINAL_LIFE_CYCLE_STATES for s in states),
+        any_failed=any(
+            s.life_cycle_state == "INTERNAL_ERROR" or s.result_state in FAILED_RESULT_STATES for s in states
+        ),
+        counts=counts,
+        partial=NOT_FETCHED in counts,
+    )
+
+
+def wait_for_runs(
+    url: str,
+    run_ids: List[int],
+    wait_for_states: Optional[List[str]] = None,
+    max_wait_seconds: Optional[float] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> RunsStatus:
+    """Like wait_for_run, done when all runs are done"""
+    states = wait_for_states or []
+    status, still_running = _poll(
+        lambda: get_runs_status(url, run_ids, max_concurrency),
+        lambda s: all(
+            r.life_cycle_state in TERMINAL_LIFE_CYCLE_STATES or r.life_cycle_state in states for r in s.runs.values()
+        ),
+        max_wait_seconds,
+    )
+    status.still_running = still_running
+    return status
 
 
 def handler(event, context):
     parsed_event = StatusJobEvent.parse_obj(event)
     url = f"{parsed_event.workspace_url}/api/2.1/jobs/runs/get"
-    return get_request(url, params={"run_id": parsed_event.run_id})
+    with record_invocation("job-status"), profile_invocation("job-status", event), lambda_deadline(
+        context, STATUS_DEADLINE_MARGIN_SECONDS
+    ):
+        if parsed_event.run_ids is not None:
+            if parsed_event.wait:
+                return wait_for_runs(
+                    url,
+                    parsed_event.run_ids,
+                    parsed_event.wait_for_states,
+                    parsed_event.max_wait_seconds,
+                    parsed_event.max_concurrency,
+                ).dict()
+            return get_runs_status(url, parsed_event.run_ids, parsed_event.max_concurrency).dict()
+        if parsed_event.wait:
+            run = wait_for_run(url, parsed_event.run_id, parsed_event.wait_for_states, parsed_event.max_wait_seconds)
+        else:
+            run = get_run(url, parsed_event.run_id)
+        return _shape_response(parsed_event, run)
+
+
+def _shape_response(event: StatusJobEvent, run: dict) -> dict:
+    """Stores the full run when asked and projects it, keeping the fields added by job-status itself"""
+    extra = {k: run.pop(k) for k in ["still_running"] if k in run}
+    if event.full_response_destination is not None:
+        stored = store_json(event.full_response_destination, f"run-{event.run_id}-{int(time.time() * 1000)}.json", run)
+        extra["full_response_uri"] = stored.uri
+    return {**project_run(run, event.fields, event.profile), **extra}
@@ -0,0 +1,115 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Step functions fails on state payloads over 256 KiB, stay well below it
+MAX_RESPONSE_BYTES = 200 * 1024
+MAX_STRING_LENGTH = 1000
+
+MINIMAL_FIELDS = [
+    "job_id",
+    "run_id",
+    "run_name",
+    "number_in_job",
+    "original_attempt_run_id",
+    "state",
+    "start_time",
+    "end_time",
+    "run_duration",
+    "run_page_url",
+]
+
+PROFILES: Dict[str, List[str]] = {
+    "minimal": MINIMAL_FIELDS,
+    "tasks": MINIMAL_FIELDS
+    + [
+        "tasks[*].task_key",
+        "tasks[*].run_id",
+        "tasks[*].attempt_number",
+        "tasks[*].state",
+        "tasks[*].start_time",
+        "tasks[*].end_time",
+        "tasks[*].depends_on",
+        "repair_history[*].id",
+        "repair_history[*].type",
+        "repair_history[*].state",
+    ],
+}
+
+
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()
+
+
+def parse_path(path: str) -> List[str]:
+    """Splits a field path like `tasks[*].state.life_cycle_state` in keys, `*` selects every item of a list"""
+    return [token for token in re.split(r"\.|\[(\*)\]", path) if token]
+
+
+def _select(value: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        return value
+    token, rest = tokens[0], tokens[1:]
+    if token == "*":
+        if not isinstance(value, list):
+            return _MISSING
+        selected = [_select(v, rest) for v in value]
+        # items without the field stay as empty objects, so the paths of one list merge by position
+        return [{} if s is _MISSING else s for s in selected]
+    if not isinstance(value, dict) or token not in value:
+        return _MISSING
+    selected = _select(value[token], rest)
+    return _MISSING if selected is _MISSING else {token: selected}
+
+
+def _merge(a: Any, b: Any) -> Any:
+    if isinstance(a, dict) and isinstance(b, dict):
+        merged = dict(a)
+        for k, v in b.items():
+            merged[k] = _merge(merged[k], v) if k in merged else v
+        return merged
+    if isinstance(a, list) and isinstance(b, list) and len(a) == len(b):
+        return [_merge(x, y) for x, y in zip(a, b)]
+    return b
+
+
+def project(value: dict, fields: List[str]) -> dict:
+    """Only the given field paths of value, missing fields are left out"""
+    projected: dict = {}
+    for field in fields:
+        selected = _select(value, parse_path(field))
+        if selected is not _MISSING:
+            projected = _merge(projected, selected)
+    return projected
+
+
+def _shorten_strings(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _shorten_strings(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_shorten_strings(v) for v in value]
+    if isinstance(value, str) and len(value) > MAX_STRING_LENGTH:
+        return value[:MAX_STRING_LENGTH] + "...[truncated]"
+    return value
+
+
+def project_run(
+    run: dict,
+    fields: Optional[List[str]] = None,
+    profile: Optional[str] = None,
+    max_bytes: int = MAX_RESPONSE_BYTES,
+) -> dict:
+    """
+    Projects a runs/get response on the fields, or the fields of a named profile. When the result is still larger
+    than max_bytes only the minimal fields are returned, with `truncated` set, so the size is bounded for any job.
+    """
+    if profile is not None and profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile}, should be one of {sorted(PROFILES)}")
+    selected_fields = list(fields or []) + (PROFILES[profile] if profile is not None else [])
+    projected = project(run, selected_fields) if selected_fields else run
+    if len(json.dumps(projected)) <= max_bytes:
+        return projected
+    return {**_shorten_strings(project(run, MINIMAL_FIELDS)), "truncated": True}
@@ -0,0 +1,87 @@
+import logging
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from databricks_cdk.cassette import record_invocation
+from databricks_cdk.jobs.run_cache import TERMINAL_LIFE_CYCLE_STATES, get_run_cache
+from databricks_cdk.profiling import profile_invocation
+from databricks_cdk.utils import get_request, post_request
+
+logger = logging.getLogger(__name__)
+
+SUCCESSFUL_RESULT_STATES = ["SUCCESS"]
+
+
+class RepairRunEvent(BaseModel):
+    workspace_url: str
+    run_id: int
+    # Tasks to rerun, defaults to the failed and skipped tasks of the run
+    rerun_tasks: Optional[List[str]] = None
+    # Also rerun the tasks that depend on the rerun tasks, even when they succeeded
+    rerun_dependent_tasks: bool = False
+    jar_params: Optional[List[str]] = None
+    notebook_params: Optional[dict] = None
+    python_params: Optional[List[str]] = None
+    spark_submit_params: Optional[List[str]] = None
+    python_named_params: Optional[dict] = None
+
+
+class RepairRunResponse(BaseModel):
+    run_id: int
+    repair_id: Optional[int] = None
+    rerun_tasks: List[str]
+
+
+class RunNotRepairableError(Exception):
+    pass
+
+
+def get_unsuccessful_tasks(run: dict) -> List[str]:
+    """Task keys of the tasks that failed, were cancelled or skipped because of an upstream failure"""
+    return [
+        task["task_key"]
+        for task in run.get("tasks", [])
+        if task.get("state", {}).get("result_state") not in SUCCESSFUL_RESULT_STATES
+    ]
+
+
+def get_latest_repair_id(run: dict) -> Optional[int]:
+    repairs = [r for r in run.get("repair_history", []) if r.get("type") == "REPAIR"]
+    return repairs[-1]["id"] if repairs else None
+
+
+def repair_run(event: RepairRunEvent) -> RepairRunResponse:
+    """Reruns only the failed and skipped tasks of a finished run, the repair is polled with job-status on run_id"""
+    url = f"{event.workspace_url}/api/2.1/jobs/runs"
+    run = get_request(f"{url}/get", params={"run_id": event.run_id, "include_history": "true"})
+    life_cycle_state = run.get("state", {}).get("life_cycle_state")
+    if life_cycle_state not in TERMINAL_LIFE_CYCLE_STATES:
+        raise RunNotRepairableError(f"Run {event.run_id} is {life_cycle_state}, only finished runs can be repaired")
+
+    rerun_tasks = event.rerun_tasks if event.rerun_tasks is not None else get_unsuccessful_tasks(run)
+    if not rerun_tasks:
+        logger.info(f"Run {event.run_id} has no tasks to rerun")
+        return RepairRunResponse(run_id=event.run_id, rerun_tasks=[])
+
+    body = {
+        "run_id": event.run_id,
+        "rerun_tasks": rerun_tasks,
+        "rerun_dependent_tasks": event.rerun_dependent_tasks,
+        "latest_repair_id": get_latest_repair_id(run),
+        **event.dict(
+            include={"jar_params", "notebook_params", "python_params", "spark_submit_params", "python_named_params"},
+            exclude_none=True,
+        ),
+    }
+    repair_id = post_request(f"{url}/repair", body={k: v for k, v in body.items() if v is not None})["repair_id"]
+    # The cached terminal state of the run is not final anymore
+    get_run_cache().invalidate(f"{url}/get", event.run_id)
+    logger.info(f"Repairing run {event.run_id} with repair {repair_id}, rerunning {rerun_tasks}")
+    return RepairRunResponse(run_id=event.run_id, repair_id=repair_id, rerun_tasks=rerun_tasks)
+
+
+def handler(event, context):
+    parsed_event = RepairRunEvent.parse_obj(event)
+    with record_invocation("repair-run"), profile_invocation("repair-run", event):
+        return repair_run(parsed_event).dict()
@@ -0,0 +1,284 @@
+"""
+Run status cache shared by the job-status polls of one container, and optionally of all containers through dynamodb.
+
+Runs are cached for RUN_CACHE_TTL_SECONDS, runs in a terminal state for good in the dynamodb backend. Concurrent
+lookups of the same run wait for the one request in flight, and with the dynamodb backend a lease makes other containers
+wait for it too, so every run is requested from databricks at most once per interval.
+
+A terminal run can start again when it is repaired, and repair-run can only invalidate its own container and the
+backend. So with a backend the terminal runs of a container are confirmed there, and without one they expire after
+LOCAL_TERMINAL_TTL_SECONDS.
+
+The backend only holds the minimal projection of a run, large multi task runs don't fit in a dynamodb item. Lookups
+that need the whole run skip it. It is only a shortcut, when dynamodb fails the run is fetched from databricks.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+from pydantic import BaseModel
+
+from databricks_cdk.jobs.projection import project_run
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_LIFE_CYCLE_STATES = ["TERMINATED", "SKIPPED", "INTERNAL_ERROR"]
+RUN_CACHE_TTL_SECONDS = float(os.environ.get("RUN_CACHE_TTL_SECONDS", "2"))
+LOCAL_TERMINAL_TTL_SECONDS = float(os.environ.get("LOCAL_TERMINAL_TTL_SECONDS", "60"))
+# Runs kept in the container, the oldest ones are dropped after this
+MAX_LOCAL_ENTRIES = 10000
+# How long another container may take to fetch a run before it is fetched anyway
+LEASE_SECONDS = 5.0
+LEASE_POLL_SECONDS = 0.1
+# Dynamodb items are removed by the table ttl after this, terminal runs are only kept longer to bound the table
+ITEM_RETENTION_SECONDS = 24 * 3600
+TERMINAL_ITEM_RETENTION_SECONDS = 30 * 24 * 3600
+# Dynamodb items can be 400 KB, larger runs are not stored
+MAX_ITEM_BYTES = 350 * 1024
+
+Key = Tuple[str, int]
+
+
+class CachedRun(BaseModel):
+    run: dict
+    # Epoch seconds, shared between containers
+    fetched_at: float
+    terminal: bool
+    # Only the minimal projection of the run, like the entries of the backend
+    minimal: bool = False
+
+
+class InMemoryRunCacheBackend:
+    """Stand-in for the table for local runs and tests, caches using the same instance share it like containers"""
+
+    def __init__(self):
+        self._entries: Dict[Key, CachedRun] = {}
+        self._leases: Dict[Key, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Key) -> Optional[CachedRun]:
+        with self._lock:
+            cached = self._entries.get(key)
+        return cached.copy(update={"minimal": True}) if cached is not None else None
+
+    def put(self, key: Key, cached: CachedRun):
+        with self._lock:
+            self._entries[key] = cached
+            self._leases.pop(key, None)
+
+    def try_lease(self, key: Key, seconds: float) -> bool:
+        with self._lock:
+            now = time.time()
+            if self._leases.get(key, 0) > now:
+                return False
+            self._leases[key] = now + seconds
+            return True
+
+    def delete(self, key: Key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._leases.pop(key, None)
+
+
+class DynamoDbRunCacheBackend:
+    """Runs in a dynamodb table with string partition key cache_key and ttl attribute expires_at"""
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.client = boto3.client("dynamodb", endpoint_url=os.environ.get("DYNAMODB_ENDPOINT_URL"))
+
+    @staticmethod
+    def _item_key(key: Key) -> dict:
+        return {"cache_key": {"S": f"{key[0]}#{key[1]}"}}
+
+    def get(self, key: Key) -> Optional[CachedRun]:
+        """The stored run, None when there is none or dynamodb fails"""
+        try:
+            item = self.client.get_item(TableName=self.table_name, Key=self._item_key(key), ConsistentRead=True).get(
+                "Item"
+            )
+        except ClientError as e:
+            logger.warning(f"Failed to get run {key[1]} from the run cache: {e}")
+            return None
+        if item is None or "run" not in item:
+            return None
+        return CachedRun(
+            run=json.loads(item["run"]["S"]),
+            fetched_at=float(item["fetched_at"]["N"]),
+            terminal=item["terminal"]["BOOL"],
+            minimal=True,
+        )
+
+    def put(self, key: Key, cached: CachedRun):
+        """Stores the run, runs too large for an item or failing writes are skipped"""
+        run = json.dumps(cached.run)
+        if len(run.encode()) > MAX_ITEM_BYTES:
+            logger.warning(f"Run {key[1]} is too large for the run cache, not storing it")
+            return
+        retention = TERMINAL_ITEM_RETENTION_SECONDS if cached.terminal else ITEM_RETENTION_SECONDS
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    **self._item_key(key),
+                    "run": {"S": run},
+                    "fetched_at": {"N": str(cached.fetched_at)},
+                    "terminal": {"BOOL": cached.terminal},
+                    "expires_at": {"N": str(int(cached.fetched_at + retention))},
+                },
+            )
+        except ClientError as e:
+            logger.warning(f"Failed to store run {key[1]} in the run cache: {e}")
+
+    def try_lease(self, key: Key, seconds: float) -> bool:
+        """Whether this container should fetch the run, which it also should when dynamodb fails"""
+        now = time.time()
+        try:
+            self.client.update_item(
+                TableName=self.table_name,
+                Key=self._item_key(key),
+                UpdateExpression="SET lease_until = :until, expires_at = if_not_exists(expires_at, :expires)",
+                ConditionExpression="attribute_not_exists(lease_until) OR lease_until < :now",
+                ExpressionAttributeValues={
+                    ":until": {"N": str(now + seconds)},
+                    ":now": {"N": str(now)},
+                    ":expires": {"N": str(int(now + ITEM_RETENTION_SECONDS))},
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                return False
+            logger.warning(f"Failed to lease run {key[1]} in the run cache: {e}")
+            return True
+
+    def delete(self, key: Key):
+        self.client.delete_item(TableName=self.table_name, Key=self._item_key(key))
+
+
+class RunStatusCache:
+    def __init__(
+        self,
+        backend=None,
+        ttl_seconds: float = RUN_CACHE_TTL_SECONDS,
+        local_terminal_ttl_seconds: float = LOCAL_TERMINAL_TTL_SECONDS,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.local_terminal_ttl_seconds = local_terminal_ttl_seconds
+        self._local: Dict[Key, CachedRun] = {}
+        self._in_flight: Dict[Tuple[str, int, bool], Future] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, cached: Optional[CachedRun]) -> Optional[CachedRun]:
+        if cached is not None and (cached.terminal or time.time() - cached.fetched_at < self.ttl_seconds):
+            return cached
+        return None
+
+    def _fresh_local(self, cached: Optional[CachedRun], minimal: bool) -> Optional[CachedRun]:
+        """Like _fresh, but terminal runs are confirmed in the backend, or expire without one"""
+        if cached is not None and cached.minimal and not minimal:
+            return None
+        if cached is None or not cached.terminal:
+            return self._fresh(cached)
+        if self.backend is None and time.time() - cached.fetched_at < self.local_terminal_ttl_seconds:
+            return cached
+        return None
+
+    def _remember(self, key: Key, cached: CachedRun):
+        with self._lock:
+            self._local.pop(key, None)
+            self._local[key] = cached
+            if len(self._local) > MAX_LOCAL_ENTRIES:
+                del self._local[next(iter(self._local))]
+
+    def get_run(self, url: str, run_id: int, fetch: Callable[[], dict], minimal: bool = False) -> dict:
+        """
+        The run from the cache, or from `fetch` by only one of the concurrent callers. With `minimal` only the fields
+        of the minimal projection are needed, so the run can come from the backend.
+        """
+        key = (url, run_id)
+        in_flight_key = (url, run_id, minimal)
+        with self._lock:
+            cached = self._fresh_local(self._local.get(key), minimal)
+            if cached is not None:
+                return cached.run
+            in_flight = self._in_flight.get(in_flight_key)
+            if in_flight is None:
+                future: Future = Future()
+                self._in_flight[in_flight_key] = future
+        if in_flight is not None:
+            return in_flight.result()
+        try:
+            run = self._load(key, fetch, minimal)
+            future.set_result(run)
+            return run
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[in_flight_key]
+
+    def _load(self, key: Key, fetch: Callable[[], dict], minimal: bool) -> dict:
+        if self.backend is not None:
+            cached = self._fresh(self.backend.get(key))
+            if not minimal:
+                cached = self._confirmed_local(key, cached)
+            elif cached is None and not self.backend.try_lease(key, LEASE_SECONDS):
+                cached = self._wait_for_other(key)
+            if cached is not None:
+                self._remember(key, cached)
+                return cached.run
+
+        run = fetch()
+        life_cycle_state = run.get("state", {}).get("life_cycle_state")
+        cached = CachedRun(run=run, fetched_at=time.time(), terminal=life_cycle_state in TERMINAL_LIFE_CYCLE_STATES)
+        self._remember(key, cached)
+        if self.backend is not None:
+            self.backend.put(key, cached.copy(update={"run": project_run(run, profile="minimal"), "minimal": True}))
+        return run
+
+    def _confirmed_local(self, key: Key, stored: Optional[CachedRun]) -> Optional[CachedRun]:
+        """The whole run is only kept locally, a terminal one is still valid while the backend has it as terminal"""
+        with self._lock:
+            local = self._local.get(key)
+        if local is not None and not local.minimal and local.terminal and stored is not None and stored.terminal:
+            return local
+        return None
+
+    def _wait_for_other(self, key: Key) -> Optional[CachedRun]:
+        """Waits for the container holding the lease to store the run, None when it doesn't in time"""
+        deadline = time.monotonic() + LEASE_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(LEASE_POLL_SECONDS)
+            cached = self._fresh(self.backend.get(key))
+            if cached is not None:
+                return cached
+        logger.info(f"Run {key[1]} was not stored by the lease holder in time, fetching it")
+        return None
+
+    def invalidate(self, url: str, run_id: int):
+        """Drops the run, for runs that leave their terminal state again like repaired runs"""
+        with self._lock:
+            self._local.pop((url, run_id), None)
+        if self.backend is not None:
+            self.backend.delete((url, run_id))
+
+
+def _create_run_cache() -> RunStatusCache:
+    table_name = os.environ.get("RUN_CACHE_TABLE")
+    return RunStatusCache(DynamoDbRunCacheBackend(table_name) if table_name else None)
+
+
+_run_cache = _create_run_cache()
+
+
+def get_run_cache() -> RunStatusCache:
+    return _run_cache
@@ -0,0 +1,215 @@
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from databricks_cdk.cassette import record_invocation
+from databricks_cdk.jobs.job_status import (
+    NOT_FETCHED,
+    STATUS_DEADLINE_MARGIN_SECONDS,
+    TERMINAL_LIFE_CYCLE_STATES,
+    get_runs_status,
+)
+from databricks_cdk.jobs.submit_job import JobArgs, derive_idempotency_token, submit_jobs
+from databricks_cdk.profiling import profile_invocation
+from databricks_cdk.resources.jobs.validation import find_cycle_keys
+from databricks_cdk.utils import get_remaining_seconds, lambda_deadline
+
+logger = logging.getLogger(__name__)
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+SUCCESS = "SUCCESS"
+FAILED = "FAILED"
+SKIPPED = "SKIPPED"
+
+POLL_MIN_DELAY_SECONDS = 5.0
+POLL_MAX_DELAY_SECONDS = 60.0
+# A running node fails after this many status fetches in a row failed, or at once when its run is gone (404)
+MAX_STATUS_ERRORS = 5
+
+
+class DagNode(BaseModel):
+    key: str
+    job_args: JobArgs
+    depends_on: List[str] = []
+
+
+class NodeRun(BaseModel):
+    status: str = PENDING
+    run_id: Optional[int] = None
+    life_cycle_state: Optional[str] = None
+    result_state: Optional[str] = None
+    error: Optional[str] = None
+    # Failed status fetches in a row, kept in the checkpoint so they add up over invocations
+    status_errors: int = 0
+
+
+class DagCheckpoint(BaseModel):
+    dag_id: str
+    started_at: float
+    invocations: int = 0
+    nodes: Dict[str, NodeRun]
+
+
+class RunDagEvent(BaseModel):
+    """
+    A dag of jobs to run. The response is the same event with the checkpoint filled in, while still_running is set
+    it can be passed back as is to continue.
+    """
+
+    workspace_url: str
+    nodes: List[DagNode]
+    max_parallelism: int = 5
+    # Don't start new jobs after a job failed, the running ones are left to finish
+    fail_fast: bool = True
+    # Seed for the idempotency tokens of the runs, defaults to an id generated on the first invocation
+    idempotency_seed: Optional[str] = None
+    max_wait_seconds: Optional[float] = None
+    checkpoint: Optional[DagCheckpoint] = None
+    status: Optional[str] = None
+    still_running: Optional[bool] = None
+
+
+class InvalidDagError(Exception):
+    pass
+
+
+def validate_dag(nodes: List[DagNode]):
+    errors = []
+    keys = [n.key for n in nodes]
+    errors += [f"Node key '{key}' is used more than once" for key in sorted({k for k in keys if keys.count(k) > 1})]
+    for node in nodes:
+        errors += [f"Node '{node.key}' depends on unknown node '{d}'" for d in node.depends_on if d not in keys]
+        if node.key in node.depends_on:
+            errors.append(f"Node '{node.key}' depends on itself")
+    cycle_keys = find_cycle_keys({n.key: n.depends_on for n in nodes})
+    if cycle_keys:
+        errors.append(f"Nodes {cycle_keys} are part of, or depend on, a dependency cycle")
+    if errors:
+        raise InvalidDagError("Invalid dag:\n" + "\n".join(f"- {e}" for e in errors))
+
+
+def _refresh_running(event: RunDagEvent, runs: Dict[str, NodeRun]) -> bool:
+    """Updates the running nodes with one batched status call, returns whether any of them finished"""
+    running = {key: run for key, run in runs.items() if run.status == RUNNING}
+    if not running:
+        return False
+    status = get_runs_status(
+        f"{event.workspace_url}/api/2.1/jobs/runs/get",
+        [run.run_id for run in running.values() if run.run_id is not None],
+        event.max_parallelism,
+    )
+    changed = False
+    for run in running.values():
+        state = status.runs[str(run.run_id)]
+        if state.error == NOT_FETCHED:
+            continue
+        if state.error is not None:
+            run.status_errors += 1
+            if state.error_status_code == 404 or run.status_errors >= MAX_STATUS_ERRORS:
+                logger.warning(f"Giving up on run {run.run_id}, its status can't be fetched: {state.error}")
+                run.status, run.error = FAILED, state.error
+                changed = True
+            continue
+        run.status_errors = 0
+        run.life_cycle_state, run.result_state = state.life_cycle_state, state.result_state
+        if state.life_cycle_state in TERMINAL_LIFE_CYCLE_STATES:
+            run.status = SUCCESS if state.result_state == SUCCESS else FAILED
+            changed = True
+    return changed
+
+
+def _skip_unreachable(event: RunDagEvent, runs: Dict[str, NodeRun]):
+    """Nodes behind a failed or skipped node are skipped, with fail_fast all pending nodes are after a failure"""
+    failed = any(run.status == FAILED for run in runs.values())
+    changed = True
+    while changed:
+        changed = False
+        for node in event.nodes:
+            run = runs[node.key]
+            if run.status != PENDING:
+                continue
+            if (event.fail_fast and failed) or any(runs[d].status in (FAILED, SKIPPED) for d in node.depends_on):
+                run.status = SKIPPED
+                changed = True
+
+
+def _start_ready(event: RunDagEvent, runs: Dict[str, NodeRun], seed: str) -> bool:
+    """Starts the nodes of which all dependencies succeeded, up to max_parallelism running, returns if any started"""
+    slots = event.max_parallelism - sum(1 for run in runs.values() if run.status == RUNNING)
+    ready = [
+        node
+        for node in event.nodes
+        if runs[node.key].status == PENDING and all(runs[d].status == SUCCESS for d in node.depends_on)
+    ][: max(0, slots)]
+    if not ready:
+        return False
+    job_args = [
+        node.job_args.copy(
+            update={
+                "idempotency_token": node.job_args.idempotency_token
+                or derive_idempotency_token(seed, node.key, node.job_args.dict())
+            }
+        )
+        for node in ready
+    ]
+    results = submit_jobs(event.workspace_url, job_args, event.max_parallelism)
+    for node, result in zip(ready, results.runs):
+        run = runs[node.key]
+        if result.error is not None:
+            run.status, run.error = FAILED, result.error
+        else:
+            run.status, run.run_id = RUNNING, result.run_id
+        logger.info(f"Started {node.key}: {run.status} {run.run_id or run.error}")
+    return True
+
+
+def _dag_status(runs: Dict[str, NodeRun]) -> str:
+    statuses = {run.status for run in runs.values()}
+    if statuses & {PENDING, RUNNING}:
+        return RUNNING
+    return SUCCESS if statuses <= {SUCCESS} else FAILED
+
+
+def run_dag(event: RunDagEvent) -> RunDagEvent:
+    """
+    Drives the dag until it is done, or until the remaining lambda time (or max_wait_seconds) runs out. All running
+    jobs are polled in one batch per interval. Progress is kept in the checkpoint of the returned event.
+    """
+    validate_dag(event.nodes)
+    checkpoint = event.checkpoint or DagCheckpoint(
+        dag_id=uuid.uuid4().hex, started_at=time.time(), nodes={node.key: NodeRun() for node in event.nodes}
+    )
+    checkpoint.invocations += 1
+    runs = checkpoint.nodes
+    seed = event.idempotency_seed or checkpoint.dag_id
+    deadline = time.monotonic() + event.max_wait_seconds if event.max_wait_seconds is not None else None
+    delay = POLL_MIN_DELAY_SECONDS
+    while True:
+        changed = _refresh_running(event, runs)
+        _skip_unreachable(event, runs)
+        changed = _start_ready(event, runs, seed) or changed
+        _skip_unreachable(event, runs)
+        status = _dag_status(runs)
+        if status != RUNNING:
+            return event.copy(update={"checkpoint": checkpoint, "status": status, "still_running": False})
+
+        delay = POLL_MIN_DELAY_SECONDS if changed else min(delay * 1.5, POLL_MAX_DELAY_SECONDS)
+        remaining = get_remaining_seconds()
+        if deadline is not None and (remaining is None or deadline - time.monotonic() < remaining):
+            remaining = deadline - time.monotonic()
+        if remaining is not None and remaining < delay:
+            logger.info(f"Dag {checkpoint.dag_id} is still running, returning the checkpoint before the deadline")
+            return event.copy(update={"checkpoint": checkpoint, "status": status, "still_running": True})
+        time.sleep(delay)
+
+
+def handler(event, context):
+    parsed_event = RunDagEvent.parse_obj(event)
+    with record_invocation("run-dag"), profile_invocation("run-dag", event), lambda_deadline(
+        context, STATUS_DEADLINE_MARGIN_SECONDS
+    ):
+        return run_dag(parsed_event).dict()
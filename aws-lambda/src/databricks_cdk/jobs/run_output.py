@@ -0,0 +1,166 @@
+"""
+Outputs of the task runs of a run, for step functions which fails on state payloads over 256 KiB.
+
+Outputs are returned inline up to max_inline_bytes each, and up to max_total_inline_bytes for all tasks together.
+Outputs that don't fit anymore are stored at the destination and only referenced, or truncated without one. So the
+response is at most max_total_inline_bytes plus a few hundred bytes of keys and pointers per task.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from databricks_cdk.cassette import record_invocation
+from databricks_cdk.jobs.storage import TRUNCATION_MARKER, StoredObject, store_object
+from databricks_cdk.profiling import profile_invocation
+from databricks_cdk.utils import get_host_rate_limiter, get_request, get_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 10
+CHUNK_SIZE = 64 * 1024
+# runs/get-output returns the notebook result and the logs each capped at 5 MB by databricks, in one json document
+MAX_DATABRICKS_OUTPUT_BYTES = 10 * 1024 * 1024
+
+
+class RunOutputEvent(BaseModel):
+    workspace_url: str
+    run_id: int
+    # s3://bucket/prefix (or local directory) large outputs and logs are written to
+    destination: Optional[str] = None
+    # Outputs up to this size are returned inline, larger ones are stored, or truncated without destination
+    max_inline_bytes: int = 4 * 1024
+    # Inline outputs of all tasks together, the rest is stored or truncated like outputs over max_inline_bytes
+    max_total_inline_bytes: int = 128 * 1024
+    # Stored outputs are truncated after this size
+    max_stored_bytes: int = 10 * 1024 * 1024
+    # Every task output is held in memory while it's handled, so memory grows with up to a few times
+    # MAX_DATABRICKS_OUTPUT_BYTES per concurrent task for tasks with large outputs
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+
+
+class OutputValue(BaseModel):
+    """An output inline in `value`, or a pointer to where it is stored"""
+
+    value: Optional[str] = None
+    stored: Optional[StoredObject] = None
+    size_bytes: int
+    truncated: bool = False
+
+
+class TaskOutput(BaseModel):
+    task_key: Optional[str] = None
+    run_id: int
+    notebook_output: Optional[OutputValue] = None
+    logs: Optional[OutputValue] = None
+    error: Optional[str] = None
+    error_trace: Optional[OutputValue] = None
+
+
+class RunOutputResponse(BaseModel):
+    run_id: int
+    tasks: List[TaskOutput]
+
+
+class InlineBudget:
+    """Bytes left to return inline, shared by the concurrently handled tasks of a run"""
+
+    def __init__(self, max_bytes: int):
+        self.remaining = max_bytes
+        self._lock = threading.Lock()
+
+    def take(self, max_bytes: int) -> int:
+        """Takes up to max_bytes, returns how many are taken"""
+        with self._lock:
+            taken = max(0, min(max_bytes, self.remaining))
+            self.remaining -= taken
+            return taken
+
+    def release(self, num_bytes: int):
+        with self._lock:
+            self.remaining += num_bytes
+
+
+def _chunks(data: bytes) -> Iterator[bytes]:
+    for start in range(0, len(data), CHUNK_SIZE):
+        yield data[start : start + CHUNK_SIZE]
+
+
+def _output_value(
+    text: Optional[str],
+    name: str,
+    event: RunOutputEvent,
+    budget: InlineBudget,
+    truncated_by_databricks: bool = False,
+) -> Optional[OutputValue]:
+    if text is None:
+        return None
+    data = text.encode()
+    size = len(data)
+    inline_bytes = budget.take(min(size, event.max_inline_bytes))
+    if inline_bytes == size:
+        return OutputValue(value=text, size_bytes=size, truncated=truncated_by_databricks)
+    if event.destination is None:
+        value = data[:inline_bytes].decode(errors="ignore")
+        return OutputValue(
+            value=value + TRUNCATION_MARKER.format(size - len(value.encode())), size_bytes=size, truncated=True
+        )
+    budget.release(inline_bytes)
+    stored = store_object(event.destination, name, _chunks(data), max_bytes=event.max_stored_bytes)
+    return OutputValue(stored=stored, size_bytes=size, truncated=stored.truncated or truncated_by_databricks)
+
+
+def get_task_output(
+    event: RunOutputEvent, task_run_id: int, task_key: Optional[str], budget: Optional[InlineBudget] = None
+) -> TaskOutput:
+    """
+    Output of one task run, large payloads are stored and only referenced in the response. The get-output response
+    isn't streamed, it is one json document, so the whole output of the task is in memory until it is handled.
+    """
+    budget = budget or InlineBudget(event.max_total_inline_bytes)
+    result = TaskOutput(task_key=task_key, run_id=task_run_id)
+    try:
+        url = f"{event.workspace_url}/api/2.1/jobs/runs/get-output"
+        get_host_rate_limiter(url).acquire()
+        output = get_request(url, params={"run_id": task_run_id}, session=get_session())
+    except Exception as e:
+        logger.warning(f"Failed to get the output of run {task_run_id}: {e}")
+        result.error = f"{type(e).__name__}: {e}"
+        return result
+    prefix = f"run-{event.run_id}/{task_key or task_run_id}"
+    notebook_output = output.get("notebook_output") or {}
+    result.notebook_output = _output_value(
+        notebook_output.get("result"),
+        f"{prefix}/notebook_output.txt",
+        event,
+        budget,
+        notebook_output.get("truncated", False),
+    )
+    result.logs = _output_value(
+        output.get("logs"), f"{prefix}/logs.txt", event, budget, output.get("logs_truncated", False)
+    )
+    result.error = output.get("error")
+    result.error_trace = _output_value(output.get("error_trace"), f"{prefix}/error_trace.txt", event, budget)
+    return result
+
+
+def get_run_output(event: RunOutputEvent) -> RunOutputResponse:
+    """
+    Gets the output of every task run of the run concurrently, so peak memory is bounded by the output of
+    max_concurrency tasks, a few times MAX_DATABRICKS_OUTPUT_BYTES each, and not by the number of tasks. Which tasks
+    get the inline budget first depends on the order their outputs come in.
+    """
+    run = get_request(f"{event.workspace_url}/api/2.1/jobs/runs/get", params={"run_id": event.run_id})
+    task_runs = [(t["run_id"], t.get("task_key")) for t in run.get("tasks", [])] or [(event.run_id, None)]
+    budget = InlineBudget(event.max_total_inline_bytes)
+    with ThreadPoolExecutor(max_workers=max(1, min(event.max_concurrency, len(task_runs)))) as executor:
+        tasks = list(executor.map(lambda t: get_task_output(event, *t, budget), task_runs))
+    return RunOutputResponse(run_id=event.run_id, tasks=tasks)
+
+
+def handler(event, context):
+    parsed_event = RunOutputEvent.parse_obj(event)
+    with record_invocation("run-output"), profile_invocation("run-output", event):
+        return get_run_output(parsed_event).dict()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+from typing import IO, Any, Iterable, Optional, Union
+
+import boto3
+from pydantic import BaseModel
+
+# Bytes kept in memory before spooling to /tmp while an s3 object is written
+SPOOL_MAX_BYTES = 1024 * 1024
+TRUNCATION_MARKER = "\n[truncated {} bytes]\n"
+
+
+class StoredObject(BaseModel):
+    uri: str
+    size_bytes: int
+    truncated: bool = False
+    truncated_bytes: int = 0
+
+
+def _object_uri(destination: str, name: str) -> str:
+    return f"{destination.rstrip('/')}/{name}"
+
+
+def store_object(
+    destination: str,
+    name: str,
+    chunks: Iterable[Union[str, bytes]],
+    max_bytes: Optional[int] = None,
+) -> StoredObject:
+    """
+    Writes the chunks to `name` under destination, an s3://bucket/prefix or a local directory. Only one chunk at a
+    time is held in memory. Everything after max_bytes is dropped and replaced by a truncation marker.
+    """
+    uri = _object_uri(destination, name)
+    if destination.startswith("s3://"):
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as f:
+            stored = _write_chunks(f, uri, chunks, max_bytes)
+            f.seek(0)
+            bucket, _, key = uri[len("s3://") :].partition("/")
+            boto3.client("s3").upload_fileobj(f, bucket, key)
+        return stored
+
+    os.makedirs(os.path.dirname(uri), exist_ok=True)
+    with open(uri, "wb") as f:
+        return _write_chunks(f, uri, chunks, max_bytes)
+
+
+def _write_chunks(
+    f: IO[bytes], uri: str, chunks: Iterable[Union[str, bytes]], max_bytes: Optional[int]
+) -> StoredObject:
+    written = dropped = 0
+    for chunk in chunks:
+        data = chunk.encode() if isinstance(chunk, str) else chunk
+        keep = len(data) if max_bytes is None else max(0, min(len(data), max_bytes - written))
+        f.write(data[:keep])
+        written += keep
+        dropped += len(data) - keep
+    if dropped:
+        marker = TRUNCATION_MARKER.format(dropped).encode()
+        f.write(marker)
+        written += len(marker)
+    return StoredObject(uri=uri, size_bytes=written, truncated=dropped > 0, truncated_bytes=dropped)
+
+
+def store_json(destination: str, name: str, value: Any) -> StoredObject:
+    """Stores the value as json, without size cap"""
+    return store_object(destination, name, json.JSONEncoder().iterencode(value))
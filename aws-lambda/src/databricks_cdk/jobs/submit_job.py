@@ -1,8 +1,21 @@
-from typing import List, Optional
+import hashlib
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
+from requests import HTTPError
 
-from databricks_cdk.utils import post_request
+from databricks_cdk.cassette import record_invocation
+from databricks_cdk.jobs.callback import get_callback_store, register_callback
+from databricks_cdk.profiling import profile_invocation
+from databricks_cdk.utils import get_host_rate_limiter, get_session, post_request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 10
 
 
 class JobArgs(BaseModel):
@@ -17,10 +30,101 @@ class JobArgs(BaseModel):
 
 class SubmitJobEvent(BaseModel):
     workspace_url: str
-    job_args: JobArgs
+    job_args: Union[JobArgs, List[JobArgs]]
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    # Seed for the generated idempotency tokens, for example the step functions execution name, so a retried
+    # invocation doesn't start the runs again. Random tokens are generated without it.
+    idempotency_seed: Optional[str] = None
+    # Step functions task token of a waitForTaskToken task, completed by job-callback when the run is done. The job
+    # needs webhook_notifications to the notification destination of job-callback. Only for a single job_args.
+    task_token: Optional[str] = None
+
+    @validator("task_token")
+    def check_single_job_args(cls, task_token, values):
+        if task_token is not None and isinstance(values.get("job_args"), list):
+            raise ValueError("task_token can only be used with a single job_args")
+        return task_token
+
+
+class SubmitJobResult(BaseModel):
+    index: int
+    job_id: int
+    idempotency_token: Optional[str] = None
+    run_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class SubmitJobsResponse(BaseModel):
+    runs: List[SubmitJobResult]
+    submitted: int
+    failed: int
+
+
+def derive_idempotency_token(seed: Optional[str], *parts: Any) -> str:
+    """Hash of the seed and the json of the parts, or a random token without seed"""
+    if seed is None:
+        return str(uuid.uuid4())
+    return hashlib.sha256(":".join([seed] + [json.dumps(p, sort_keys=True) for p in parts]).encode()).hexdigest()
+
+
+def get_idempotency_token(job_args: JobArgs, index: int, seed: Optional[str] = None) -> str:
+    """Token of the job args, deterministic for the same seed, index and args so retries don't start runs twice"""
+    if job_args.idempotency_token is not None:
+        return job_args.idempotency_token
+    return derive_idempotency_token(seed, index, job_args.dict(exclude={"idempotency_token"}))
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, HTTPError) and e.response is not None:
+        return f"{e.response.status_code}: {e.response.text}"
+    return f"{type(e).__name__}: {e}"
+
+
+def submit_job(url: str, job_args: JobArgs, index: int) -> SubmitJobResult:
+    """Starts one run, errors are returned in the result instead of raised"""
+    result = SubmitJobResult(index=index, job_id=job_args.job_id, idempotency_token=job_args.idempotency_token)
+    try:
+        get_host_rate_limiter(url).acquire()
+        result.run_id = post_request(url, body=job_args.dict(), session=get_session())["run_id"]
+    except Exception as e:
+        logger.warning(f"Failed to start job {job_args.job_id}: {e}")
+        result.error = _error_message(e)
+    return result
+
+
+def submit_jobs(
+    workspace_url: str,
+    job_args: List[JobArgs],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    idempotency_seed: Optional[str] = None,
+) -> SubmitJobsResponse:
+    """Starts the runs concurrently, with at most max_concurrency requests in flight, in the order of job_args"""
+    url = f"{workspace_url}/api/2.1/jobs/run-now"
+    job_args = [
+        args.copy(update={"idempotency_token": get_idempotency_token(args, i, idempotency_seed)})
+        for i, args in enumerate(job_args)
+    ]
+    results: List[SubmitJobResult] = []
+    if job_args:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(job_args)))) as executor:
+            results = list(executor.map(lambda i: submit_job(url, job_args[i], i), range(len(job_args))))
+    failed = sum(1 for r in results if r.error is not None)
+    return SubmitJobsResponse(runs=results, submitted=len(results) - failed, failed=failed)
 
 
 def handler(event, context):
     parsed_event = SubmitJobEvent.parse_obj(event)
     url = f"{parsed_event.workspace_url}/api/2.1/jobs/run-now"
-    return post_request(url, body=parsed_event.job_args.dict())
+    with record_invocation("submit-job"), profile_invocation("submit-job", event):
+        if isinstance(parsed_event.job_args, list):
+            return submit_jobs(
+                parsed_event.workspace_url,
+                parsed_event.job_args,
+                parsed_event.max_concurrency,
+                parsed_event.idempotency_seed,
+            ).dict()
+        callback_store = get_callback_store() if parsed_event.task_token is not None else None
+        response = post_request(url, body=parsed_event.job_args.dict())
+        if parsed_event.task_token is not None:
+            register_callback(parsed_event.workspace_url, response["run_id"], parsed_event.task_token, callback_store)
+        return response
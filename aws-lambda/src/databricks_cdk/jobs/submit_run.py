@@ -0,0 +1,73 @@
+import json
+import logging
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from databricks_cdk.cassette import record_invocation
+from databricks_cdk.jobs.callback import get_callback_store, register_callback
+from databricks_cdk.jobs.job_status import STATUS_DEADLINE_MARGIN_SECONDS, wait_for_run
+from databricks_cdk.jobs.projection import project_run
+from databricks_cdk.jobs.submit_job import derive_idempotency_token
+from databricks_cdk.profiling import profile_invocation
+from databricks_cdk.resources.jobs.job import JobEmailNotifications, JobTaskSettings, JobWebhookNotifications
+from databricks_cdk.utils import lambda_deadline, post_request
+
+logger = logging.getLogger(__name__)
+
+
+class SubmitRunEvent(BaseModel):
+    workspace_url: str
+    run_name: Optional[str] = None
+    tasks: List[JobTaskSettings]
+    timeout_seconds: Optional[int] = None
+    email_notifications: Optional[JobEmailNotifications] = None
+    webhook_notifications: Optional[JobWebhookNotifications] = None
+    idempotency_token: Optional[str] = None
+    # Seed for the generated idempotency token, like idempotency_seed of submit-job
+    idempotency_seed: Optional[str] = None
+    # Wait for the run like the wait mode of job-status, the run is returned with the fields of `profile`
+    wait: bool = False
+    wait_for_states: List[str] = []
+    max_wait_seconds: Optional[float] = None
+    profile: str = "minimal"
+    # Step functions task token completed by job-callback when the run is done, like task_token of submit-job. The
+    # webhook_notifications of the run should go to the notification destination of job-callback.
+    task_token: Optional[str] = None
+
+
+def get_submit_body(event: SubmitRunEvent) -> dict:
+    """runs/submit body, depends_on is sent as the task_key objects the api expects"""
+    body = json.loads(
+        event.json(include={"run_name", "tasks", "timeout_seconds", "email_notifications", "webhook_notifications"})
+    )
+    for task in body["tasks"]:
+        task["depends_on"] = [{"task_key": key} for key in task["depends_on"]]
+    body["idempotency_token"] = event.idempotency_token or derive_idempotency_token(event.idempotency_seed, body)
+    return body
+
+
+def submit_run(event: SubmitRunEvent) -> dict:
+    """Submits a one time run, and optionally waits for it"""
+    body = get_submit_body(event)
+    callback_store = get_callback_store() if event.task_token is not None else None
+    run_id = post_request(f"{event.workspace_url}/api/2.1/jobs/runs/submit", body=body)["run_id"]
+    logger.info(f"Submitted run {run_id} with idempotency token {body['idempotency_token']}")
+    response = {"run_id": run_id, "idempotency_token": body["idempotency_token"]}
+    if event.task_token is not None:
+        register_callback(event.workspace_url, run_id, event.task_token, callback_store)
+    if event.wait:
+        run = wait_for_run(
+            f"{event.workspace_url}/api/2.1/jobs/runs/get", run_id, event.wait_for_states, event.max_wait_seconds
+        )
+        still_running = run.pop("still_running")
+        response = {**project_run(run, profile=event.profile), **response, "still_running": still_running}
+    return response
+
+
+def handler(event, context):
+    parsed_event = SubmitRunEvent.parse_obj(event)
+    with record_invocation("submit-run"), profile_invocation("submit-run", event), lambda_deadline(
+        context, STATUS_DEADLINE_MARGIN_SECONDS
+    ):
+        return submit_run(parsed_event)
@@ -0,0 +1,172 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional
+
+import boto3
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENV = "PROFILING"
+PROFILING_OUTPUT_DIR_ENV = "PROFILING_OUTPUT_DIR"
+PROFILING_S3_PREFIX_ENV = "PROFILING_S3_PREFIX"
+PROFILING_TOP_N_ENV = "PROFILING_TOP_N"
+
+
+class ProfilingOptions(BaseModel):
+    cpu: bool = False
+    memory: bool = False
+    top_n: int = 25
+    output_dir: str = "/tmp"
+    s3_prefix: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.cpu or self.memory
+
+
+class ProfilingResult(BaseModel):
+    name: str
+    duration_seconds: float
+    files: List[str] = []
+    summary: str = ""
+
+
+def _parse_profiling_flag(flag: Any) -> ProfilingOptions:
+    """Parses a profiling flag like 'true', 'cpu', 'memory' or 'cpu,memory' into options"""
+    if flag is None or flag is False:
+        return ProfilingOptions()
+    if flag is True:
+        return ProfilingOptions(cpu=True, memory=True)
+
+    kinds = {k.strip().lower() for k in str(flag).split(",") if k.strip()}
+    if kinds & {"1", "true", "all"}:
+        return ProfilingOptions(cpu=True, memory=True)
+    return ProfilingOptions(
+        cpu=len(kinds & {"cpu", "cprofile"}) > 0,
+        memory=len(kinds & {"memory", "tracemalloc"}) > 0,
+    )
+
+
+def get_profiling_options(event: Optional[dict] = None) -> ProfilingOptions:
+    """
+    Resolves profiling options from the PROFILING env var, overridden by a 'profiling' flag in the event.
+    For cloudformation events the flag is read from the ResourceProperties.
+    """
+    flag: Any = os.environ.get(PROFILING_ENV)
+    if isinstance(event, dict):
+        event_flag = event.get("profiling", (event.get("ResourceProperties") or {}).get("profiling"))
+        if event_flag is not None:
+            flag = event_flag
+
+    options = _parse_profiling_flag(flag)
+    if not options.enabled:
+        return options
+
+    options.output_dir = os.environ.get(PROFILING_OUTPUT_DIR_ENV, options.output_dir)
+    options.s3_prefix = os.environ.get(PROFILING_S3_PREFIX_ENV)
+    options.top_n = int(os.environ.get(PROFILING_TOP_N_ENV, options.top_n))
+    return options
+
+
+def upload_to_s3(path: str, s3_prefix: str) -> str:
+    """Uploads a local file to the given s3://bucket/prefix and returns the s3 uri"""
+    bucket, _, prefix = s3_prefix[len("s3://") :].partition("/")
+    key = f"{prefix.rstrip('/')}/{os.path.basename(path)}" if prefix else os.path.basename(path)
+    boto3.client("s3").upload_file(path, bucket, key)
+    return f"s3://{bucket}/{key}"
+
+
+def _cpu_summary(profiler: cProfile.Profile, top_n: int) -> str:
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top_n)
+    return stream.getvalue()
+
+
+def _memory_summary(snapshot: tracemalloc.Snapshot, peak: int, top_n: int) -> str:
+    lines = [f"Peak traced memory: {peak / 1024:.1f} KiB", f"Top {top_n} allocations:"]
+    for stat in snapshot.statistics("lineno")[:top_n]:
+        lines.append(str(stat))
+    return "\n".join(lines)
+
+
+def _write_results(
+    name: str,
+    options: ProfilingOptions,
+    duration: float,
+    profiler: Optional[cProfile.Profile],
+    snapshot: Optional[tracemalloc.Snapshot],
+    peak: int,
+) -> ProfilingResult:
+    os.makedirs(options.output_dir, exist_ok=True)
+    base_path = os.path.join(options.output_dir, f"{name}-{int(time.time() * 1000)}")
+    result = ProfilingResult(name=name, duration_seconds=duration)
+
+    summaries = [f"Profile of {name} took {duration:.3f}s"]
+    if profiler is not None:
+        profiler.dump_stats(f"{base_path}.prof")
+        result.files.append(f"{base_path}.prof")
+        summaries.append(_cpu_summary(profiler, options.top_n))
+    if snapshot is not None:
+        summaries.append(_memory_summary(snapshot, peak, options.top_n))
+    result.summary = "\n".join(summaries)
+
+    with open(f"{base_path}.txt", "w") as f:
+        f.write(result.summary)
+    result.files.append(f"{base_path}.txt")
+
+    if options.s3_prefix:
+        result.files = [upload_to_s3(path, options.s3_prefix) for path in result.files]
+    return result
+
+
+@contextmanager
+def profile_invocation(name: str, event: Optional[dict] = None) -> Iterator[Optional[ProfilingResult]]:
+    """
+    Profiles the wrapped block with cProfile and/or tracemalloc when enabled through the PROFILING env var
+    or a 'profiling' flag in the event. Results are written to PROFILING_OUTPUT_DIR (default /tmp), optionally
+    uploaded to PROFILING_S3_PREFIX and the summary is logged. Does nothing when profiling is disabled.
+    """
+    options = get_profiling_options(event)
+    if not options.enabled:
+        yield None
+        return
+
+    result = ProfilingResult(name=name, duration_seconds=0)
+    started_tracemalloc = False
+    if options.memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracemalloc = True
+    profiler = cProfile.Profile() if options.cpu else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield result
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        duration = time.perf_counter() - start
+        snapshot = None
+        peak = 0
+        if options.memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+        try:
+            written = _write_results(name, options, duration, profiler, snapshot, peak)
+            result.duration_seconds = written.duration_seconds
+            result.files = written.files
+            result.summary = written.summary
+            logger.info(result.summary)
+            logger.info(f"Profiling results of {name} written to {', '.join(result.files)}")
+        except Exception as e:
+            # Profiling should never break the actual invocation
+            logger.exception(e)
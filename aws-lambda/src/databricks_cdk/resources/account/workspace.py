@@ -4,6 +4,7 @@ from typing import Optional
 
 from pydantic import BaseModel
 
+from databricks_cdk.tracing import start_span
 from databricks_cdk.utils import (
     ACCOUNTS_BASE_URL,
     CnfResponse,
@@ -128,11 +129,13 @@ def wait_on_provioning(workspace_id: str):
     """Wait until provisioning is done"""
     logger.info("Get status of workspace")
     url = f"{get_workspaces_url()}/{workspace_id}"
-    response = get_request(url)
-    while response["workspace_status"] == "PROVISIONING":
-        logger.info("Status of workspace is still PROVISIONING")
-        time.sleep(10)
+    with start_span("workspace.wait_on_provisioning", workspace_id=workspace_id) as span:
         response = get_request(url)
+        while response["workspace_status"] == "PROVISIONING":
+            logger.info("Status of workspace is still PROVISIONING")
+            span.add_event("wait", {"seconds": 10})
+            time.sleep(10)
+            response = get_request(url)
     logger.info(f"Status of workspace is {response['workspace_status']}")
     if response["workspace_status"] != "RUNNING":
         raise RuntimeError(
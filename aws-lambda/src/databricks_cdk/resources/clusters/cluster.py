@@ -1,10 +1,24 @@
 import logging
-from typing import Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 from pydantic import BaseModel
 
-from databricks_cdk.utils import CnfResponse, get_authorization_headers, get_request, post_request
+from databricks_cdk.resources.clusters.cluster_index import (
+    get_cluster_id_by_name,
+    invalidate_cluster_index,
+    update_cluster_index,
+)
+from databricks_cdk.tracing import start_span
+from databricks_cdk.utils import (
+    CnfResponse,
+    ResourceNotReadyError,
+    ResumeLater,
+    get_authorization_headers,
+    get_remaining_seconds,
+    post_request,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +81,99 @@ class ClusterProperties(BaseModel):
     action: str = "cluster"
     workspace_url: str
     cluster: Cluster
+    # Wait until the cluster reaches this state (usually RUNNING) before reporting success
+    wait_for_state: Optional[str] = None
+    wait_timeout_seconds: int = 1800
+
+
+class ClusterNotReadyError(Exception):
+    pass
+
+
+class ClusterResponse(CnfResponse):
+    changed_fields: List[str] = []
+
+
+TRANSITIONAL_STATES = {"PENDING", "RESTARTING", "RESIZING", "TERMINATING"}
+FAILED_STATES = {"TERMINATED", "ERROR", "UNKNOWN"}
+
+# Cluster events that come with a change of the cluster state
+STATE_EVENT_TYPES = ["STARTING", "RUNNING", "RESTARTING", "RESIZING", "UPSIZE_COMPLETED", "TERMINATING"]
+
+WAIT_MIN_DELAY_SECONDS = 2.0
+WAIT_MAX_DELAY_SECONDS = 20.0
+# clusters/get is also polled at this interval, in case an event was missed
+WAIT_FULL_REFRESH_SECONDS = 60.0
+# events are fetched from a bit before the wait started, to cover clock differences with databricks
+EVENTS_CLOCK_SKEW_SECONDS = 60
+
+# Only used when creating a cluster, never returned by clusters/get
+CREATE_ONLY_FIELDS = {"idempotency_token", "apply_policy_default_values"}
+
+# Fields databricks fills in itself when they are not set, leaving them out is not a change
+SERVER_FILLED_FIELDS = {
+    "node_type_id",
+    "driver_node_type_id",
+    "autotermination_minutes",
+    "enable_elastic_disk",
+    "enable_local_disk_encryption",
+    "runtime_engine",
+}
+
+# Fields compared as a whole, a key that is removed from these must lead to an edit
+EXACT_FIELDS = {"spark_conf", "spark_env_vars", "custom_tags", "ssh_public_keys"}
+
+
+def _is_subset(desired: Any, current: Any) -> bool:
+    """True when every value set in desired is also in current, server populated extras are ignored"""
+    if isinstance(desired, dict):
+        if not isinstance(current, dict):
+            return False
+        return all(_is_subset(v, current.get(k)) for k, v in desired.items() if v is not None)
+    if isinstance(desired, list):
+        if not isinstance(current, list) or len(desired) != len(current):
+            return False
+        return all(_is_subset(d, c) for d, c in zip(desired, current))
+    return desired == current
+
+
+def get_cluster_changes(current: dict, desired: Cluster) -> Dict[str, Dict[str, Any]]:
+    """
+    Fields of desired that differ from the cluster returned by clusters/get. Fields that are not set but are on the
+    cluster are removed by an edit, except for the SERVER_FILLED_FIELDS. The fields databricks adds itself (state,
+    default tags, ...) are not compared.
+    """
+    changes = {}
+    desired_dict = desired.dict()
+    for field, value in desired_dict.items():
+        if field in CREATE_ONLY_FIELDS:
+            continue
+        current_value = current.get(field)
+        if value is None:
+            # autoscale is compared below, num_workers is the current number of workers with autoscaling
+            if field in SERVER_FILLED_FIELDS or field == "autoscale" or current_value in (None, "", [], {}):
+                continue
+            if field == "num_workers" and desired.autoscale is not None:
+                continue
+            changes[field] = {"current": current_value, "desired": None}
+            continue
+        if field == "num_workers" and desired.autoscale is not None:
+            # with autoscaling num_workers is the current number of workers
+            continue
+        if field == "docker_image":
+            # the basic auth password is never returned
+            value = {k: v for k, v in value.items() if k != "basic_auth"}
+        if field in EXACT_FIELDS:
+            equal = value == (current_value or type(value)())
+        elif value == [] or value == {}:
+            equal = not current_value
+        else:
+            equal = _is_subset(value, current_value)
+        if not equal:
+            changes[field] = {"current": current_value, "desired": value}
+    if desired.autoscale is None and current.get("autoscale") is not None:
+        changes["autoscale"] = {"current": current["autoscale"], "desired": None}
+    return changes
 
 
 def get_cluster_url(workspace_url: str):
@@ -74,13 +181,18 @@ def get_cluster_url(workspace_url: str):
     return f"{workspace_url}/api/2.0/clusters"
 
 
-def get_cluster_by_name(cluster_name: str, workspace_url: str):
-    resp = get_request(f"{get_cluster_url(workspace_url)}/list")
-    clusters = resp.get("clusters", [])
-    for c in clusters:
-        if c.get("cluster_name") == cluster_name:
-            return c
-    return None
+def get_cluster_by_name(cluster_name: str, workspace_url: str) -> Optional[dict]:
+    """Getting cluster based on name, using the cached cluster index of the workspace"""
+    cluster_id = get_cluster_id_by_name(cluster_name, workspace_url)
+    if cluster_id is None:
+        return None
+    cluster = get_cluster_by_id(cluster_id, workspace_url)
+    if cluster is None or cluster.get("cluster_name") != cluster_name:
+        # Deleted or renamed outside of this lambda, index is stale
+        invalidate_cluster_index(workspace_url)
+        cluster_id = get_cluster_id_by_name(cluster_name, workspace_url)
+        cluster = get_cluster_by_id(cluster_id, workspace_url) if cluster_id is not None else None
+    return cluster
 
 
 def get_cluster_by_id(cluster_id: str, workspace_url: str) -> Optional[dict]:
@@ -97,26 +209,133 @@ def get_cluster_by_id(cluster_id: str, workspace_url: str) -> Optional[dict]:
     return resp.json()
 
 
+def get_new_cluster_events(cluster_id: str, workspace_url: str, start_time: int) -> Tuple[List[dict], int]:
+    """State change events of the cluster from start_time (epoch ms) on, and the start time for the next call"""
+    body: Optional[Dict[str, Any]] = {
+        "cluster_id": cluster_id,
+        "start_time": start_time,
+        "event_types": STATE_EVENT_TYPES,
+        "order": "ASC",
+        "limit": 50,
+    }
+    events: List[dict] = []
+    while body is not None:
+        response = post_request(f"{get_cluster_url(workspace_url)}/events", body=body)
+        events += response.get("events", [])
+        body = response.get("next_page")
+    if events:
+        start_time = max(e["timestamp"] for e in events) + 1
+    return events, start_time
+
+
+def wait_for_cluster_state(
+    cluster_id: str,
+    workspace_url: str,
+    state: str = "RUNNING",
+    timeout_seconds: float = 1800,
+    started_at: Optional[float] = None,
+) -> Optional[dict]:
+    """
+    Waits until the cluster reaches the state. Instead of fetching the cluster over and over the cluster events are
+    polled from a cursor, with backoff, and the cluster is only fetched again once a state change shows up.
+
+    Returns None when the lambda is about to time out before that happens, so the wait can be resumed later.
+    Raises ClusterNotReadyError when the cluster fails or stops and TimeoutError after timeout_seconds counted from
+    started_at.
+    """
+    deadline = (started_at or time.time()) + timeout_seconds
+    events_cursor = int((time.time() - EVENTS_CLOCK_SKEW_SECONDS) * 1000)
+    delay = WAIT_MIN_DELAY_SECONDS
+    with start_span("cluster.wait_for_state", cluster_id=cluster_id, state=state) as span:
+        cluster = get_cluster_by_id(cluster_id, workspace_url)
+        refreshed_at = time.monotonic()
+        while True:
+            if cluster is None:
+                raise ClusterNotReadyError(f"Cluster {cluster_id} does not exist anymore")
+            current_state = cluster.get("state")
+            if current_state == state:
+                return cluster
+            if current_state in FAILED_STATES:
+                reason = cluster.get("termination_reason") or cluster.get("state_message")
+                raise ClusterNotReadyError(f"Cluster {cluster_id} is {current_state} instead of {state}: {reason}")
+            if time.time() + delay > deadline:
+                raise TimeoutError(f"Cluster {cluster_id} did not reach {state} within {timeout_seconds} seconds")
+            remaining = get_remaining_seconds()
+            if remaining is not None and remaining < delay:
+                logger.info(f"Lambda deadline reached while cluster {cluster_id} is {current_state}")
+                return None
+
+            span.add_event("wait", {"seconds": delay, "cluster.state": current_state})
+            time.sleep(delay)
+            events, events_cursor = get_new_cluster_events(cluster_id, workspace_url, events_cursor)
+            if events or time.monotonic() - refreshed_at >= WAIT_FULL_REFRESH_SECONDS:
+                cluster = get_cluster_by_id(cluster_id, workspace_url)
+                refreshed_at = time.monotonic()
+                delay = WAIT_MIN_DELAY_SECONDS
+            else:
+                delay = min(delay * 1.5, WAIT_MAX_DELAY_SECONDS)
+
+
+def _wait_for_cluster(
+    properties: ClusterProperties, response: ClusterResponse, started_at: Optional[float] = None
+) -> ClusterResponse:
+    if properties.wait_for_state is None:
+        return response
+    try:
+        cluster = wait_for_cluster_state(
+            response.physical_resource_id,
+            properties.workspace_url,
+            state=properties.wait_for_state,
+            timeout_seconds=properties.wait_timeout_seconds,
+            started_at=started_at,
+        )
+    except (ClusterNotReadyError, TimeoutError) as e:
+        raise ResourceNotReadyError(response, str(e)) from e
+    if cluster is None:
+        raise ResumeLater(response, started_at)
+    return response
+
+
 def create_or_update_cluster(properties: ClusterProperties, physical_resource_id: Optional[str]) -> CnfResponse:
     """Create cluster at databricks"""
+    started_at = time.time()
     current = None
     if physical_resource_id is not None:
         current = get_cluster_by_id(physical_resource_id, properties.workspace_url)
     if current is None:
         # Json data
         body = properties.cluster.dict()
-        response = post_request(f"{get_cluster_url(properties.workspace_url)}/create", body=body)
-        return CnfResponse(
-            physical_resource_id=response["cluster_id"],
-        )
+        created = post_request(f"{get_cluster_url(properties.workspace_url)}/create", body=body)
+        update_cluster_index(properties.workspace_url, created["cluster_id"], properties.cluster.cluster_name)
+        return _wait_for_cluster(properties, ClusterResponse(physical_resource_id=created["cluster_id"]), started_at)
     else:
         cluster_id = current["cluster_id"]
+        changes = get_cluster_changes(current, properties.cluster)
+        if not changes:
+            # Editing restarts a running cluster, so only edit when something changed
+            logger.info(f"Cluster {cluster_id} is up to date")
+            unchanged = ClusterResponse(physical_resource_id=cluster_id)
+            if current.get("state") in TRANSITIONAL_STATES:
+                return _wait_for_cluster(properties, unchanged, started_at)
+            return unchanged
+        logger.info(f"Editing cluster {cluster_id}, changed fields: {changes}")
         body = properties.cluster.dict()
         body["cluster_id"] = cluster_id
         post_request(f"{get_cluster_url(properties.workspace_url)}/edit", body=body)
-        return CnfResponse(
+        update_cluster_index(properties.workspace_url, cluster_id, properties.cluster.cluster_name)
+        edited = ClusterResponse(
             physical_resource_id=cluster_id,
+            changed_fields=sorted(changes),
         )
+        if current.get("state") in FAILED_STATES:
+            # Editing a stopped cluster does not start it
+            return edited
+        return _wait_for_cluster(properties, edited, started_at)
+
+
+def resume_cluster_wait(properties: ClusterProperties, response: dict, started_at: float) -> ClusterResponse:
+    """Continues waiting for the cluster in a new invocation, after create_or_update_cluster raised ResumeLater"""
+    return _wait_for_cluster(properties, ClusterResponse(**response), started_at)
 
 
 def delete_cluster(properties: ClusterProperties, physical_resource_id: str) -> CnfResponse:
@@ -127,6 +346,7 @@ def delete_cluster(properties: ClusterProperties, physical_resource_id: str) ->
             "cluster_id": current.get("cluster_id"),
         }
         post_request(f"{get_cluster_url(properties.workspace_url)}/permanent-delete", body=body)
+        update_cluster_index(properties.workspace_url, current["cluster_id"])
     else:
         logger.warning("Already removed")
     return CnfResponse(physical_resource_id=physical_resource_id)
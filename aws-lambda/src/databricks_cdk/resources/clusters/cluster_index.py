@@ -0,0 +1,100 @@
+import logging
+import os
+from typing import Dict, Iterator, List, Optional
+
+from databricks_cdk.utils import TtlCache, get_request
+
+logger = logging.getLogger(__name__)
+
+CLUSTER_INDEX_TTL_SECONDS = float(os.environ.get("CLUSTER_INDEX_TTL_SECONDS", "300"))
+# Misses only rebuild the index when it is older than this, so looking up names that don't exist stays cheap
+CLUSTER_INDEX_MIN_REBUILD_SECONDS = float(os.environ.get("CLUSTER_INDEX_MIN_REBUILD_SECONDS", "30"))
+CLUSTERS_PAGE_SIZE = 100
+
+# Job and pipeline clusters are never looked up by name, leaving them out shrinks the list a lot
+DEFAULT_CLUSTER_SOURCES = ["UI", "API"]
+
+# name -> cluster id of the clusters from the default sources, per workspace
+_cluster_index: TtlCache[Dict[str, str]] = TtlCache(CLUSTER_INDEX_TTL_SECONDS)
+# Workspaces of which the index was rebuilt recently
+_recently_rebuilt: TtlCache[bool] = TtlCache(CLUSTER_INDEX_MIN_REBUILD_SECONDS)
+
+
+def list_clusters(workspace_url: str, cluster_sources: Optional[List[str]] = None) -> Iterator[dict]:
+    """Pages through /clusters/list of api 2.1, only returning clusters created from one of the given sources"""
+    params: Dict[str, object] = {"page_size": CLUSTERS_PAGE_SIZE}
+    if cluster_sources:
+        params["filter_by.cluster_sources"] = cluster_sources
+    while True:
+        response = get_request(f"{workspace_url}/api/2.1/clusters/list", params=params)
+        yield from response.get("clusters", [])
+        next_page_token = response.get("next_page_token")
+        if not next_page_token:
+            return
+        params["page_token"] = next_page_token
+
+
+def build_cluster_index(workspace_url: str, cluster_sources: Optional[List[str]] = None) -> Dict[str, str]:
+    """Map of cluster name to id, the first cluster wins when names are not unique"""
+    index: Dict[str, str] = {}
+    for cluster in list_clusters(workspace_url, cluster_sources):
+        if cluster.get("cluster_name") is not None:
+            index.setdefault(cluster["cluster_name"], cluster["cluster_id"])
+    return index
+
+
+def get_cluster_index(workspace_url: str, cluster_sources: Optional[List[str]] = None) -> Dict[str, str]:
+    """Cluster index of the workspace, cached for the default cluster sources until expired or invalidated"""
+    if cluster_sources is not None and cluster_sources != DEFAULT_CLUSTER_SOURCES:
+        return build_cluster_index(workspace_url, cluster_sources)
+    index = _cluster_index.get(workspace_url)
+    if index is None:
+        index = _rebuild_cluster_index(workspace_url)
+    return index
+
+
+def _rebuild_cluster_index(workspace_url: str) -> Dict[str, str]:
+    index = build_cluster_index(workspace_url, DEFAULT_CLUSTER_SOURCES)
+    logger.info(f"Indexed {len(index)} clusters of {workspace_url}")
+    _cluster_index.set(workspace_url, index)
+    _recently_rebuilt.set(workspace_url, True)
+    return index
+
+
+def get_cluster_id_by_name(
+    cluster_name: str, workspace_url: str, cluster_sources: Optional[List[str]] = None
+) -> Optional[str]:
+    """
+    Cluster id from the cluster index. A cached index misses clusters created outside of this lambda, so on a miss
+    it is rebuilt once before giving up, unless it was rebuilt less than CLUSTER_INDEX_MIN_REBUILD_SECONDS ago.
+    """
+    if cluster_sources is not None and cluster_sources != DEFAULT_CLUSTER_SOURCES:
+        return build_cluster_index(workspace_url, cluster_sources).get(cluster_name)
+    index = _cluster_index.get(workspace_url)
+    if index is not None and cluster_name in index:
+        return index[cluster_name]
+    if index is not None:
+        if _recently_rebuilt.get(workspace_url):
+            return None
+        logger.info(f"Cluster {cluster_name} is not in the cached index of {workspace_url}, rebuilding it")
+    return _rebuild_cluster_index(workspace_url).get(cluster_name)
+
+
+def update_cluster_index(workspace_url: str, cluster_id: str, cluster_name: Optional[str] = None):
+    """
+    Updates the entry of one cluster in the cached index after it is created, edited or deleted, the cluster is
+    removed from the index when no name is given
+    """
+    index = _cluster_index.get(workspace_url)
+    if index is None:
+        return
+    for name in [name for name, c_id in index.items() if c_id == cluster_id]:
+        del index[name]
+    if cluster_name is not None:
+        index.setdefault(cluster_name, cluster_id)
+
+
+def invalidate_cluster_index(workspace_url: Optional[str] = None):
+    """Drops the cached index of a workspace, or of all workspaces, when it turns out to be stale"""
+    _cluster_index.invalidate(workspace_url)
+    _recently_rebuilt.invalidate(workspace_url)
@@ -1,9 +1,14 @@
+import json
 import logging
+import time
 from typing import Optional
 
+import boto3
 import cfnresponse
 from pydantic import BaseModel, ValidationError
 
+from databricks_cdk.cassette import record_invocation
+from databricks_cdk.profiling import profile_invocation
 from databricks_cdk.resources.account.credentials import (
     CredentialsProperties,
     create_or_update_credentials,
@@ -25,7 +30,12 @@ from databricks_cdk.resources.cluster_policies.cluster_policy import (
     create_or_update_cluster_policy,
     delete_cluster_policy,
 )
-from databricks_cdk.resources.clusters.cluster import ClusterProperties, create_or_update_cluster, delete_cluster
+from databricks_cdk.resources.clusters.cluster import (
+    ClusterProperties,
+    create_or_update_cluster,
+    delete_cluster,
+    resume_cluster_wait,
+)
 from databricks_cdk.resources.dbfs.dbfs_file import DbfsFileProperties, create_or_update_dbfs_file, delete_dbfs_file
 from databricks_cdk.resources.groups.group import GroupProperties, create_or_update_group, delete_group
 from databricks_cdk.resources.instance_pools.instance_pools import (
@@ -38,7 +48,7 @@ from databricks_cdk.resources.instance_profiles.instance_profile import (
     create_or_update_instance_profile,
     delete_instance_profile,
 )
-from databricks_cdk.resources.jobs.job import JobProperties, create_or_update_job, delete_job
+from databricks_cdk.resources.jobs.job import JobProperties, create_or_update_job, delete_job, resume_job_delete
 from databricks_cdk.resources.mlflow.experiment import (
     ExperimentProperties,
     create_or_update_experiment,
@@ -135,15 +145,25 @@ from databricks_cdk.resources.unity_catalog.storage_credentials import (
     delete_storage_credential,
 )
 from databricks_cdk.resources.unity_catalog.volumes import VolumeProperties, create_or_update_volume, delete_volume
-from databricks_cdk.utils import CnfResponse
+from databricks_cdk.tracing import start_span
+from databricks_cdk.utils import CnfResponse, ResourceNotReadyError, ResumeLater, lambda_deadline
 
 logger = logging.getLogger(__name__)
 
 
+class EventContinuation(BaseModel):
+    """Added to the event when the lambda invokes itself to continue waiting on a resource"""
+
+    response: dict
+    started_at: float
+    attempt: int = 1
+
+
 class DatabricksEvent(BaseModel):
     RequestType: str
     ResourceProperties: dict
     PhysicalResourceId: Optional[str] = None
+    Continuation: Optional[EventContinuation] = None
 
     def action(self):
         return self.ResourceProperties.get("action")
@@ -354,9 +374,58 @@ def delete_resource(event: DatabricksEvent) -> CnfResponse:
         raise RuntimeError(f"Unknown action: {action}")
 
 
+def resume_resource(event: DatabricksEvent) -> CnfResponse:
+    """Continues waiting on a resource that was created or updated in an earlier invocation"""
+    action = event.action()
+    continuation = event.Continuation
+    if continuation is None:
+        raise ValueError("Event has no continuation")
+    if action == "cluster":
+        return resume_cluster_wait(
+            ClusterProperties(**event.ResourceProperties), continuation.response, continuation.started_at
+        )
+    if action == "job" and event.RequestType == "Delete":
+        return resume_job_delete(
+            JobProperties(**event.ResourceProperties),
+            continuation.response["physical_resource_id"],
+            continuation.started_at,
+        )
+    raise RuntimeError(f"Unknown action to resume: {action}")
+
+
+def continue_asynchronously(event: dict, context, resume_later: ResumeLater) -> bool:
+    """
+    Invokes this lambda again, asynchronously, with the event and what is done so far. The cloudformation response
+    is sent by that invocation. Returns False when that is not possible, for example outside of lambda.
+    """
+    function_arn = getattr(context, "invoked_function_arn", None)
+    if function_arn is None:
+        return False
+    previous = event.get("Continuation") or {}
+    # The wait began at started_at of the exception, older waits without it are counted from their first resume
+    started_at = resume_later.started_at
+    if started_at is None:
+        started_at = previous.get("started_at", time.time())
+    continuation = EventContinuation(
+        response=resume_later.response.dict(),
+        started_at=started_at,
+        attempt=previous.get("attempt", 0) + 1,
+    )
+    payload = {**event, "Continuation": continuation.dict()}
+    try:
+        boto3.client("lambda").invoke(FunctionName=function_arn, InvocationType="Event", Payload=json.dumps(payload))
+    except Exception as e:
+        logger.exception(e)
+        return False
+    logger.info(f"Continuing {event.get('LogicalResourceId')} in a new invocation, attempt {continuation.attempt}")
+    return True
+
+
 def process_event(event: DatabricksEvent) -> CnfResponse:
     """Process a databricks deploy event"""
     try:
+        if event.Continuation is not None:
+            return resume_resource(event)
         if event.RequestType == "Create" or event.RequestType == "Update":
             return create_or_update_resource(event)
         elif event.RequestType == "Delete":
@@ -372,8 +441,13 @@ def handler(event, context):
     """Entrypoint for lambda"""
     logger.info(event)
     try:
-        parsed_event = DatabricksEvent(**event)
-        response_data = process_event(parsed_event)
+        with start_span("event.parse"):
+            parsed_event = DatabricksEvent(**event)
+        with record_invocation(f"cfn-{parsed_event.action()}"), profile_invocation(
+            f"cfn-{parsed_event.action()}", event
+        ), start_span("event.dispatch", action=parsed_event.action(), request_type=parsed_event.RequestType):
+            with lambda_deadline(context):
+                response_data = process_event(parsed_event)
         cfnresponse.send(
             event,
             context,
@@ -381,6 +455,15 @@ def handler(event, context):
             response_data.dict(),
             physicalResourceId=response_data.physical_resource_id,
         )
+    except ResumeLater as e:
+        if not continue_asynchronously(event, context, e):
+            logger.exception(e)
+            cfnresponse.send(
+                event, context, cfnresponse.FAILED, None, physicalResourceId=e.response.physical_resource_id
+            )
+    except ResourceNotReadyError as e:
+        logger.exception(e)
+        cfnresponse.send(event, context, cfnresponse.FAILED, None, physicalResourceId=e.response.physical_resource_id)
     except Exception as e:
         logger.exception(e)
         cfnresponse.send(event, context, cfnresponse.FAILED, None)
@@ -1,11 +1,23 @@
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional, Union
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import requests
-from pydantic import BaseModel
-
-from databricks_cdk.utils import CnfResponse, get_authorization_headers, post_request
+from pydantic import BaseModel, ValidationError
+
+from databricks_cdk.resources.jobs.job_index import get_job_id_by_name, invalidate_job_index
+from databricks_cdk.resources.jobs.validation import check_job_settings
+from databricks_cdk.utils import (
+    CnfResponse,
+    ResumeLater,
+    get_authorization_headers,
+    get_remaining_seconds,
+    get_request,
+    post_request,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +29,17 @@ class JobEmailNotifications(BaseModel):
     no_alert_for_skipped_runs: bool = False
 
 
+class Webhook(BaseModel):
+    # Id of a workspace notification destination
+    id: str
+
+
+class JobWebhookNotifications(BaseModel):
+    on_start: List[Webhook] = []
+    on_success: List[Webhook] = []
+    on_failure: List[Webhook] = []
+
+
 class AutoScale(BaseModel):
     min_workers: int
     max_workers: int
@@ -151,6 +174,7 @@ class JobSettings(BaseModel):
     tasks: List[JobTaskSettings]
     job_clusters: List[JobCluster]
     email_notifications: Optional[JobEmailNotifications] = None
+    webhook_notifications: Optional[JobWebhookNotifications] = None
     timeout_seconds: Optional[int] = None
     schedule: Optional[CronSchedule]
     max_concurrent_runs: Optional[int] = None
@@ -162,10 +186,113 @@ class JobProperties(BaseModel):
     action: str = "job"
     workspace_url: str
     job: JobSettings
+    # Replace all settings with jobs/reset instead of only updating the changed fields with jobs/update
+    full_reset: bool = False
+    # Take over an existing job with the same name when the job of the physical resource id doesn't exist
+    adopt_existing: bool = False
+    # Cancel the active runs of the job, and wait for them to stop, before the job is deleted
+    cancel_runs_on_delete: bool = False
+    cancel_timeout_seconds: int = 600
 
 
 class JobResponse(CnfResponse):
     job_id: int
+    settings_fingerprint: Optional[str] = None
+
+
+# Values databricks fills in when they are not set, treated the same as not set
+SERVER_DEFAULTS: Dict[str, Any] = {
+    "format": "MULTI_TASK",
+    "max_concurrent_runs": 1,
+    "timeout_seconds": 0,
+    "max_retries": 0,
+    "min_retry_interval_millis": 0,
+    "run_if": "ALL_SUCCESS",
+    "pause_status": "UNPAUSED",
+}
+
+RUNS_PAGE_SIZE = 25
+CANCEL_CONCURRENCY = 10
+CANCEL_MIN_DELAY_SECONDS = 1.0
+CANCEL_MAX_DELAY_SECONDS = 15.0
+
+# Lists that databricks does not keep in order, sorted on this key
+SORT_KEYS = {"tasks": "task_key", "job_clusters": "job_cluster_key"}
+
+
+def _strip_defaults(value: Any) -> Any:
+    """Drops unset values and server defaults and sorts unordered lists, so equal settings look the same"""
+    if isinstance(value, dict):
+        stripped = {}
+        for k, v in value.items():
+            v = _strip_defaults(v)
+            if v is None or v is False or v == {} or v == [] or SERVER_DEFAULTS.get(k, object()) == v:
+                continue
+            if k in SORT_KEYS:
+                v = sorted(v, key=lambda x: x.get(SORT_KEYS[k], ""))
+            elif k == "depends_on":
+                v = sorted(v)
+            stripped[k] = v
+        return stripped
+    if isinstance(value, list):
+        return [_strip_defaults(v) for v in value]
+    return value
+
+
+def canonicalize_job_settings(settings: dict) -> dict:
+    """
+    Canonical form of job settings, either the desired settings or the settings returned by jobs/get. Fields that
+    are not part of JobSettings are dropped, like the access control list which jobs/get doesn't return.
+    """
+    settings = {"job_clusters": [], **settings}
+    settings["tasks"] = [
+        {**t, "depends_on": [d["task_key"] if isinstance(d, dict) else d for d in t.get("depends_on", [])]}
+        for t in settings.get("tasks", [])
+    ]
+    canonical = json.loads(JobSettings(**settings).json(exclude={"access_control_list"}))
+    return _strip_defaults(canonical)
+
+
+def _try_canonicalize_job_settings(settings: dict) -> Optional[dict]:
+    try:
+        return canonicalize_job_settings(settings)
+    except ValidationError as e:
+        logger.warning(f"Can't canonicalize job settings: {e}")
+        return None
+
+
+def get_job_settings_fingerprint(settings: dict) -> Optional[str]:
+    """Hash of the canonical settings, None when the settings can't be parsed into JobSettings"""
+    canonical = _try_canonicalize_job_settings(settings)
+    if canonical is None:
+        return None
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def get_job_settings_update(current_settings: dict, desired_settings: dict) -> Tuple[dict, List[str]]:
+    """
+    Body parts for jobs/update: the changed top level fields and the changed tasks and job clusters as
+    `new_settings`, and the removed ones in `fields_to_remove`. Tasks and job clusters are merged by key by
+    databricks, removed ones are addressed as `tasks/<task_key>` and `job_clusters/<job_cluster_key>`.
+    """
+    current = canonicalize_job_settings(current_settings)
+    desired = canonicalize_job_settings(desired_settings)
+    new_settings: Dict[str, Any] = {}
+    fields_to_remove: List[str] = []
+    for field in sorted(set(current) | set(desired)):
+        if field in SORT_KEYS:
+            key = SORT_KEYS[field]
+            current_items = {i[key]: i for i in current.get(field, [])}
+            desired_items = {i[key]: i for i in desired.get(field, [])}
+            changed = [k for k, i in desired_items.items() if current_items.get(k) != i]
+            if changed:
+                new_settings[field] = [i for i in desired_settings.get(field, []) if i[key] in changed]
+            fields_to_remove += [f"{field}/{k}" for k in current_items if k not in desired_items]
+        elif field not in desired:
+            fields_to_remove.append(field)
+        elif current.get(field) != desired[field]:
+            new_settings[field] = desired_settings[field]
+    return new_settings, fields_to_remove
 
 
 def get_job_url(workspace_url: str):
@@ -188,30 +315,116 @@ def get_job_by_id(job_id: str, workspace_url: str):
 
 def create_or_update_job(properties: JobProperties, physical_resource_id: Optional[str]) -> JobResponse:
     """Create job at databricks"""
+    check_job_settings(properties.job)
     current: Optional[dict] = None
     url = get_job_url(properties.workspace_url)
     if physical_resource_id is not None:
         current = get_job_by_id(physical_resource_id, properties.workspace_url)
+    if current is None and properties.adopt_existing:
+        existing_job_id = get_job_id_by_name(properties.job.name, properties.workspace_url)
+        if existing_job_id is not None:
+            logger.info(f"Adopting existing job {existing_job_id} named '{properties.job.name}'")
+            current = get_job_by_id(str(existing_job_id), properties.workspace_url)
+    desired_settings = json.loads(properties.job.json())
+    fingerprint = get_job_settings_fingerprint(desired_settings)
     if current is None:
-        create_response = post_request(f"{url}/create", body=json.loads(properties.job.json()))
+        create_response = post_request(f"{url}/create", body=desired_settings)
+        invalidate_job_index(properties.workspace_url, properties.job.name)
         job_id = create_response.get("job_id")
-        return JobResponse(job_id=job_id, physical_resource_id=job_id)
+        return JobResponse(job_id=job_id, physical_resource_id=job_id, settings_fingerprint=fingerprint)
     else:
         job_id = current.get("job_id")
-        reset_body = {
-            "job_id": job_id,
-            "new_settings": json.loads(properties.job.json()),
-        }
-        post_request(f"{url}/reset", body=reset_body)
-        return JobResponse(job_id=job_id, physical_resource_id=job_id)
-
-
-def delete_job(properties: JobProperties, physical_resource_id: str) -> CnfResponse:
+        current_settings = current.get("settings", {})
+        if current_settings.get("name") != properties.job.name:
+            invalidate_job_index(properties.workspace_url, current_settings.get("name"))
+            invalidate_job_index(properties.workspace_url, properties.job.name)
+        if fingerprint is not None and fingerprint == get_job_settings_fingerprint(current_settings):
+            logger.info(f"Job {job_id} is up to date")
+        elif properties.full_reset or fingerprint is None or _try_canonicalize_job_settings(current_settings) is None:
+            reset_body = {
+                "job_id": job_id,
+                "new_settings": desired_settings,
+            }
+            post_request(f"{url}/reset", body=reset_body)
+        else:
+            new_settings, fields_to_remove = get_job_settings_update(current_settings, desired_settings)
+            logger.info(f"Updating job {job_id}: {sorted(new_settings)}, removing {fields_to_remove}")
+            update_body = {
+                "job_id": job_id,
+                "new_settings": new_settings,
+                "fields_to_remove": fields_to_remove,
+            }
+            post_request(f"{url}/update", body=update_body)
+        return JobResponse(job_id=job_id, physical_resource_id=job_id, settings_fingerprint=fingerprint)
+
+
+def list_active_runs(job_id: int, workspace_url: str) -> Iterator[dict]:
+    """Pages through the runs of the job that are not finished yet"""
+    params: Dict[str, object] = {"job_id": job_id, "active_only": "true", "limit": RUNS_PAGE_SIZE}
+    while True:
+        response = get_request(f"{get_job_url(workspace_url)}/runs/list", params=params)
+        yield from response.get("runs", [])
+        next_page_token = response.get("next_page_token")
+        if not response.get("has_more") or not next_page_token:
+            return
+        params["page_token"] = next_page_token
+
+
+def cancel_runs(run_ids: List[int], workspace_url: str):
+    """Cancels the runs in parallel, cancel only starts the cancellation and returns right away"""
+    if not run_ids:
+        return
+    url = f"{get_job_url(workspace_url)}/runs/cancel"
+    with ThreadPoolExecutor(max_workers=min(CANCEL_CONCURRENCY, len(run_ids))) as executor:
+        list(executor.map(lambda run_id: post_request(url, body={"run_id": run_id}), run_ids))
+
+
+def cancel_active_runs(
+    job_id: int, workspace_url: str, timeout_seconds: float = 600, started_at: Optional[float] = None
+) -> bool:
+    """
+    Cancels the active runs of the job and waits, with backoff, until none are left. Returns False when the lambda
+    is about to time out before that, so the wait can be resumed later. After timeout_seconds, counted from
+    started_at, it stops waiting and returns True.
+    """
+    deadline = (started_at or time.time()) + timeout_seconds
+    delay = CANCEL_MIN_DELAY_SECONDS
+    cancelled: set = set()
+    while True:
+        active = [r["run_id"] for r in list_active_runs(job_id, workspace_url)]
+        if not active:
+            return True
+        cancel_runs([r for r in active if r not in cancelled], workspace_url)
+        cancelled.update(active)
+        if time.time() + delay > deadline:
+            logger.warning(f"Runs {active} of job {job_id} did not stop within {timeout_seconds} seconds")
+            return True
+        remaining = get_remaining_seconds()
+        if remaining is not None and remaining < delay:
+            logger.info(f"Lambda deadline reached while {len(active)} runs of job {job_id} are stopping")
+            return False
+        logger.info(f"Waiting for {len(active)} cancelled runs of job {job_id}")
+        time.sleep(delay)
+        delay = min(delay * 2, CANCEL_MAX_DELAY_SECONDS)
+
+
+def delete_job(properties: JobProperties, physical_resource_id: str, started_at: Optional[float] = None) -> CnfResponse:
     """Deletes job at databricks"""
+    started_at = started_at or time.time()
     current = get_job_by_id(physical_resource_id, properties.workspace_url)
     if current is not None:
         url = get_job_url(properties.workspace_url)
+        if properties.cancel_runs_on_delete and not cancel_active_runs(
+            current["job_id"], properties.workspace_url, properties.cancel_timeout_seconds, started_at
+        ):
+            raise ResumeLater(CnfResponse(physical_resource_id=physical_resource_id), started_at)
         post_request(f"{url}/delete", body={"job_id": current.get("job_id")})
+        invalidate_job_index(properties.workspace_url, current.get("settings", {}).get("name"))
     else:
         logger.warning("Already removed")
     return CnfResponse(physical_resource_id=physical_resource_id)
+
+
+def resume_job_delete(properties: JobProperties, physical_resource_id: str, started_at: float) -> CnfResponse:
+    """Continues deleting the job in a new invocation, after delete_job raised ResumeLater"""
+    return delete_job(properties, physical_resource_id, started_at)
@@ -0,0 +1,60 @@
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from databricks_cdk.utils import TtlCache, get_request
+
+logger = logging.getLogger(__name__)
+
+JOB_INDEX_TTL_SECONDS = float(os.environ.get("JOB_INDEX_TTL_SECONDS", "300"))
+JOBS_PAGE_SIZE = 100
+
+# (workspace url, job name) -> ids of the jobs with exactly that name
+_job_index: TtlCache[List[int]] = TtlCache(JOB_INDEX_TTL_SECONDS)
+
+
+class DuplicateJobNameError(Exception):
+    pass
+
+
+def list_jobs(workspace_url: str, name: Optional[str] = None) -> Iterator[dict]:
+    """Pages through /jobs/list, databricks filters on name case insensitive"""
+    params: Dict[str, object] = {"limit": JOBS_PAGE_SIZE}
+    if name is not None:
+        params["name"] = name
+    while True:
+        response = get_request(f"{workspace_url}/api/2.1/jobs/list", params=params)
+        yield from response.get("jobs", [])
+        next_page_token = response.get("next_page_token")
+        if not response.get("has_more") or not next_page_token:
+            return
+        params["page_token"] = next_page_token
+
+
+def _key(workspace_url: str, name: str) -> Tuple[str, str]:
+    return workspace_url, name
+
+
+def get_job_ids_by_name(name: str, workspace_url: str) -> List[int]:
+    """Ids of the jobs with exactly this name, cached until expired or invalidated"""
+    job_ids = _job_index.get(_key(workspace_url, name))
+    if job_ids is None:
+        job_ids = [j["job_id"] for j in list_jobs(workspace_url, name) if j.get("settings", {}).get("name") == name]
+        _job_index.set(_key(workspace_url, name), job_ids)
+    return job_ids
+
+
+def get_job_id_by_name(name: str, workspace_url: str) -> Optional[int]:
+    """Id of the only job with this name, raises DuplicateJobNameError when the name is not unique"""
+    job_ids = get_job_ids_by_name(name, workspace_url)
+    if len(job_ids) > 1:
+        raise DuplicateJobNameError(f"Found {len(job_ids)} jobs named '{name}': {sorted(job_ids)}")
+    return job_ids[0] if job_ids else None
+
+
+def invalidate_job_index(workspace_url: Optional[str] = None, name: Optional[str] = None):
+    """Drops the cached ids of a job name, or of all names, after jobs are created, renamed or deleted"""
+    if workspace_url is not None and name is not None:
+        _job_index.invalidate(_key(workspace_url, name))
+    else:
+        _job_index.invalidate()
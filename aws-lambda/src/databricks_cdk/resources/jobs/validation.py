@@ -0,0 +1,159 @@
+"""
+Offline checks of job settings that databricks would otherwise only report on jobs/create, one error at a time.
+
+Usage, on json files with job settings, job resource properties or synthesized cloudformation templates:
+
+    python -m databricks_cdk.resources.jobs.validation cdk.out/*.template.json
+"""
+import argparse
+import json
+import sys
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+if TYPE_CHECKING:
+    # job.py validates with this module before creating jobs
+    from databricks_cdk.resources.jobs.job import JobSettings, JobTaskSettings
+
+TASK_TYPES = [
+    "notebook_task",
+    "spark_jar_task",
+    "spark_python_task",
+    "spark_submit_task",
+    "pipeline_task",
+    "python_wheel_task",
+]
+COMPUTE_FIELDS = ["existing_cluster_id", "new_cluster", "job_cluster_key"]
+
+
+class JobValidationError(Exception):
+    def __init__(self, errors: List[str]):
+        super().__init__("Invalid job settings:\n" + "\n".join(f"- {e}" for e in errors))
+        self.errors = errors
+
+
+def _duplicates(keys: List[str]) -> List[str]:
+    seen, duplicates = set(), []
+    for key in keys:
+        if key in seen and key not in duplicates:
+            duplicates.append(key)
+        seen.add(key)
+    return duplicates
+
+
+def _task_errors(task: "JobTaskSettings", task_keys: set, job_cluster_keys: set) -> List[str]:
+    errors = []
+    task_types = [t for t in TASK_TYPES if getattr(task, t) is not None]
+    if len(task_types) != 1:
+        errors.append(f"Task '{task.task_key}' should have exactly one task type, found {task_types or 'none'}")
+    compute = [c for c in COMPUTE_FIELDS if getattr(task, c) is not None]
+    if len(compute) > 1:
+        errors.append(f"Task '{task.task_key}' has more than one of {compute}")
+    if task.job_cluster_key is not None and task.job_cluster_key not in job_cluster_keys:
+        errors.append(f"Task '{task.task_key}' uses job cluster '{task.job_cluster_key}' that is not in job_clusters")
+    for dependency in task.depends_on:
+        if dependency == task.task_key:
+            errors.append(f"Task '{task.task_key}' depends on itself")
+        elif dependency not in task_keys:
+            errors.append(f"Task '{task.task_key}' depends on unknown task '{dependency}'")
+    return errors
+
+
+def find_cycle_tasks(tasks: List["JobTaskSettings"]) -> List[str]:
+    """Tasks on or behind a dependency cycle"""
+    return find_cycle_keys({t.task_key: t.depends_on for t in tasks})
+
+
+def find_cycle_keys(dependencies: Dict[str, List[str]]) -> List[str]:
+    """
+    Keys on or behind a dependency cycle, using Kahn's algorithm so it is linear in keys plus dependencies. Unknown
+    dependencies and dependencies on the key itself are ignored, those are reported separately.
+    """
+    dependents: Dict[str, List[str]] = {key: [] for key in dependencies}
+    in_degree = {key: 0 for key in dependencies}
+    for key, depends_on in dependencies.items():
+        for dependency in set(depends_on):
+            if dependency in dependencies and dependency != key:
+                dependents[dependency].append(key)
+                in_degree[key] += 1
+    ready = deque(key for key, degree in in_degree.items() if degree == 0)
+    while ready:
+        key = ready.popleft()
+        for dependent in dependents[key]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                ready.append(dependent)
+    return sorted(key for key, degree in in_degree.items() if degree > 0)
+
+
+def validate_job_settings(settings: "JobSettings") -> List[str]:
+    """All problems found in the settings, empty when they are fine"""
+    errors = []
+    task_keys = [t.task_key for t in settings.tasks]
+    job_cluster_keys = [c.job_cluster_key for c in settings.job_clusters]
+    errors += [f"Task key '{key}' is used more than once" for key in _duplicates(task_keys)]
+    errors += [f"Job cluster key '{key}' is used more than once" for key in _duplicates(job_cluster_keys)]
+    for task in settings.tasks:
+        errors += _task_errors(task, set(task_keys), set(job_cluster_keys))
+    cycle_tasks = find_cycle_tasks(settings.tasks)
+    if cycle_tasks:
+        errors.append(f"Tasks {cycle_tasks} are part of, or depend on, a dependency cycle")
+    return errors
+
+
+def check_job_settings(settings: "JobSettings"):
+    """Raises JobValidationError with all problems of the settings"""
+    errors = validate_job_settings(settings)
+    if errors:
+        raise JobValidationError(errors)
+
+
+def _replace_intrinsics(value: Any) -> Any:
+    """Unresolved Ref and Fn:: values of a template become placeholder strings"""
+    if isinstance(value, dict):
+        if len(value) == 1 and any(k == "Ref" or k.startswith("Fn::") for k in value):
+            return "<unresolved>"
+        return {k: _replace_intrinsics(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_intrinsics(v) for v in value]
+    return value
+
+
+def _jobs_in_document(document: dict, name: str) -> List[Tuple[str, dict]]:
+    """Job settings in a cloudformation template, job resource properties or plain job settings"""
+    if "Resources" in document:
+        return [
+            (f"{name}:{logical_id}", _replace_intrinsics(resource.get("Properties", {}).get("job", {})))
+            for logical_id, resource in document["Resources"].items()
+            if resource.get("Properties", {}).get("action") == "job"
+        ]
+    if "job" in document:
+        return [(name, document["job"])]
+    return [(name, document)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Json files to validate")
+    args = parser.parse_args(argv)
+    from databricks_cdk.resources.jobs.job import JobSettings
+
+    failed = 0
+    for path in args.files:
+        with open(path) as f:
+            document = json.load(f)
+        for name, settings in _jobs_in_document(document, path):
+            try:
+                errors = validate_job_settings(JobSettings.parse_obj(settings))
+            except ValidationError as e:
+                errors = [str(e)]
+            if errors:
+                failed += 1
+                print(f"{name}:\n" + "\n".join(f"  - {e}" for e in errors), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,7 @@ from databricks.sdk.service.oauth2 import SecretInfo
 from pydantic import BaseModel
 
 from databricks_cdk.resources.service_principals.service_principal import get_service_principal
+from databricks_cdk.tracing import start_span
 from databricks_cdk.utils import CnfResponse, get_account_client
 
 SECRETS_MANAGER_RESOURCE_PREFIX = "/databricks/service_principal/secrets"
@@ -138,21 +139,24 @@ def get_from_secrets_manager(secret_name: str) -> dict:
     This will only retrieve general information about the secret, not the actual secret value.
     """
     client = boto3.client("secretsmanager")
-    return client.describe_secret(SecretId=secret_name)
+    with start_span("secretsmanager.describe_secret", **{"secretsmanager.secret_name": secret_name}):
+        return client.describe_secret(SecretId=secret_name)
 
 
 def add_to_secrets_manager(secret_name: str, client_id: str, client_secret: str) -> dict:
     """Adds credentials to secrets manager at /{{SECRETS_MANAGER_RESOURCE_PREFIX}}/{{secret_name}}"""
     client = boto3.client("secretsmanager")
     secret_string = {"client_id": client_id, "client_secret": client_secret}
-    return client.create_secret(Name=secret_name, SecretString=json.dumps(secret_string))
+    with start_span("secretsmanager.create_secret", **{"secretsmanager.secret_name": secret_name}):
+        return client.create_secret(Name=secret_name, SecretString=json.dumps(secret_string))
 
 
 def delete_from_secrets_manager(secret_name: str) -> None:
     """Removes credentials from secrets manager at /{{SECRETS_MANAGER_RESOURCE_PREFIX}}/{{secret_name}}"""
     client = boto3.client("secretsmanager")
     try:
-        client.delete_secret(SecretId=secret_name, ForceDeleteWithoutRecovery=True)
+        with start_span("secretsmanager.delete_secret", **{"secretsmanager.secret_name": secret_name}):
+            client.delete_secret(SecretId=secret_name, ForceDeleteWithoutRecovery=True)
     except client.exceptions.ResourceNotFoundException:
         logger.warning("Secrets are not found in secrets manager")
 
@@ -6,6 +6,7 @@ from typing import Any, Dict, List, Optional
 import boto3
 from pydantic import BaseModel
 
+from databricks_cdk.tracing import start_span
 from databricks_cdk.utils import CnfResponse, get_request, post_request
 
 logger = logging.getLogger(__name__)
@@ -65,21 +66,24 @@ def add_token_to_secrets_manager(token_name: str, token_id: str, token_value: st
     client = boto3.client("secretsmanager")
     secret_name = f"/databricks/token/{token_name}"
     secret_string = {"token_id": token_id, "token_value": token_value}
-    return client.create_secret(Name=secret_name, SecretString=json.dumps(secret_string))["ARN"]
+    with start_span("secretsmanager.create_secret", **{"secretsmanager.secret_name": secret_name}):
+        return client.create_secret(Name=secret_name, SecretString=json.dumps(secret_string))["ARN"]
 
 
 def delete_token_from_secrets_manager(token_name: str) -> dict:
     """Removes token from secrets manager"""
     client = boto3.client("secretsmanager")
     secret_name = f"/databricks/token/{token_name}"
-    return client.delete_secret(SecretId=secret_name, ForceDeleteWithoutRecovery=True)
+    with start_span("secretsmanager.delete_secret", **{"secretsmanager.secret_name": secret_name}):
+        return client.delete_secret(SecretId=secret_name, ForceDeleteWithoutRecovery=True)
 
 
 def token_exists_in_secrets_manager(token_name: str) -> bool:
     """Checks whether token already exists in secrets manager"""
     client = boto3.client("secretsmanager")
     secret_name = f"/databricks/token/{token_name}"
-    return len(client.list_secrets(Filters=[{"Key": "name", "Values": [secret_name]}]).get("SecretList")) > 0
+    with start_span("secretsmanager.list_secrets", **{"secretsmanager.secret_name": secret_name}):
+        return len(client.list_secrets(Filters=[{"Key": "name", "Values": [secret_name]}]).get("SecretList")) > 0
 
 
 def update_token_in_secrets_manager(token_name: str, token_id: str, token_value: str) -> str:
@@ -87,7 +91,8 @@ def update_token_in_secrets_manager(token_name: str, token_id: str, token_value:
     client = boto3.client("secretsmanager")
     secret_name = f"/databricks/token/{token_name}"
     secret_string = {"token_id": token_id, "token_value": token_value}
-    return client.update_secret(SecretId=secret_name, SecretString=json.dumps(secret_string))["ARN"]
+    with start_span("secretsmanager.update_secret", **{"secretsmanager.secret_name": secret_name}):
+        return client.update_secret(SecretId=secret_name, SecretString=json.dumps(secret_string))["ARN"]
 
 
 def create_or_update_token(properties: TokenProperties, physical_resource_id: Optional[str] = None) -> CnfResponse:
@@ -0,0 +1,303 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENV = "TRACING"
+TRACING_FILE_ENV = "TRACING_FILE"
+
+
+class Span:
+    """Span interface, this base implementation does nothing and is used when tracing is disabled"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        pass
+
+    def record_exception(self, exception: BaseException):
+        pass
+
+
+class Tracer:
+    """Tracer interface, this base implementation does nothing and is used when tracing is disabled"""
+
+    enabled = False
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+        yield NOOP_SPAN
+
+
+NOOP_SPAN = Span()
+NOOP_TRACER = Tracer()
+
+
+class LocalSpan(Span):
+    """Span recorded in-process, exported as a dict shaped after the OpenTelemetry span model"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Optional[Dict[str, Any]]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = "OK"
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.events.append({"name": name, "timestamp_ns": time.time_ns(), "attributes": dict(attributes or {})})
+
+    def record_exception(self, exception: BaseException):
+        self.status = "ERROR"
+        self.add_event("exception", {"type": type(exception).__name__, "message": str(exception)})
+
+    def to_dict(self) -> Dict[str, Any]:
+        end_time_ns = self.end_time_ns or time.time_ns()
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": end_time_ns,
+            "duration_ms": (end_time_ns - self.start_time_ns) / 1e6,
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class SpanExporter:
+    def export(self, span: LocalSpan):
+        raise NotImplementedError
+
+
+class StreamExporter(SpanExporter):
+    """Writes every finished span as a json line to a stream, stdout by default"""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+
+    def export(self, span: LocalSpan):
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class JsonFileExporter(SpanExporter):
+    """Appends every finished span as a json line to a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: LocalSpan):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps finished spans in memory, useful for tests"""
+
+    def __init__(self):
+        self.spans: List[LocalSpan] = []
+
+    def export(self, span: LocalSpan):
+        self.spans.append(span)
+
+
+_current_span: ContextVar[Optional[LocalSpan]] = ContextVar("databricks_cdk_current_span", default=None)
+
+
+class LocalTracer(Tracer):
+    """Tracer that keeps track of parent/child spans itself and hands finished spans to an exporter"""
+
+    enabled = True
+
+    def __init__(self, exporter: SpanExporter):
+        self.exporter = exporter
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = LocalSpan(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time_ns = time.time_ns()
+            try:
+                self.exporter.export(span)
+            except Exception as e:
+                logger.warning(f"Failed to export span {name}: {e}")
+
+
+class OpenTelemetrySpan(Span):
+    def __init__(self, span):
+        self.span = span
+
+    def set_attribute(self, key: str, value: Any):
+        self.span.set_attribute(key, value)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.span.add_event(name, attributes=attributes or {})
+
+    def record_exception(self, exception: BaseException):
+        self.span.record_exception(exception)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Delegates to the opentelemetry api, exporting (for example OTLP) is configured through the
+    opentelemetry sdk/distro. Requires the opentelemetry-api package to be installed.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self.tracer = trace.get_tracer("databricks_cdk")
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+        with self.tracer.start_as_current_span(name, attributes=attributes or {}) as span:
+            yield OpenTelemetrySpan(span)
+
+
+class XRaySpan(Span):
+    def __init__(self, subsegment):
+        self.subsegment = subsegment
+
+    def set_attribute(self, key: str, value: Any):
+        if isinstance(value, (str, int, float, bool)):
+            self.subsegment.put_annotation(key.replace(".", "_"), value)
+        else:
+            self.subsegment.put_metadata(key, value)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.subsegment.put_metadata(f"event.{name}.{time.time_ns()}", attributes or {})
+
+    def record_exception(self, exception: BaseException):
+        self.subsegment.add_exception(exception, [])
+
+
+class XRayTracer(Tracer):
+    """Records spans as X-Ray subsegments. Requires the aws-xray-sdk package to be installed."""
+
+    enabled = True
+
+    def __init__(self):
+        from aws_xray_sdk.core import xray_recorder
+
+        self.recorder = xray_recorder
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+        with self.recorder.in_subsegment(name) as subsegment:
+            span = XRaySpan(subsegment)
+            for key, value in (attributes or {}).items():
+                span.set_attribute(key, value)
+            yield span
+
+
+_tracer: Optional[Tracer] = None
+_requests_instrumented = False
+
+
+def create_tracer_from_env() -> Tracer:
+    """
+    Creates tracer based on the TRACING env var:
+    - unset or empty: tracing disabled
+    - stdout: json lines on stdout
+    - file: json lines appended to TRACING_FILE, defaults to /tmp/databricks-cdk-traces.jsonl
+    - otel: opentelemetry api (exporter configured through the opentelemetry sdk)
+    - xray: aws x-ray subsegments
+    """
+    mode = os.environ.get(TRACING_ENV, "").strip().lower()
+    if mode in ("", "0", "false", "off", "none"):
+        return NOOP_TRACER
+    if mode == "stdout":
+        return LocalTracer(StreamExporter())
+    if mode == "file":
+        return LocalTracer(JsonFileExporter(os.environ.get(TRACING_FILE_ENV, "/tmp/databricks-cdk-traces.jsonl")))
+    if mode == "otel":
+        return OpenTelemetryTracer()
+    if mode == "xray":
+        return XRayTracer()
+    logger.warning(f"Unknown tracing mode '{mode}', tracing is disabled")
+    return NOOP_TRACER
+
+
+def get_tracer() -> Tracer:
+    """Returns the configured tracer, created from the env on first use"""
+    tracer = _tracer
+    if tracer is None:
+        tracer = create_tracer_from_env()
+        set_tracer(tracer)
+    return tracer
+
+
+def set_tracer(tracer: Optional[Tracer]):
+    """Overrides the tracer, None resets it so it's created from the env again on next use"""
+    global _tracer
+    _tracer = tracer
+    if tracer is not None and tracer.enabled:
+        instrument_requests()
+
+
+def start_span(name: str, **attributes: Any):
+    """Starts a span on the configured tracer, a no-op when tracing is disabled"""
+    return get_tracer().start_span(name, attributes)
+
+
+def instrument_requests():
+    """
+    Wraps requests.Session.send so every http call, including the ones done by the databricks sdk clients,
+    gets its own span. Only done once and only when tracing is enabled.
+    """
+    global _requests_instrumented
+    if _requests_instrumented:
+        return
+    _requests_instrumented = True
+    original_send = requests.Session.send
+
+    def traced_send(session, request, **kwargs):
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return original_send(session, request, **kwargs)
+        url = (request.url or "").split("?", 1)[0]
+        with tracer.start_span(f"HTTP {request.method}", {"http.method": request.method, "http.url": url}) as span:
+            response = original_send(session, request, **kwargs)
+            span.set_attribute("http.status_code", response.status_code)
+            if "Content-Length" in response.headers:
+                span.set_attribute("http.response_content_length", int(response.headers["Content-Length"]))
+            return response
+
+    requests.Session.send = traced_send  # type: ignore
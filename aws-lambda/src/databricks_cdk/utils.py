@@ -1,16 +1,24 @@
 import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import lru_cache
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Generic, Hashable, Iterator, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
 
 import boto3
 from databricks.sdk import AccountClient, WorkspaceClient
 from databricks.sdk.core import Config
 from pydantic import BaseModel
-from requests import request
+from requests import Session, request
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 from tenacity import retry, retry_if_exception, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from databricks_cdk.tracing import start_span
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,10 +44,11 @@ ACCOUNTS_BASE_URL = os.environ.get("BASE_URL", "https://accounts.cloud.databrick
 
 def get_param(name: str, required: bool = False):
     ssm = boto3.client("ssm")
-    response = ssm.get_parameter(
-        Name=name,
-        WithDecryption=True,
-    )
+    with start_span("ssm.get_parameter", **{"ssm.parameter_name": name}):
+        response = ssm.get_parameter(
+            Name=name,
+            WithDecryption=True,
+        )
     result = response.get("Parameter", {}).get("Value")
     if result is None and required:
         raise AttributeError(f"Parameter '{name}' not found")
@@ -70,6 +79,155 @@ class CnfResponse(BaseModel):  # TODO: rename to CfnResponse
     physical_resource_id: str
 
 
+class ResumeLater(Exception):
+    """
+    Raised when the lambda is about to time out while waiting on databricks, the response holds what is done so
+    far so the wait can continue in a new invocation. started_at is when the wait began, so the continued wait
+    keeps counting its timeout from there
+    """
+
+    def __init__(
+        self, response: CnfResponse, started_at: Optional[float] = None, message: str = "Lambda deadline reached"
+    ):
+        super().__init__(message)
+        self.response = response
+        self.started_at = started_at
+
+
+class ResourceNotReadyError(Exception):
+    """
+    Raised when a resource was created or updated at databricks but waiting on it failed. The response holds its
+    physical resource id, so cloudformation cleans up the resource that exists instead of a made up one on rollback
+    """
+
+    def __init__(self, response: CnfResponse, message: str):
+        super().__init__(message)
+        self.response = response
+
+
+# Time kept free to send the cloudformation response after waiting
+DEADLINE_MARGIN_SECONDS = float(os.environ.get("DEADLINE_MARGIN_SECONDS", "15"))
+
+_lambda_deadline: ContextVar[Optional[float]] = ContextVar("lambda_deadline", default=None)
+
+
+@contextmanager
+def lambda_deadline(context: Any, margin_seconds: Optional[float] = None) -> Iterator[None]:
+    """
+    Makes the remaining time of the lambda invocation, minus margin_seconds (DEADLINE_MARGIN_SECONDS by default),
+    available to get_remaining_seconds
+    """
+    get_remaining_time_in_millis = getattr(context, "get_remaining_time_in_millis", None)
+    margin_seconds = DEADLINE_MARGIN_SECONDS if margin_seconds is None else margin_seconds
+    deadline = None
+    if get_remaining_time_in_millis is not None:
+        deadline = time.monotonic() + get_remaining_time_in_millis() / 1000 - margin_seconds
+    token = _lambda_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _lambda_deadline.reset(token)
+
+
+def get_remaining_seconds() -> Optional[float]:
+    """Seconds left before the lambda deadline minus a safety margin, None outside of a lambda invocation"""
+    deadline = _lambda_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+T = TypeVar("T")
+
+
+class TtlCache(Generic[T]):
+    """
+    Thread safe in memory cache with expiring entries. Module level instances survive in between warm lambda
+    invocations, so lookups don't have to be repeated on every event.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, T]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: T):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Removes one entry, or all entries when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+HOST_REQUESTS_PER_SECOND = float(os.environ.get("HOST_REQUESTS_PER_SECOND", "10"))
+SESSION_POOL_SIZE = int(os.environ.get("SESSION_POOL_SIZE", "32"))
+
+
+class RateLimiter:
+    """Thread safe token bucket, acquire blocks until a request is allowed"""
+
+    def __init__(self, requests_per_second: float, burst: Optional[int] = None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst if burst is not None else max(1, int(requests_per_second))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.requests_per_second)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.requests_per_second
+            time.sleep(wait)
+
+
+_host_rate_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_host_rate_limiters_lock = threading.Lock()
+
+
+def get_host_rate_limiter(url: str, name: str = "default", requests_per_second: Optional[float] = None) -> RateLimiter:
+    """
+    Rate limiter of the host of the url, shared by all threads and warm invocations. Endpoints with their own
+    databricks rate limit get their own named limiter, at HOST_REQUESTS_PER_SECOND unless requests_per_second is given.
+    """
+    key = (urlparse(url).netloc, name)
+    with _host_rate_limiters_lock:
+        if key not in _host_rate_limiters:
+            _host_rate_limiters[key] = RateLimiter(requests_per_second or HOST_REQUESTS_PER_SECOND)
+        return _host_rate_limiters[key]
+
+
+@lru_cache(maxsize=1)
+def get_session() -> Session:
+    """Session with a connection pool large enough for concurrent requests, reused in between warm invocations"""
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=SESSION_POOL_SIZE, pool_maxsize=SESSION_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def get_account_id() -> str:
     """Get databricks account id from param store"""
     return get_param(ACCOUNT_PARAM, required=True)
@@ -83,10 +241,17 @@ def get_client_id() -> str:
     return get_param(CLIENT_ID_PARAM, required=True)
 
 
+def _sleep_before_retry(seconds: float):
+    """Sleep in between retries, traced so retry waits show up on the critical path"""
+    with start_span("http.retry_wait", **{"retry.wait_seconds": seconds}):
+        time.sleep(seconds)
+
+
 @retry(
     retry=retry_if_exception_type(HTTPError) & retry_if_exception(lambda ex: ex.response.status_code == 429),
     stop=stop_after_attempt(5),
     wait=wait_exponential(multiplier=1, min=1, max=10),
+    sleep=_sleep_before_retry,
     reraise=True,
 )
 def _do_request(
@@ -94,6 +259,7 @@ def _do_request(
     url: str,
     body: Optional[Dict[str, Any]] = None,
     params: Optional[Dict[str, Any]] = None,
+    session: Optional[Session] = None,
 ) -> Dict[str, Any]:
     """
     Generic method to do any type of request
@@ -102,11 +268,12 @@ def _do_request(
     :param url: Url to which to make the request
     :param body: Optional body to send along with the request, defaults to None
     :param params: Optional params to send along with the request, defaults to None
+    :param session: Optional session to reuse connections from, defaults to a new connection per request
     :param auth: Auth to use which is injected when not explicitely overriden, defaults to get_auth()
     :raises ValueError: If provided method is not supported
     :return: Response data
     """
-    resp = request(
+    resp = (session.request if session is not None else request)(
         method=method,
         url=url,
         json=body,
@@ -126,9 +293,10 @@ def post_request(
     url: str,
     body: Dict[str, Any],
     params: Optional[Dict[str, Any]] = None,
+    session: Optional[Session] = None,
 ) -> Dict[str, Any]:
     """Generic method to do post requests"""
-    return _do_request(method="POST", url=url, body=body, params=params)
+    return _do_request(method="POST", url=url, body=body, params=params, session=session)
 
 
 def put_request(
@@ -150,9 +318,10 @@ def get_request(
     url: str,
     body: Optional[Dict[str, Any]] = None,
     params: Optional[Dict[str, Any]] = None,
+    session: Optional[Session] = None,
 ) -> Dict[str, Any]:
     """Generic method to do get requests"""
-    return _do_request(method="GET", url=url, body=body, params=params)
+    return _do_request(method="GET", url=url, body=body, params=params, session=session)
 
 
 def delete_request(
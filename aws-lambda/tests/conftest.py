@@ -1,11 +1,22 @@
 import os
-from unittest.mock import MagicMock
+from contextlib import ExitStack
+from unittest.mock import MagicMock, patch
 
 import pytest
 from databricks.sdk import AccountClient, CredentialsAPI, ExperimentsAPI, ModelRegistryAPI, VolumesAPI, WorkspaceClient
 from databricks.sdk.service.iam import AccountServicePrincipalsAPI, ServicePrincipalsAPI
 from databricks.sdk.service.oauth2 import ServicePrincipalSecretsAPI
 
+from databricks_cdk.jobs.run_cache import RunStatusCache
+from tests.fake_databricks import FakeDatabricksServer
+
+# Modules that import get_authorization_headers themselves, patched next to utils for the fake server
+AUTHORIZATION_HEADERS_TARGETS = [
+    "databricks_cdk.utils.get_authorization_headers",
+    "databricks_cdk.resources.clusters.cluster.get_authorization_headers",
+    "databricks_cdk.resources.jobs.job.get_authorization_headers",
+]
+
 
 @pytest.fixture(scope="function", autouse=True)
 def aws_credentials():
@@ -18,6 +29,44 @@ def aws_credentials():
     os.environ["AWS_DEFAULT_REGION"] = "eu-west-1"
 
 
+@pytest.fixture(scope="function", autouse=True)
+def run_cache():
+    """Fresh run cache per test, without ttl so polling tests see every state change"""
+    cache = RunStatusCache(ttl_seconds=0)
+    with patch("databricks_cdk.jobs.run_cache._run_cache", cache):
+        yield cache
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    """Module attributes patched while the fake server runs, override it in a test module to shorten delays"""
+    return {}
+
+
+@pytest.fixture(scope="function")
+def fake_server(fake_server_patches):
+    """Fake databricks workspace without authentication, requests go to `fake_server.url`"""
+    with ExitStack() as stack:
+        for target in AUTHORIZATION_HEADERS_TARGETS:
+            stack.enter_context(patch(target, return_value={}))
+        for target, value in fake_server_patches.items():
+            stack.enter_context(patch(target, value))
+        yield stack.enter_context(FakeDatabricksServer(seed=1))
+
+
+@pytest.fixture(scope="function")
+def lambda_context():
+    """Factory of lambda contexts with the given remaining time, for handlers that stop before their deadline"""
+
+    def create(remaining_seconds: float):
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = remaining_seconds * 1000
+        context.invoked_function_arn = "arn:aws:lambda:eu-west-1:123456789012:function:deploy"
+        return context
+
+    return create
+
+
 @pytest.fixture(scope="function")
 def workspace_client():
     workspace_client = MagicMock(spec=WorkspaceClient)
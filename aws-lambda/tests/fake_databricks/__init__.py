@@ -0,0 +1,8 @@
+from tests.fake_databricks.api import ApiError, FakeDatabricksApi, FakeDatabricksState, FakeRequest  # noqa: F401
+from tests.fake_databricks.server import (  # noqa: F401
+    FakeDatabricksServer,
+    FaultRule,
+    LatencyProfile,
+    RateLimit,
+    RequestRecord,
+)
@@ -0,0 +1,1196 @@
+import copy
+import itertools
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+from pydantic import BaseModel
+
+TERMINAL_LIFE_CYCLE_STATES = ["TERMINATED", "SKIPPED", "INTERNAL_ERROR"]
+
+
+class ApiError(Exception):
+    def __init__(self, status_code: int, error_code: str, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+        self.message = message
+
+
+def not_found(message: str) -> ApiError:
+    return ApiError(404, "RESOURCE_DOES_NOT_EXIST", message)
+
+
+def does_not_exist(message: str) -> ApiError:
+    """Some 2.0/2.1 endpoints answer with a 400 instead of a 404 for unknown ids"""
+    return ApiError(400, "INVALID_PARAMETER_VALUE", message)
+
+
+def already_exists(message: str) -> ApiError:
+    return ApiError(400, "RESOURCE_ALREADY_EXISTS", message)
+
+
+class FakeRequest(BaseModel):
+    method: str
+    path: str
+    query: Dict[str, List[str]] = {}
+    body: Dict[str, Any] = {}
+    base_url: str = ""
+    path_params: Dict[str, str] = {}
+
+    def arg(self, name: str, default: Any = None) -> Any:
+        """Argument from the json body (also used on GET requests by this package) or the query string"""
+        if name in self.body:
+            return self.body[name]
+        if name in self.query:
+            return self.query[name][0]
+        return default
+
+    def args(self, name: str) -> List[str]:
+        """All values of a (possibly repeated or comma separated) argument"""
+        if name in self.body:
+            value = self.body[name]
+            return value if isinstance(value, list) else [value]
+        return [v for values in self.query.get(name, []) for v in values.split(",") if v]
+
+    def int_arg(self, name: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.arg(name)
+        return int(value) if value is not None else default
+
+    def bool_arg(self, name: str, default: bool = False) -> bool:
+        value = self.arg(name)
+        if value is None:
+            return default
+        return value if isinstance(value, bool) else str(value).lower() == "true"
+
+
+ROUTES: List[Tuple[str, Pattern, Callable]] = []
+
+
+def route(method: str, pattern: str):
+    """Registers a handler for a method and path pattern, named groups are available as path_params"""
+
+    def decorator(fn):
+        ROUTES.append((method, re.compile(f"^{pattern}$"), fn))
+        return fn
+
+    return decorator
+
+
+def paginate(items: List[Any], page_token: Optional[str], page_size: int) -> Tuple[List[Any], Optional[str]]:
+    """Offset based pagination with opaque string tokens"""
+    offset = int(page_token) if page_token else 0
+    end = offset + page_size
+    return items[offset:end], (str(end) if end < len(items) else None)
+
+
+class FakeDatabricksState:
+    """In memory state of the fake workspace and account, can be seeded directly by tests and benchmarks"""
+
+    def __init__(self, account_id: str):
+        self.account_id = account_id
+        self._ids = itertools.count(1000)
+
+        # seconds before new clusters/runs/workspaces move to their next state
+        self.cluster_start_seconds = 0.0
+        # state starting clusters end up in, TERMINATED for clusters that fail to start
+        self.cluster_start_state = "RUNNING"
+        self.run_pending_seconds = 0.0
+        self.run_running_seconds = 0.0
+        self.run_result_state = "SUCCESS"
+        self.workspace_provisioning_seconds = 0.0
+
+        self.clusters: Dict[str, dict] = {}
+        self.cluster_events: Dict[str, List[dict]] = {}
+        self.jobs: Dict[int, dict] = {}
+        self.runs: Dict[int, dict] = {}
+        self.run_outputs: Dict[int, dict] = {}
+        self.run_idempotency_tokens: Dict[str, int] = {}
+        self.secret_scopes: Dict[str, Dict[str, str]] = {}
+        self.groups: Dict[str, List[dict]] = {}
+        self.users: Dict[str, dict] = {}
+        self.service_principals: Dict[str, dict] = {}
+        self.account_service_principals: Dict[str, dict] = {}
+        self.service_principal_secrets: Dict[str, List[dict]] = {}
+        self.tokens: Dict[str, dict] = {}
+        self.warehouses: Dict[str, dict] = {}
+        self.instance_pools: Dict[str, dict] = {}
+        self.instance_profiles: Dict[str, dict] = {}
+        self.policies: Dict[str, dict] = {}
+        self.object_permissions: Dict[str, dict] = {}
+        self.dbfs_files: Dict[str, str] = {}
+        self.dbfs_handles: Dict[int, dict] = {}
+        self.catalogs: Dict[str, dict] = {}
+        self.schemas: Dict[str, dict] = {}
+        self.volumes: Dict[str, dict] = {}
+        self.metastores: Dict[str, dict] = {}
+        self.metastore_assignments: Dict[str, dict] = {}
+        self.storage_credentials: Dict[str, dict] = {}
+        self.external_locations: Dict[str, dict] = {}
+        self.grants: Dict[str, Dict[str, List[str]]] = {}
+        self.experiments: Dict[str, dict] = {}
+        self.registered_models: Dict[str, dict] = {}
+        self.workspaces: Dict[int, dict] = {}
+        self.credentials: Dict[str, dict] = {}
+        self.storage_configurations: Dict[str, dict] = {}
+        self.networks: Dict[str, dict] = {}
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add_cluster(self, cluster_name: str, cluster_source: str = "UI", state: str = "RUNNING", **fields) -> dict:
+        cluster_id = f"{self.next_id():04d}-000000-fake{len(self.clusters)}"
+        cluster = {
+            "cluster_id": cluster_id,
+            "cluster_name": cluster_name,
+            "cluster_source": cluster_source,
+            "state": state,
+            "start_time": int(time.time() * 1000),
+            **fields,
+        }
+        self.clusters[cluster_id] = cluster
+        self.cluster_events[cluster_id] = []
+        return cluster
+
+    def add_cluster_event(self, cluster_id: str, event_type: str, details: Optional[dict] = None):
+        self.cluster_events.setdefault(cluster_id, []).append(
+            {
+                "cluster_id": cluster_id,
+                "timestamp": int(time.time() * 1000),
+                "type": event_type,
+                "details": details or {},
+            }
+        )
+
+    def add_job(self, settings: dict) -> dict:
+        job_id = self.next_id()
+        job = {
+            "job_id": job_id,
+            "creator_user_name": "fake@databricks.com",
+            "created_time": int(time.time() * 1000),
+            "settings": copy.deepcopy(settings),
+        }
+        self.jobs[job_id] = job
+        return job
+
+    def add_run(self, job_id: Optional[int], tasks: List[dict], run_name: Optional[str] = None, **fields) -> dict:
+        run_id = self.next_id()
+        now = int(time.time() * 1000)
+        run = {
+            "run_id": run_id,
+            "job_id": job_id,
+            "run_name": run_name,
+            "number_in_job": run_id,
+            "start_time": now,
+            "state": {"life_cycle_state": "PENDING", "state_message": ""},
+            "tasks": [
+                {
+                    "run_id": self.next_id(),
+                    "task_key": t.get("task_key"),
+                    "depends_on": t.get("depends_on", []),
+                    "state": {"life_cycle_state": "PENDING", "state_message": ""},
+                }
+                for t in tasks
+            ],
+            **fields,
+        }
+        self.runs[run_id] = run
+        return run
+
+    def add_user(self, user_name: str) -> dict:
+        user_id = str(self.next_id())
+        user = {
+            "id": user_id,
+            "userName": user_name,
+            "schemas": ["urn:ietf:params:scim:schemas:core:2.0:User"],
+            "active": True,
+        }
+        self.users[user_id] = user
+        return user
+
+    def refresh_cluster(self, cluster: dict):
+        if cluster["state"] in ("PENDING", "RESTARTING") and not cluster.get("frozen"):
+            if time.time() - cluster.get("_transition_at", 0) >= self.cluster_start_seconds:
+                cluster["state"] = self.cluster_start_state
+                event_type = "RUNNING" if self.cluster_start_state == "RUNNING" else "TERMINATING"
+                self.add_cluster_event(cluster["cluster_id"], event_type)
+
+    def refresh_run(self, run: dict):
+        """Moves runs through PENDING -> RUNNING -> TERMINATED based on their age, unless frozen"""
+        if run.get("frozen") or run["state"]["life_cycle_state"] in TERMINAL_LIFE_CYCLE_STATES:
+            return
+        age = time.time() - run["start_time"] / 1000
+        if run["state"]["life_cycle_state"] == "TERMINATING":
+            self._set_run_state(run, "TERMINATED", "CANCELED")
+        elif age >= self.run_pending_seconds + self.run_running_seconds:
+            self._set_run_state(run, "TERMINATED", self.run_result_state)
+        elif age >= self.run_pending_seconds:
+            self._set_run_state(run, "RUNNING", None)
+
+    @staticmethod
+    def _set_run_state(run: dict, life_cycle_state: str, result_state: Optional[str]):
+        state = {"life_cycle_state": life_cycle_state, "state_message": ""}
+        if result_state is not None:
+            state["result_state"] = result_state
+        run["state"] = state
+        for task in run.get("tasks", []):
+            if task["state"]["life_cycle_state"] not in TERMINAL_LIFE_CYCLE_STATES or result_state == "CANCELED":
+                task["state"] = dict(state)
+        if life_cycle_state == "TERMINATED":
+            run["end_time"] = int(time.time() * 1000)
+
+
+class FakeDatabricksApi:
+    """Routes fake requests to the stateful handlers below"""
+
+    def __init__(self, account_id: str = "fake-account-id", default_page_size: int = 100):
+        self.state = FakeDatabricksState(account_id)
+        self.default_page_size = default_page_size
+        self._lock = threading.RLock()
+
+    def dispatch(self, request: FakeRequest) -> Tuple[int, Any]:
+        for method, pattern, handler in ROUTES:
+            if not re.fullmatch(method, request.method):
+                continue
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            request.path_params = {k: v for k, v in match.groupdict().items() if v is not None}
+            with self._lock:
+                return 200, handler(self, request)
+        raise ApiError(404, "ENDPOINT_NOT_FOUND", f"No fake endpoint for {request.method} {request.path}")
+
+    # OAuth
+
+    @route("GET", "/oidc/.well-known/oauth-authorization-server")
+    def oidc_metadata(self, request: FakeRequest):
+        return {
+            "authorization_endpoint": f"{request.base_url}/oidc/v1/authorize",
+            "token_endpoint": f"{request.base_url}/oidc/v1/token",
+        }
+
+    @route("POST", r"/oidc(/accounts/[^/]+)?/v1/token")
+    def oidc_token(self, request: FakeRequest):
+        return {"access_token": "fake-access-token", "token_type": "Bearer", "expires_in": 3600}
+
+    # Clusters
+
+    def _get_cluster(self, request: FakeRequest) -> dict:
+        cluster_id = request.arg("cluster_id")
+        cluster = self.state.clusters.get(cluster_id)
+        if cluster is None:
+            raise does_not_exist(f"Cluster {cluster_id} does not exist")
+        self.state.refresh_cluster(cluster)
+        return cluster
+
+    @route("POST", "/api/2.0/clusters/create")
+    def cluster_create(self, request: FakeRequest):
+        fields = {k: v for k, v in request.body.items() if k not in ("cluster_name",)}
+        cluster = self.state.add_cluster(request.body["cluster_name"], cluster_source="API", state="PENDING", **fields)
+        cluster["_transition_at"] = time.time()
+        self.state.add_cluster_event(cluster["cluster_id"], "CREATING")
+        return {"cluster_id": cluster["cluster_id"]}
+
+    @route("POST", "/api/2.0/clusters/edit")
+    def cluster_edit(self, request: FakeRequest):
+        cluster = self._get_cluster(request)
+        for key in [k for k in cluster if k not in ("cluster_id", "cluster_source", "state", "start_time")]:
+            if not key.startswith("_"):
+                del cluster[key]
+        cluster.update(request.body)
+        self.state.add_cluster_event(cluster["cluster_id"], "EDITED")
+        if cluster["state"] == "RUNNING":
+            cluster["state"] = "RESTARTING"
+            cluster["_transition_at"] = time.time()
+            self.state.add_cluster_event(cluster["cluster_id"], "RESTARTING")
+        return {}
+
+    @route("GET", "/api/2.0/clusters/get")
+    def cluster_get(self, request: FakeRequest):
+        return {k: v for k, v in self._get_cluster(request).items() if not k.startswith("_")}
+
+    def _public_clusters(self, sources: List[str]) -> List[dict]:
+        clusters = list(self.state.clusters.values())
+        if sources:
+            clusters = [c for c in clusters if c.get("cluster_source") in sources]
+        return [{k: v for k, v in c.items() if not k.startswith("_")} for c in clusters]
+
+    @route("GET", "/api/2.0/clusters/list")
+    def cluster_list(self, request: FakeRequest):
+        # Api 2.0 ignores filters and paging, it always lists all clusters
+        return {"clusters": self._public_clusters([])}
+
+    @route("GET", "/api/2.1/clusters/list")
+    def cluster_list_paginated(self, request: FakeRequest):
+        sources = request.args("filter_by.cluster_sources") or (request.arg("filter_by") or {}).get(
+            "cluster_sources", []
+        )
+        clusters = self._public_clusters(sources)
+        page_size = request.int_arg("page_size")
+        if page_size is None:
+            return {"clusters": clusters}
+        page, next_token = paginate(clusters, request.arg("page_token"), page_size)
+        response: Dict[str, Any] = {"clusters": page}
+        if next_token is not None:
+            response["next_page_token"] = next_token
+        return response
+
+    @route("POST", "/api/2.0/clusters/(permanent-delete|delete)")
+    def cluster_delete(self, request: FakeRequest):
+        cluster = self._get_cluster(request)
+        if request.path.endswith("permanent-delete"):
+            del self.state.clusters[cluster["cluster_id"]]
+        else:
+            cluster["state"] = "TERMINATED"
+            self.state.add_cluster_event(cluster["cluster_id"], "TERMINATING")
+        return {}
+
+    @route("POST", "/api/2.0/clusters/start")
+    def cluster_start(self, request: FakeRequest):
+        cluster = self._get_cluster(request)
+        cluster["state"] = "PENDING"
+        cluster["_transition_at"] = time.time()
+        self.state.add_cluster_event(cluster["cluster_id"], "STARTING")
+        return {}
+
+    @route("POST", "/api/2.0/clusters/events")
+    def cluster_events(self, request: FakeRequest):
+        cluster = self._get_cluster(request)
+        events = self.state.cluster_events.get(cluster["cluster_id"], [])
+        start_time = request.body.get("start_time")
+        if start_time is not None:
+            events = [e for e in events if e["timestamp"] >= start_time]
+        event_types = request.body.get("event_types")
+        if event_types:
+            events = [e for e in events if e["type"] in event_types]
+        if request.body.get("order", "DESC") == "DESC":
+            events = list(reversed(events))
+        offset = request.body.get("offset", 0)
+        limit = request.body.get("limit", 50)
+        page = events[offset : offset + limit]
+        response: Dict[str, Any] = {"events": page, "total_count": len(events)}
+        if offset + limit < len(events):
+            response["next_page"] = {**request.body, "offset": offset + limit}
+        return response
+
+    # Jobs
+
+    def _get_job(self, request: FakeRequest) -> dict:
+        job_id = request.int_arg("job_id")
+        if job_id not in self.state.jobs:
+            raise does_not_exist(f"Job {job_id} does not exist.")
+        return self.state.jobs[job_id]
+
+    def _get_run(self, request: FakeRequest) -> dict:
+        run_id = request.int_arg("run_id")
+        run = self.state.runs.get(run_id)  # type: ignore
+        if run is None:
+            raise does_not_exist(f"Run {run_id} does not exist.")
+        self.state.refresh_run(run)
+        return run
+
+    @route("POST", "/api/2.1/jobs/create")
+    def job_create(self, request: FakeRequest):
+        settings = {k: v for k, v in request.body.items() if k != "access_control_list"}
+        return {"job_id": self.state.add_job(settings)["job_id"]}
+
+    @route("GET", "/api/2.1/jobs/get")
+    def job_get(self, request: FakeRequest):
+        return copy.deepcopy(self._get_job(request))
+
+    @route("POST", "/api/2.1/jobs/reset")
+    def job_reset(self, request: FakeRequest):
+        job = self._get_job(request)
+        job["settings"] = copy.deepcopy(request.body["new_settings"])
+        return {}
+
+    @route("POST", "/api/2.1/jobs/update")
+    def job_update(self, request: FakeRequest):
+        """Top level fields are replaced, tasks and job_clusters are merged on their keys"""
+        job = self._get_job(request)
+        settings = job["settings"]
+        array_keys = {"tasks": "task_key", "job_clusters": "job_cluster_key"}
+        for field, value in (request.body.get("new_settings") or {}).items():
+            if field in array_keys:
+                key = array_keys[field]
+                merged = {item[key]: item for item in settings.get(field, [])}
+                merged.update({item[key]: copy.deepcopy(item) for item in value})
+                settings[field] = list(merged.values())
+            else:
+                settings[field] = copy.deepcopy(value)
+        for field in request.body.get("fields_to_remove", []):
+            top, _, key = field.partition("/")
+            if key and top in array_keys:
+                settings[top] = [i for i in settings.get(top, []) if i[array_keys[top]] != key]
+            else:
+                settings.pop(top, None)
+        return {}
+
+    @route("POST", "/api/2.1/jobs/delete")
+    def job_delete(self, request: FakeRequest):
+        del self.state.jobs[self._get_job(request)["job_id"]]
+        return {}
+
+    @route("GET", "/api/2.1/jobs/list")
+    def job_list(self, request: FakeRequest):
+        limit = min(request.int_arg("limit", 20) or 20, 100)
+        name = request.arg("name")
+        jobs = list(self.state.jobs.values())
+        if name is not None:
+            jobs = [j for j in jobs if j["settings"].get("name", "").lower() == name.lower()]
+        token = request.arg("page_token") or (str(request.int_arg("offset")) if request.arg("offset") else None)
+        page, next_token = paginate(jobs, token, limit)
+        expand_tasks = request.bool_arg("expand_tasks")
+        result = []
+        for job in page:
+            job = copy.deepcopy(job)
+            if not expand_tasks:
+                job["settings"].pop("tasks", None)
+                job["settings"].pop("job_clusters", None)
+            result.append(job)
+        response: Dict[str, Any] = {"jobs": result, "has_more": next_token is not None}
+        if next_token is not None:
+            response["next_page_token"] = next_token
+        return response
+
+    @route("POST", "/api/2.1/jobs/run-now")
+    def job_run_now(self, request: FakeRequest):
+        job = self._get_job(request)
+        token = request.body.get("idempotency_token")
+        if token is not None and token in self.state.run_idempotency_tokens:
+            run_id = self.state.run_idempotency_tokens[token]
+            return {"run_id": run_id, "number_in_job": run_id}
+        run = self.state.add_run(job["job_id"], job["settings"].get("tasks", []), run_name=job["settings"].get("name"))
+        if token is not None:
+            self.state.run_idempotency_tokens[token] = run["run_id"]
+        return {"run_id": run["run_id"], "number_in_job": run["number_in_job"]}
+
+    @route("POST", "/api/2.1/jobs/runs/submit")
+    def job_runs_submit(self, request: FakeRequest):
+        token = request.body.get("idempotency_token")
+        if token is not None and token in self.state.run_idempotency_tokens:
+            return {"run_id": self.state.run_idempotency_tokens[token]}
+        run = self.state.add_run(None, request.body.get("tasks", []), run_name=request.body.get("run_name"))
+        if token is not None:
+            self.state.run_idempotency_tokens[token] = run["run_id"]
+        return {"run_id": run["run_id"]}
+
+    @route("GET", "/api/2.1/jobs/runs/get")
+    def job_runs_get(self, request: FakeRequest):
+        return copy.deepcopy(self._get_run(request))
+
+    @route("GET", "/api/2.1/jobs/runs/list")
+    def job_runs_list(self, request: FakeRequest):
+        job_id = request.int_arg("job_id")
+        runs = [r for r in self.state.runs.values() if job_id is None or r["job_id"] == job_id]
+        for run in runs:
+            self.state.refresh_run(run)
+        if request.bool_arg("active_only"):
+            runs = [r for r in runs if r["state"]["life_cycle_state"] not in TERMINAL_LIFE_CYCLE_STATES]
+        if request.bool_arg("completed_only"):
+            runs = [r for r in runs if r["state"]["life_cycle_state"] in TERMINAL_LIFE_CYCLE_STATES]
+        limit = min(request.int_arg("limit", 25) or 25, 25)
+        token = request.arg("page_token") or (str(request.int_arg("offset")) if request.arg("offset") else None)
+        page, next_token = paginate(runs, token, limit)
+        response: Dict[str, Any] = {"runs": copy.deepcopy(page), "has_more": next_token is not None}
+        if next_token is not None:
+            response["next_page_token"] = next_token
+        return response
+
+    @route("POST", "/api/2.1/jobs/runs/cancel")
+    def job_runs_cancel(self, request: FakeRequest):
+        run = self._get_run(request)
+        if run["state"]["life_cycle_state"] not in TERMINAL_LIFE_CYCLE_STATES:
+            run["state"] = {"life_cycle_state": "TERMINATING", "state_message": "Run cancelled"}
+            run.pop("frozen", None)
+        return {}
+
+    @route("GET", "/api/2.1/jobs/runs/get-output")
+    def job_runs_get_output(self, request: FakeRequest):
+        run_id = request.int_arg("run_id")
+        parent = next((r for r in self.state.runs.values() if any(t["run_id"] == run_id for t in r["tasks"])), None)
+        if parent is None:
+            run = self._get_run(request)
+            if len(run["tasks"]) > 1:
+                raise does_not_exist("Retrieving the output of runs with multiple tasks is not supported.")
+            metadata = run
+        else:
+            self.state.refresh_run(parent)
+            metadata = {**next(t for t in parent["tasks"] if t["run_id"] == run_id), "job_id": parent["job_id"]}
+        return {"metadata": copy.deepcopy(metadata), **copy.deepcopy(self.state.run_outputs.get(run_id, {}))}
+
+    @route("POST", "/api/2.1/jobs/runs/repair")
+    def job_runs_repair(self, request: FakeRequest):
+        run = self._get_run(request)
+        history = run.setdefault("repair_history", [{"type": "ORIGINAL", "id": run["run_id"]}])
+        latest = history[-1]["id"] if len(history) > 1 else None
+        if latest is not None and request.body.get("latest_repair_id") != latest:
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", "latest_repair_id is not the latest repair")
+        rerun_tasks = set(request.body.get("rerun_tasks", []))
+        if request.body.get("rerun_all_failed_tasks"):
+            rerun_tasks |= {
+                t["task_key"] for t in run["tasks"] if t["state"].get("result_state") not in (None, "SUCCESS")
+            }
+        if request.body.get("rerun_dependent_tasks"):
+            changed = True
+            while changed:
+                changed = False
+                for task in run["tasks"]:
+                    deps = {d["task_key"] if isinstance(d, dict) else d for d in task.get("depends_on", [])}
+                    if task["task_key"] not in rerun_tasks and deps & rerun_tasks:
+                        rerun_tasks.add(task["task_key"])
+                        changed = True
+        repair_id = self.state.next_id()
+        history.append({"type": "REPAIR", "id": repair_id, "task_run_ids": []})
+        run["start_time"] = int(time.time() * 1000)
+        run["state"] = {"life_cycle_state": "PENDING", "state_message": ""}
+        for task in run["tasks"]:
+            if task["task_key"] in rerun_tasks:
+                task["run_id"] = self.state.next_id()
+                task["state"] = {"life_cycle_state": "PENDING", "state_message": ""}
+                history[-1]["task_run_ids"].append(task["run_id"])
+        return {"repair_id": repair_id}
+
+    # Secrets
+
+    def _get_scope(self, request: FakeRequest) -> Dict[str, str]:
+        scope = request.arg("scope")
+        if scope not in self.state.secret_scopes:
+            raise not_found(f"Scope {scope} does not exist!")
+        return self.state.secret_scopes[scope]
+
+    @route("POST", "/api/2.0/secrets/scopes/create")
+    def secret_scope_create(self, request: FakeRequest):
+        if request.body["scope"] in self.state.secret_scopes:
+            raise already_exists(f"Scope {request.body['scope']} already exists!")
+        self.state.secret_scopes[request.body["scope"]] = {}
+        return {}
+
+    @route("GET", "/api/2.0/secrets/scopes/list")
+    def secret_scope_list(self, request: FakeRequest):
+        return {"scopes": [{"name": name, "backend_type": "DATABRICKS"} for name in self.state.secret_scopes]}
+
+    @route("POST", "/api/2.0/secrets/scopes/delete")
+    def secret_scope_delete(self, request: FakeRequest):
+        self._get_scope(request)
+        del self.state.secret_scopes[request.arg("scope")]
+        return {}
+
+    @route("POST", "/api/2.0/secrets/put")
+    def secret_put(self, request: FakeRequest):
+        self._get_scope(request)[request.body["key"]] = request.body.get("string_value", "")
+        return {}
+
+    @route("GET", "/api/2.0/secrets/list")
+    def secret_list(self, request: FakeRequest):
+        now = int(time.time() * 1000)
+        return {"secrets": [{"key": k, "last_updated_timestamp": now} for k in self._get_scope(request)]}
+
+    @route("POST", "/api/2.0/secrets/delete")
+    def secret_delete(self, request: FakeRequest):
+        scope = self._get_scope(request)
+        if request.body["key"] not in scope:
+            raise not_found(f"Secret {request.body['key']} does not exist!")
+        del scope[request.body["key"]]
+        return {}
+
+    # Groups
+
+    def _get_group(self, request: FakeRequest, name_arg: str = "group_name") -> List[dict]:
+        group_name = request.arg(name_arg)
+        if group_name not in self.state.groups:
+            raise not_found(f"Group {group_name} does not exist")
+        return self.state.groups[group_name]
+
+    @route("POST", "/api/2.0/groups/create")
+    def group_create(self, request: FakeRequest):
+        if request.body["group_name"] in self.state.groups:
+            raise already_exists(f"Group {request.body['group_name']} already exists")
+        self.state.groups[request.body["group_name"]] = []
+        return {"group_name": request.body["group_name"]}
+
+    @route("GET", "/api/2.0/groups/list")
+    def group_list(self, request: FakeRequest):
+        return {"group_names": list(self.state.groups)}
+
+    @route("GET", "/api/2.0/groups/list-members")
+    def group_list_members(self, request: FakeRequest):
+        return {"members": copy.deepcopy(self._get_group(request))}
+
+    @route("POST", "/api/2.0/groups/(?P<action>add|remove)-member")
+    def group_member(self, request: FakeRequest):
+        members = self._get_group(request, "parent_name")
+        member = {k: v for k, v in request.body.items() if k in ("user_name", "group_name")}
+        if request.path_params["action"] == "add" and member not in members:
+            members.append(member)
+        elif request.path_params["action"] == "remove" and member in members:
+            members.remove(member)
+        return {}
+
+    @route("POST", "/api/2.0/groups/delete")
+    def group_delete(self, request: FakeRequest):
+        self._get_group(request)
+        del self.state.groups[request.arg("group_name")]
+        return {}
+
+    # SCIM
+
+    @staticmethod
+    def _scim_list(items: List[dict], request: FakeRequest, filter_attribute: str) -> dict:
+        scim_filter = request.arg("filter")
+        if scim_filter:
+            match = re.match(rf'{filter_attribute}\s+eq\s+"?([^"]*)"?', scim_filter)
+            if match:
+                items = [i for i in items if i.get(filter_attribute) == match.group(1)]
+        start_index = request.int_arg("startIndex", 1) or 1
+        count = request.int_arg("count", 10000) or 10000
+        page = items[start_index - 1 : start_index - 1 + count]
+        return {
+            "schemas": ["urn:ietf:params:scim:api:messages:2.0:ListResponse"],
+            "totalResults": len(items),
+            "startIndex": start_index,
+            "itemsPerPage": len(page),
+            "Resources": copy.deepcopy(page),
+        }
+
+    @route("GET", "/api/2.0/preview/scim/v2/Users")
+    def user_list(self, request: FakeRequest):
+        return self._scim_list(list(self.state.users.values()), request, "userName")
+
+    @route("POST", "/api/2.0/preview/scim/v2/Users")
+    def user_create(self, request: FakeRequest):
+        user = self.state.add_user(request.body["userName"])
+        user.update({k: v for k, v in request.body.items() if k != "userName"})
+        return copy.deepcopy(user)
+
+    def _scim_item(self, items: Dict[str, dict], request: FakeRequest) -> dict:
+        item_id = request.path_params["id"]
+        if item_id not in items:
+            raise not_found(f"Resource {item_id} not found")
+        return items[item_id]
+
+    @route("GET", "/api/2.0/preview/scim/v2/Users/(?P<id>[^/]+)")
+    def user_get(self, request: FakeRequest):
+        return copy.deepcopy(self._scim_item(self.state.users, request))
+
+    @route("PUT", "/api/2.0/preview/scim/v2/Users/(?P<id>[^/]+)")
+    def user_put(self, request: FakeRequest):
+        self._scim_item(self.state.users, request).update(request.body)
+        return {}
+
+    @route("DELETE", "/api/2.0/preview/scim/v2/Users/(?P<id>[^/]+)")
+    def user_delete(self, request: FakeRequest):
+        self._scim_item(self.state.users, request)
+        del self.state.users[request.path_params["id"]]
+        return {}
+
+    @route("GET", "/api/2.0(/accounts/[^/]+/scim/v2|/preview/scim/v2)/ServicePrincipals")
+    def service_principal_list(self, request: FakeRequest):
+        return self._scim_list(list(self.state.service_principals.values()), request, "displayName")
+
+    @route("POST", "/api/2.0/preview/scim/v2/ServicePrincipals")
+    def service_principal_create(self, request: FakeRequest):
+        sp_id = str(self.state.next_id())
+        service_principal = {
+            **request.body,
+            "id": sp_id,
+            "applicationId": request.body.get("applicationId", str(uuid.uuid4())),
+        }
+        self.state.service_principals[sp_id] = service_principal
+        self.state.account_service_principals[sp_id] = copy.deepcopy(service_principal)
+        return copy.deepcopy(service_principal)
+
+    def _service_principals(self, request: FakeRequest) -> Dict[str, dict]:
+        if "/accounts/" in request.path:
+            return self.state.account_service_principals
+        return self.state.service_principals
+
+    @route("GET", "/api/2.0(/accounts/[^/]+/scim/v2|/preview/scim/v2)/ServicePrincipals/(?P<id>[^/]+)")
+    def service_principal_get(self, request: FakeRequest):
+        return copy.deepcopy(self._scim_item(self._service_principals(request), request))
+
+    @route("(PUT|PATCH)", "/api/2.0(/accounts/[^/]+/scim/v2|/preview/scim/v2)/ServicePrincipals/(?P<id>[^/]+)")
+    def service_principal_update(self, request: FakeRequest):
+        self._scim_item(self._service_principals(request), request).update(request.body)
+        return {}
+
+    @route("DELETE", "/api/2.0(/accounts/[^/]+/scim/v2|/preview/scim/v2)/ServicePrincipals/(?P<id>[^/]+)")
+    def service_principal_delete(self, request: FakeRequest):
+        self._scim_item(self._service_principals(request), request)
+        del self._service_principals(request)[request.path_params["id"]]
+        return {}
+
+    @route("POST", "/api/2.0/accounts/[^/]+/servicePrincipals/(?P<id>[^/]+)/credentials/secrets")
+    def service_principal_secret_create(self, request: FakeRequest):
+        secret = {
+            "id": str(self.state.next_id()),
+            "secret": uuid.uuid4().hex,
+            "status": "ACTIVE",
+            "create_time": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        self.state.service_principal_secrets.setdefault(request.path_params["id"], []).append(secret)
+        return secret
+
+    @route("GET", "/api/2.0/accounts/[^/]+/servicePrincipals/(?P<id>[^/]+)/credentials/secrets")
+    def service_principal_secret_list(self, request: FakeRequest):
+        secrets = self.state.service_principal_secrets.get(request.path_params["id"], [])
+        return {"secrets": [{k: v for k, v in s.items() if k != "secret"} for s in secrets]}
+
+    @route("DELETE", "/api/2.0/accounts/[^/]+/servicePrincipals/(?P<id>[^/]+)/credentials/secrets/(?P<secret>[^/]+)")
+    def service_principal_secret_delete(self, request: FakeRequest):
+        secrets = self.state.service_principal_secrets.get(request.path_params["id"], [])
+        self.state.service_principal_secrets[request.path_params["id"]] = [
+            s for s in secrets if s["id"] != request.path_params["secret"]
+        ]
+        return {}
+
+    # Tokens
+
+    @route("POST", "/api/2.0/token/create")
+    def token_create(self, request: FakeRequest):
+        now = int(time.time() * 1000)
+        lifetime = request.body.get("lifetime_seconds")
+        token_info = {
+            "token_id": uuid.uuid4().hex,
+            "creation_time": now,
+            "expiry_time": now + lifetime * 1000 if lifetime else -1,
+            "comment": request.body.get("comment") or "",
+        }
+        self.state.tokens[token_info["token_id"]] = token_info
+        return {"token_value": f"dapi{uuid.uuid4().hex}", "token_info": token_info}
+
+    @route("GET", "/api/2.0/token/list")
+    def token_list(self, request: FakeRequest):
+        return {"token_infos": list(self.state.tokens.values())}
+
+    @route("POST", "/api/2.0/token/delete")
+    def token_delete(self, request: FakeRequest):
+        if self.state.tokens.pop(request.body["token_id"], None) is None:
+            raise not_found(f"Token {request.body['token_id']} does not exist")
+        return {}
+
+    # SQL warehouses
+
+    @route("POST", "/api/2.0/sql/warehouses")
+    def warehouse_create(self, request: FakeRequest):
+        warehouse_id = uuid.uuid4().hex[:16]
+        self.state.warehouses[warehouse_id] = {**request.body, "id": warehouse_id, "state": "RUNNING"}
+        return {"id": warehouse_id}
+
+    @route("GET", "/api/2.0/sql/warehouses")
+    def warehouse_list(self, request: FakeRequest):
+        return {"warehouses": copy.deepcopy(list(self.state.warehouses.values()))}
+
+    def _get_warehouse(self, request: FakeRequest) -> dict:
+        warehouse_id = request.path_params["id"]
+        if warehouse_id not in self.state.warehouses:
+            raise not_found(f"Warehouse {warehouse_id} does not exist")
+        return self.state.warehouses[warehouse_id]
+
+    @route("GET", "/api/2.0/sql/warehouses/(?P<id>[^/]+)")
+    def warehouse_get(self, request: FakeRequest):
+        return copy.deepcopy(self._get_warehouse(request))
+
+    @route("POST", "/api/2.0/sql/warehouses/(?P<id>[^/]+)/edit")
+    def warehouse_edit(self, request: FakeRequest):
+        self._get_warehouse(request).update(request.body)
+        return {}
+
+    @route("DELETE", "/api/2.0/sql/warehouses/(?P<id>[^/]+)")
+    def warehouse_delete(self, request: FakeRequest):
+        self._get_warehouse(request)
+        del self.state.warehouses[request.path_params["id"]]
+        return {}
+
+    # Instance pools, instance profiles and cluster policies
+
+    @route("POST", "/api/2.0/instance-pools/create")
+    def instance_pool_create(self, request: FakeRequest):
+        instance_pool_id = f"{self.state.next_id()}-fake-pool"
+        self.state.instance_pools[instance_pool_id] = {**request.body, "instance_pool_id": instance_pool_id}
+        return {"instance_pool_id": instance_pool_id}
+
+    def _get_instance_pool(self, request: FakeRequest) -> dict:
+        instance_pool_id = request.arg("instance_pool_id")
+        if instance_pool_id not in self.state.instance_pools:
+            raise does_not_exist(f"Instance pool {instance_pool_id} does not exist")
+        return self.state.instance_pools[instance_pool_id]
+
+    @route("GET", "/api/2.0/instance-pools/get")
+    def instance_pool_get(self, request: FakeRequest):
+        return copy.deepcopy(self._get_instance_pool(request))
+
+    @route("GET", "/api/2.0/instance-pools/list")
+    def instance_pool_list(self, request: FakeRequest):
+        return {"instance_pools": copy.deepcopy(list(self.state.instance_pools.values()))}
+
+    @route("POST", "/api/2.0/instance-pools/edit")
+    def instance_pool_edit(self, request: FakeRequest):
+        self._get_instance_pool(request).update(request.body)
+        return {}
+
+    @route("POST", "/api/2.0/instance-pools/delete")
+    def instance_pool_delete(self, request: FakeRequest):
+        del self.state.instance_pools[self._get_instance_pool(request)["instance_pool_id"]]
+        return {}
+
+    @route("POST", "/api/2.0/instance-profiles/add")
+    def instance_profile_add(self, request: FakeRequest):
+        self.state.instance_profiles[request.body["instance_profile_arn"]] = dict(request.body)
+        return {}
+
+    @route("GET", "/api/2.0/instance-profiles/list")
+    def instance_profile_list(self, request: FakeRequest):
+        return {"instance_profiles": copy.deepcopy(list(self.state.instance_profiles.values()))}
+
+    @route("POST", "/api/2.0/instance-profiles/remove")
+    def instance_profile_remove(self, request: FakeRequest):
+        self.state.instance_profiles.pop(request.body["instance_profile_arn"], None)
+        return {}
+
+    @route("POST", "/api/2.0/policies/clusters/create")
+    def policy_create(self, request: FakeRequest):
+        policy_id = uuid.uuid4().hex[:16].upper()
+        self.state.policies[policy_id] = {**request.body, "policy_id": policy_id}
+        return {"policy_id": policy_id}
+
+    def _get_policy(self, request: FakeRequest) -> dict:
+        policy_id = request.arg("policy_id")
+        if policy_id not in self.state.policies:
+            raise does_not_exist(f"Cluster policy {policy_id} does not exist")
+        return self.state.policies[policy_id]
+
+    @route("GET", "/api/2.0/policies/clusters/get")
+    def policy_get(self, request: FakeRequest):
+        return copy.deepcopy(self._get_policy(request))
+
+    @route("GET", "/api/2.0/policies/clusters/list")
+    def policy_list(self, request: FakeRequest):
+        return {"policies": copy.deepcopy(list(self.state.policies.values()))}
+
+    @route("POST", "/api/2.0/policies/clusters/edit")
+    def policy_edit(self, request: FakeRequest):
+        self._get_policy(request).update(request.body)
+        return {}
+
+    @route("POST", "/api/2.0/policies/clusters/delete")
+    def policy_delete(self, request: FakeRequest):
+        del self.state.policies[self._get_policy(request)["policy_id"]]
+        return {}
+
+    # Object permissions
+
+    @route("GET", "/api/2.0/permissions/(?P<object>.+)")
+    def permissions_get(self, request: FakeRequest):
+        object_path = request.path_params["object"]
+        acl = self.state.object_permissions.get(object_path, {}).get("access_control_list", [])
+        return {"object_id": f"/{object_path}", "access_control_list": copy.deepcopy(acl)}
+
+    @route("(PUT|PATCH)", "/api/2.0/permissions/(?P<object>.+)")
+    def permissions_set(self, request: FakeRequest):
+        object_path = request.path_params["object"]
+        current = self.state.object_permissions.setdefault(object_path, {"access_control_list": []})
+        if request.method == "PUT":
+            current["access_control_list"] = copy.deepcopy(request.body.get("access_control_list", []))
+        else:
+            current["access_control_list"] += copy.deepcopy(request.body.get("access_control_list", []))
+        return {"object_id": f"/{object_path}", "access_control_list": copy.deepcopy(current["access_control_list"])}
+
+    # DBFS
+
+    @route("POST", "/api/2.0/dbfs/create")
+    def dbfs_create(self, request: FakeRequest):
+        handle = self.state.next_id()
+        self.state.dbfs_handles[handle] = {"path": request.body["path"], "data": ""}
+        return {"handle": handle}
+
+    @route("POST", "/api/2.0/dbfs/add-block")
+    def dbfs_add_block(self, request: FakeRequest):
+        self.state.dbfs_handles[request.body["handle"]]["data"] += request.body.get("data", "")
+        return {}
+
+    @route("POST", "/api/2.0/dbfs/close")
+    def dbfs_close(self, request: FakeRequest):
+        handle = self.state.dbfs_handles.pop(request.body["handle"])
+        self.state.dbfs_files[handle["path"]] = handle["data"]
+        return {}
+
+    @route("POST", "/api/2.0/dbfs/delete")
+    def dbfs_delete(self, request: FakeRequest):
+        self.state.dbfs_files.pop(request.body["path"], None)
+        return {}
+
+    # Unity catalog
+
+    def _uc_collection(self, request: FakeRequest) -> Tuple[str, Dict[str, dict]]:
+        collection = request.path_params["collection"]
+        return (
+            collection,
+            {
+                "catalogs": self.state.catalogs,
+                "schemas": self.state.schemas,
+                "volumes": self.state.volumes,
+                "metastores": self.state.metastores,
+                "storage-credentials": self.state.storage_credentials,
+                "external-locations": self.state.external_locations,
+            }[collection],
+        )
+
+    @route(
+        "POST", "/api/2.1/unity-catalog/(?P<collection>catalogs|schemas|volumes|storage-credentials|external-locations)"
+    )
+    def uc_create(self, request: FakeRequest):
+        collection, items = self._uc_collection(request)
+        item = dict(request.body)
+        if collection == "schemas":
+            item["full_name"] = f"{item['catalog_name']}.{item['name']}"
+        elif collection == "volumes":
+            item["full_name"] = f"{item['catalog_name']}.{item['schema_name']}.{item['name']}"
+            item["volume_id"] = str(uuid.uuid4())
+        else:
+            item["full_name"] = item["name"]
+        if item["full_name"] in items:
+            raise already_exists(f"{collection} {item['full_name']} already exists")
+        item["id"] = item.get("volume_id", str(uuid.uuid4()))
+        items[item["full_name"]] = item
+        return copy.deepcopy(item)
+
+    @route("POST", "/api/2.1/unity-catalog/(?P<collection>metastores)")
+    def uc_metastore_create(self, request: FakeRequest):
+        metastore_id = str(uuid.uuid4())
+        item = {**request.body, "metastore_id": metastore_id, "global_metastore_id": f"aws:eu-west-1:{metastore_id}"}
+        self.state.metastores[metastore_id] = item
+        return copy.deepcopy(item)
+
+    @route(
+        "GET",
+        "/api/2.1/unity-catalog/(?P<collection>catalogs|schemas|volumes|metastores|storage-credentials|external-locations)",
+    )
+    def uc_list(self, request: FakeRequest):
+        collection, items = self._uc_collection(request)
+        values = list(items.values())
+        for key in ("catalog_name", "schema_name"):
+            if request.arg(key) is not None:
+                values = [v for v in values if v.get(key) == request.arg(key)]
+        # without max_results everything is returned in one page, like the unity catalog api does
+        page_size = request.int_arg("max_results") or (
+            self.default_page_size if request.arg("page_token") else max(len(values), 1)
+        )
+        page, next_token = paginate(values, request.arg("page_token"), page_size)
+        response: Dict[str, Any] = {collection.replace("-", "_"): copy.deepcopy(page)}
+        if next_token is not None:
+            response["next_page_token"] = next_token
+        return response
+
+    def _uc_item(self, request: FakeRequest) -> dict:
+        collection, items = self._uc_collection(request)
+        name = request.path_params["name"]
+        if name not in items:
+            raise not_found(f"{collection} {name} does not exist")
+        return items[name]
+
+    uc_item_pattern = (
+        "/api/2.1/unity-catalog/(?P<collection>catalogs|schemas|volumes|metastores|storage-credentials"
+        "|external-locations)/(?P<name>[^/]+)"
+    )
+
+    @route("GET", uc_item_pattern)
+    def uc_get(self, request: FakeRequest):
+        return copy.deepcopy(self._uc_item(request))
+
+    @route("PATCH", uc_item_pattern)
+    def uc_update(self, request: FakeRequest):
+        item = self._uc_item(request)
+        item.update(request.body)
+        return copy.deepcopy(item)
+
+    @route("DELETE", uc_item_pattern)
+    def uc_delete(self, request: FakeRequest):
+        self._uc_item(request)
+        del self._uc_collection(request)[1][request.path_params["name"]]
+        return {}
+
+    @route("(PUT|DELETE)", "/api/2.1/unity-catalog/workspaces/(?P<workspace_id>[^/]+)/metastore")
+    def uc_metastore_assignment(self, request: FakeRequest):
+        if request.method == "PUT":
+            self.state.metastore_assignments[request.path_params["workspace_id"]] = dict(request.body)
+        else:
+            self.state.metastore_assignments.pop(request.path_params["workspace_id"], None)
+        return {}
+
+    @route("GET", "/api/2.1/unity-catalog/permissions/(?P<type>[^/]+)/(?P<name>[^/]+)")
+    def uc_permissions_get(self, request: FakeRequest):
+        grants = self.state.grants.get(f"{request.path_params['type']}/{request.path_params['name']}", {})
+        return {
+            "privilege_assignments": [
+                {"principal": principal, "privileges": list(privileges)}
+                for principal, privileges in grants.items()
+                if privileges
+            ]
+        }
+
+    @route("PATCH", "/api/2.1/unity-catalog/permissions/(?P<type>[^/]+)/(?P<name>[^/]+)")
+    def uc_permissions_update(self, request: FakeRequest):
+        grants = self.state.grants.setdefault(f"{request.path_params['type']}/{request.path_params['name']}", {})
+        for change in request.body.get("changes", []):
+            privileges = grants.setdefault(change["principal"], [])
+            privileges.extend(p for p in change.get("add") or [] if p not in privileges)
+            grants[change["principal"]] = [p for p in privileges if p not in (change.get("remove") or [])]
+        return self.uc_permissions_get(request)
+
+    # MLflow
+
+    def _get_experiment(self, request: FakeRequest) -> dict:
+        experiment_id = request.arg("experiment_id")
+        if experiment_id not in self.state.experiments:
+            raise not_found(f"Experiment {experiment_id} does not exist")
+        return self.state.experiments[experiment_id]
+
+    @route("POST", "/api/2.0/mlflow/experiments/create")
+    def experiment_create(self, request: FakeRequest):
+        experiment_id = str(self.state.next_id())
+        self.state.experiments[experiment_id] = {
+            **request.body,
+            "experiment_id": experiment_id,
+            "lifecycle_stage": "active",
+        }
+        return {"experiment_id": experiment_id}
+
+    @route("GET", "/api/2.0/mlflow/experiments/get")
+    def experiment_get(self, request: FakeRequest):
+        return {"experiment": copy.deepcopy(self._get_experiment(request))}
+
+    @route("POST", "/api/2.0/mlflow/experiments/update")
+    def experiment_update(self, request: FakeRequest):
+        self._get_experiment(request)["name"] = request.body["new_name"]
+        return {}
+
+    @route("POST", "/api/2.0/mlflow/experiments/set-experiment-tag")
+    def experiment_set_tag(self, request: FakeRequest):
+        tags = self._get_experiment(request).setdefault("tags", [])
+        tags[:] = [t for t in tags if t["key"] != request.body["key"]] + [
+            {"key": request.body["key"], "value": request.body["value"]}
+        ]
+        return {}
+
+    @route("POST", "/api/2.0/mlflow/experiments/delete")
+    def experiment_delete(self, request: FakeRequest):
+        del self.state.experiments[self._get_experiment(request)["experiment_id"]]
+        return {}
+
+    def _get_registered_model(self, request: FakeRequest) -> dict:
+        name = request.arg("name")
+        if name not in self.state.registered_models:
+            raise not_found(f"Registered Model with name={name} not found")
+        return self.state.registered_models[name]
+
+    @route("POST", "/api/2.0/mlflow/registered-models/create")
+    def registered_model_create(self, request: FakeRequest):
+        model = {**request.body, "id": uuid.uuid4().hex}
+        self.state.registered_models[model["name"]] = model
+        return {"registered_model": copy.deepcopy(model)}
+
+    @route("GET", "/api/2.0/mlflow/databricks/registered-models/get")
+    def registered_model_get(self, request: FakeRequest):
+        return {"registered_model_databricks": copy.deepcopy(self._get_registered_model(request))}
+
+    @route("PATCH", "/api/2.0/mlflow/registered-models/update")
+    def registered_model_update(self, request: FakeRequest):
+        self._get_registered_model(request).update(request.body)
+        return {}
+
+    @route("POST", "/api/2.0/mlflow/registered-models/set-tag")
+    def registered_model_set_tag(self, request: FakeRequest):
+        tags = self._get_registered_model(request).setdefault("tags", [])
+        tags[:] = [t for t in tags if t["key"] != request.body["key"]] + [
+            {"key": request.body["key"], "value": request.body["value"]}
+        ]
+        return {}
+
+    @route("DELETE", "/api/2.0/mlflow/registered-models/delete-tag")
+    def registered_model_delete_tag(self, request: FakeRequest):
+        model = self._get_registered_model(request)
+        model["tags"] = [t for t in model.get("tags", []) if t["key"] != request.arg("key")]
+        return {}
+
+    @route("DELETE", "/api/2.0/mlflow/registered-models/delete")
+    def registered_model_delete(self, request: FakeRequest):
+        del self.state.registered_models[self._get_registered_model(request)["name"]]
+        return {}
+
+    # Accounts
+
+    def _account_collection(self, request: FakeRequest) -> Dict[Any, dict]:
+        return {
+            "workspaces": self.state.workspaces,
+            "credentials": self.state.credentials,
+            "storage-configurations": self.state.storage_configurations,
+            "networks": self.state.networks,
+        }[request.path_params["collection"]]
+
+    account_pattern = "/api/2.0/accounts/[^/]+/(?P<collection>workspaces|credentials|storage-configurations|networks)"
+    account_id_fields = {
+        "workspaces": "workspace_id",
+        "credentials": "credentials_id",
+        "storage-configurations": "storage_configuration_id",
+        "networks": "network_id",
+    }
+
+    def _refresh_workspace(self, workspace: dict):
+        if workspace["workspace_status"] == "PROVISIONING":
+            if time.time() - workspace["creation_time"] / 1000 >= self.state.workspace_provisioning_seconds:
+                workspace["workspace_status"] = "RUNNING"
+
+    @route("POST", account_pattern)
+    def account_create(self, request: FakeRequest):
+        collection = request.path_params["collection"]
+        id_field = self.account_id_fields[collection]
+        item = {**request.body, "account_id": self.state.account_id, "creation_time": int(time.time() * 1000)}
+        if collection == "workspaces":
+            item[id_field] = self.state.next_id()
+            item["deployment_name"] = item.get("deployment_name") or f"dbc-{uuid.uuid4().hex[:8]}"
+            item["workspace_status"] = "PROVISIONING"
+            item["workspace_status_message"] = "Workspace is being provisioned"
+        else:
+            item[id_field] = str(uuid.uuid4())
+        if collection == "credentials":
+            item["aws_credentials"]["sts_role"]["external_id"] = self.state.account_id
+        self._account_collection(request)[item[id_field]] = item
+        return copy.deepcopy(item)
+
+    @route("GET", account_pattern)
+    def account_list(self, request: FakeRequest):
+        items = list(self._account_collection(request).values())
+        if request.path_params["collection"] == "workspaces":
+            for workspace in items:
+                self._refresh_workspace(workspace)
+        # these account api's return a plain json list
+        return copy.deepcopy(items)
+
+    def _account_item(self, request: FakeRequest) -> dict:
+        items = self._account_collection(request)
+        item_id = request.path_params["id"]
+        key: Any = int(item_id) if request.path_params["collection"] == "workspaces" and item_id.isdigit() else item_id
+        if key not in items:
+            raise not_found(f"{request.path_params['collection']} {item_id} does not exist")
+        return items[key]
+
+    @route("GET", account_pattern + "/(?P<id>[^/]+)")
+    def account_get(self, request: FakeRequest):
+        item = self._account_item(request)
+        if request.path_params["collection"] == "workspaces":
+            self._refresh_workspace(item)
+        return copy.deepcopy(item)
+
+    @route("PATCH", account_pattern + "/(?P<id>[^/]+)")
+    def account_update(self, request: FakeRequest):
+        self._account_item(request).update({k: v for k, v in request.body.items() if v is not None})
+        return {}
+
+    @route("DELETE", account_pattern + "/(?P<id>[^/]+)")
+    def account_delete(self, request: FakeRequest):
+        id_field = self.account_id_fields[request.path_params["collection"]]
+        del self._account_collection(request)[self._account_item(request)[id_field]]
+        return {}
@@ -0,0 +1,287 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from pydantic import BaseModel
+
+from tests.fake_databricks.api import ApiError, FakeDatabricksApi, FakeRequest
+
+
+class LatencyProfile(BaseModel):
+    """Latency added to every matching response, in milliseconds"""
+
+    distribution: str = "fixed"  # fixed, uniform, normal or lognormal
+    mean_ms: float = 0.0
+    stddev_ms: float = 0.0
+    min_ms: float = 0.0
+    max_ms: Optional[float] = None
+    path_pattern: str = ".*"
+
+    def sample(self, rng: random.Random) -> float:
+        """Samples a latency in seconds"""
+        if self.distribution == "fixed":
+            value = self.mean_ms
+        elif self.distribution == "uniform":
+            value = rng.uniform(self.min_ms, self.max_ms if self.max_ms is not None else self.mean_ms * 2)
+        elif self.distribution == "normal":
+            value = rng.gauss(self.mean_ms, self.stddev_ms)
+        elif self.distribution == "lognormal":
+            # parameterised on the mean and stddev of the resulting distribution
+            variance = self.stddev_ms**2
+            mean = max(self.mean_ms, 1e-6)
+            sigma2 = math.log(1 + variance / mean**2)
+            mu = math.log(mean) - sigma2 / 2
+            value = rng.lognormvariate(mu, sigma2**0.5)
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+        value = max(self.min_ms, value)
+        if self.max_ms is not None:
+            value = min(self.max_ms, value)
+        return value / 1000
+
+
+class FaultRule(BaseModel):
+    """Injects error responses for requests matching method and path"""
+
+    status_code: int = 503
+    path_pattern: str = ".*"
+    method: Optional[str] = None
+    probability: float = 1.0
+    # only inject for the first N matching requests, None means no limit
+    count: Optional[int] = None
+    retry_after: Optional[int] = None
+    error_code: Optional[str] = None
+
+
+class RateLimit(BaseModel):
+    """Token bucket limiting the requests per second, exceeding requests get a 429"""
+
+    requests_per_second: float
+    burst: int = 1
+    retry_after: Optional[int] = 1
+
+
+class RequestRecord(BaseModel):
+    method: str
+    path: str
+    status_code: int
+    request_bytes: int
+    response_bytes: int
+    latency_seconds: float
+    started_at: float
+    injected: bool = False
+
+
+class _TokenBucket:
+    def __init__(self, rate_limit: RateLimit):
+        self.rate_limit = rate_limit
+        self.tokens = float(rate_limit.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                float(self.rate_limit.burst), self.tokens + (now - self.updated) * self.rate_limit.requests_per_second
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class FakeDatabricksServer:
+    """
+    Local stand-in for the Databricks workspace and account REST api's, backed by in memory state.
+
+    Use as context manager, the base url is available as `url` and can be used as workspace url and as
+    accounts base url. Latency, error injection and rate limiting are configurable and every request is recorded
+    for call counting.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[List[LatencyProfile]] = None,
+        faults: Optional[List[FaultRule]] = None,
+        rate_limit: Optional[RateLimit] = None,
+        default_page_size: int = 100,
+        seed: Optional[int] = None,
+        account_id: str = "fake-account-id",
+    ):
+        self.latency = latency or []
+        self.faults = faults or []
+        self.rate_limit = rate_limit
+        self.api = FakeDatabricksApi(account_id=account_id, default_page_size=default_page_size)
+        self.records: List[RequestRecord] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fault_counts: Dict[int, int] = {}
+        self._bucket = _TokenBucket(rate_limit) if rate_limit is not None else None
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def state(self):
+        return self.api.state
+
+    @property
+    def url(self) -> str:
+        if self._httpd is None:
+            raise RuntimeError("Server is not started")
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeDatabricksServer":
+        server = self
+
+        class Handler(_RequestHandler):
+            fake = server
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeDatabricksServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def reset_records(self):
+        with self._lock:
+            self.records = []
+
+    def call_count(self, method: Optional[str] = None, path: Optional[str] = None) -> int:
+        """Counts recorded requests, path is matched as a regex against the request path"""
+        return len(
+            [
+                r
+                for r in self.records
+                if (method is None or r.method == method) and (path is None or re.search(path, r.path))
+            ]
+        )
+
+    def _sample_latency(self, path: str) -> float:
+        with self._lock:
+            return sum(p.sample(self._rng) for p in self.latency if re.search(p.path_pattern, path))
+
+    def _injected_fault(self, method: str, path: str) -> Optional[FaultRule]:
+        with self._lock:
+            for i, rule in enumerate(self.faults):
+                if rule.method is not None and rule.method != method:
+                    continue
+                if not re.search(rule.path_pattern, path):
+                    continue
+                if rule.count is not None and self._fault_counts.get(i, 0) >= rule.count:
+                    continue
+                if self._rng.random() >= rule.probability:
+                    continue
+                self._fault_counts[i] = self._fault_counts.get(i, 0) + 1
+                return rule
+        return None
+
+    def handle(
+        self, method: str, raw_path: str, body: bytes, host: Optional[str] = None
+    ) -> Tuple[int, Dict[str, str], bytes, bool]:
+        """Handles a single request, returns status code, headers, body and whether the response was injected"""
+        parsed = urlparse(raw_path)
+        path = parsed.path.rstrip("/") or "/"
+        headers = {"Content-Type": "application/json"}
+
+        if self._bucket is not None and not self._bucket.try_acquire():
+            if self.rate_limit and self.rate_limit.retry_after is not None:
+                headers["Retry-After"] = str(self.rate_limit.retry_after)
+            payload = {"error_code": "REQUEST_LIMIT_EXCEEDED", "message": "Rate limit exceeded"}
+            return 429, headers, json.dumps(payload).encode(), True
+
+        fault = self._injected_fault(method, path)
+        if fault is not None:
+            if fault.retry_after is not None:
+                headers["Retry-After"] = str(fault.retry_after)
+            error_code = fault.error_code or (
+                "REQUEST_LIMIT_EXCEEDED" if fault.status_code == 429 else "INTERNAL_ERROR"
+            )
+            payload = {"error_code": error_code, "message": f"Injected {fault.status_code}"}
+            return fault.status_code, headers, json.dumps(payload).encode(), True
+
+        try:
+            parsed_body = json.loads(body) if body else {}
+        except ValueError:
+            parsed_body = {}
+        request = FakeRequest(
+            method=method,
+            path=path,
+            query=parse_qs(parsed.query),
+            body=parsed_body or {},
+            base_url=f"http://{host}" if host else self.url,
+        )
+        try:
+            status, response = self.api.dispatch(request)
+        except ApiError as e:
+            status, response = e.status_code, {"error_code": e.error_code, "message": e.message}
+        return status, headers, json.dumps(response).encode(), False
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    fake: FakeDatabricksServer
+    protocol_version = "HTTP/1.1"
+    # write headers and body in one go, otherwise keep-alive clients see delayed ack stalls of ~40ms per request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        started_at = time.time()
+        start = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, headers, payload, injected = self.fake.handle(self.command, self.path, body, self.headers.get("Host"))
+
+        delay = self.fake._sample_latency(urlparse(self.path).path)
+        if delay > 0:
+            time.sleep(delay)
+
+        # recorded before the response is written, so the record is there as soon as the client has its response
+        record = RequestRecord(
+            method=self.command,
+            path=urlparse(self.path).path,
+            status_code=status,
+            request_bytes=length,
+            response_bytes=len(payload),
+            latency_seconds=time.perf_counter() - start,
+            started_at=started_at,
+            injected=injected,
+        )
+        with self.fake._lock:
+            self.fake.records.append(record)
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_PATCH = _handle
+    do_DELETE = _handle
@@ -0,0 +1,130 @@
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from databricks_cdk.jobs.job_status import STATUS_DEADLINE_MARGIN_SECONDS, handler
+from tests.fake_databricks import FakeDatabricksServer
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    return {
+        "databricks_cdk.jobs.job_status.WAIT_MIN_DELAY_SECONDS": 0.05,
+        "databricks_cdk.jobs.job_status.WAIT_MAX_DELAY_SECONDS": 0.1,
+    }
+
+
+def add_run(server: FakeDatabricksServer, **fields) -> int:
+    job_id = server.state.add_job({"name": "job", "tasks": []})["job_id"]
+    return server.state.add_run(job_id, [{"task_key": "a"}], **fields)["run_id"]
+
+
+def test_job_status(fake_server, lambda_context):
+    run_id = add_run(fake_server, frozen=True)
+
+    response = handler({"workspace_url": fake_server.url, "run_id": run_id}, lambda_context(60))
+
+    assert response["state"]["life_cycle_state"] == "PENDING"
+    assert "still_running" not in response
+
+
+def test_job_status_waits_until_terminated(fake_server, lambda_context):
+    fake_server.state.run_pending_seconds = 0.1
+    fake_server.state.run_running_seconds = 0.3
+    run_id = add_run(fake_server)
+
+    response = handler({"workspace_url": fake_server.url, "run_id": run_id, "wait": True}, lambda_context(60))
+
+    assert response["state"]["life_cycle_state"] == "TERMINATED"
+    assert response["still_running"] is False
+    assert 2 < fake_server.call_count("GET", "/api/2.1/jobs/runs/get") < 10
+
+
+def test_job_status_waits_for_state(fake_server, lambda_context):
+    fake_server.state.run_pending_seconds = 0.2
+    fake_server.state.run_running_seconds = 60
+    run_id = add_run(fake_server)
+    event = {"workspace_url": fake_server.url, "run_id": run_id, "wait": True, "wait_for_states": ["RUNNING"]}
+
+    response = handler(event, lambda_context(60))
+
+    assert response["state"]["life_cycle_state"] == "RUNNING"
+    assert response["still_running"] is False
+
+
+def test_job_status_returns_before_deadline(fake_server, lambda_context):
+    run_id = add_run(fake_server, frozen=True)
+
+    start = time.monotonic()
+    response = handler({"workspace_url": fake_server.url, "run_id": run_id, "wait": True}, lambda_context(3.5))
+    assert response["still_running"] is True
+    assert 0.3 < time.monotonic() - start < 1
+
+    event = {"workspace_url": fake_server.url, "run_id": run_id, "wait": True, "max_wait_seconds": 0.2}
+    assert handler(event, None)["still_running"] is True
+
+
+def test_job_status_of_many_runs(fake_server, lambda_context):
+    run_ids = [add_run(fake_server, frozen=True) for _ in range(5)]
+    fake_server.state.runs[run_ids[0]]["state"] = {"life_cycle_state": "TERMINATED", "result_state": "FAILED"}
+    event = {"workspace_url": fake_server.url, "run_ids": run_ids + [999999]}
+
+    response = handler(event, lambda_context(60))
+
+    assert list(response["runs"]) == [str(r) for r in run_ids + [999999]]
+    assert response["runs"][str(run_ids[0])]["result_state"] == "FAILED"
+    assert response["runs"]["999999"]["error"] is not None
+    assert response["counts"] == {"TERMINATED": 1, "PENDING": 4, "ERROR": 1}
+    assert response["all_terminal"] is False and response["any_failed"] is True
+
+
+def test_job_status_of_many_runs_returns_partial_status_at_deadline(fake_server, lambda_context):
+    run_ids = [add_run(fake_server, frozen=True) for _ in range(40)]
+    event = {"workspace_url": fake_server.url, "run_ids": run_ids, "max_concurrency": 4}
+
+    start = time.monotonic()
+    with patch.dict("databricks_cdk.utils._host_rate_limiters", clear=True), patch(
+        "databricks_cdk.jobs.job_status.STATUS_REQUESTS_PER_SECOND", 5
+    ):
+        response = handler(event, lambda_context(STATUS_DEADLINE_MARGIN_SECONDS + 2))
+
+    assert time.monotonic() - start < 2
+    assert response["partial"] is True
+    assert 0 < response["counts"]["PENDING"] < 40
+    assert response["counts"]["PENDING"] + response["counts"]["NOT_FETCHED"] == 40
+
+
+def test_job_status_waits_for_many_runs(fake_server, lambda_context):
+    fake_server.state.run_running_seconds = 0.2
+    run_ids = [add_run(fake_server) for _ in range(3)]
+
+    response = handler({"workspace_url": fake_server.url, "run_ids": run_ids, "wait": True}, lambda_context(60))
+
+    assert response["all_terminal"] is True and response["any_failed"] is False
+    assert response["counts"] == {"TERMINATED": 3}
+    assert response["still_running"] is False
+
+
+def test_job_status_needs_run_id_or_run_ids():
+    with pytest.raises(ValueError):
+        handler({"workspace_url": "https://workspace"}, None)
+
+
+def test_job_status_projection(fake_server, tmp_path, lambda_context):
+    run_id = add_run(fake_server, frozen=True)
+    event = {
+        "workspace_url": fake_server.url,
+        "run_id": run_id,
+        "profile": "minimal",
+        "fields": ["tasks[*].task_key"],
+        "full_response_destination": str(tmp_path),
+    }
+
+    response = handler(event, lambda_context(60))
+
+    assert response["tasks"] == [{"task_key": "a"}]
+    assert "start_time" in response and "depends_on" not in response["tasks"][0]
+    with open(response["full_response_uri"]) as f:
+        assert json.load(f)["tasks"][0]["depends_on"] == []
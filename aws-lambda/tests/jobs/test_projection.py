@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from databricks_cdk.jobs.projection import parse_path, project, project_run
+from databricks_cdk.jobs.storage import store_json, store_object
+
+RUN = {
+    "job_id": 1,
+    "run_id": 2,
+    "state": {"life_cycle_state": "TERMINATED", "result_state": "FAILED", "state_message": "x" * 5000},
+    "cluster_spec": {"new_cluster": {"spark_version": "13.3.x-scala2.12"}},
+    "tasks": [
+        {"task_key": "a", "run_id": 3, "state": {"life_cycle_state": "TERMINATED"}, "cluster_instance": {}},
+        {"task_key": "b", "run_id": 4, "state": {"life_cycle_state": "SKIPPED"}, "depends_on": [{"task_key": "a"}]},
+    ],
+}
+
+
+def test_parse_path():
+    assert parse_path("tasks[*].state.life_cycle_state") == ["tasks", "*", "state", "life_cycle_state"]
+    assert parse_path("run_id") == ["run_id"]
+
+
+def test_project():
+    assert project(RUN, ["run_id", "state.result_state", "tasks[*].task_key", "tasks[*].depends_on", "missing"]) == {
+        "run_id": 2,
+        "state": {"result_state": "FAILED"},
+        "tasks": [{"task_key": "a"}, {"task_key": "b", "depends_on": [{"task_key": "a"}]}],
+    }
+
+
+def test_project_run_profiles():
+    tasks = project_run(RUN, profile="tasks")
+    assert "cluster_spec" not in tasks
+    assert tasks["tasks"][1] == {
+        "task_key": "b",
+        "run_id": 4,
+        "state": {"life_cycle_state": "SKIPPED"},
+        "depends_on": [{"task_key": "a"}],
+    }
+    assert project_run(RUN) == RUN
+    with pytest.raises(ValueError):
+        project_run(RUN, profile="unknown")
+
+
+def test_project_run_bounds_size():
+    large = {**RUN, "tasks": [{**RUN["tasks"][0], "task_key": str(i)} for i in range(5000)]}
+
+    projected = project_run(large, profile="tasks", max_bytes=10_000)
+
+    assert projected["truncated"] is True
+    assert "tasks" not in projected
+    assert len(json.dumps(projected)) < 2000
+
+
+def test_store_object(tmp_path):
+    stored = store_object(str(tmp_path), "logs/a.txt", ["abc", b"defgh", "ijk"], max_bytes=6)
+
+    assert stored.truncated and stored.truncated_bytes == 5
+    assert (tmp_path / "logs" / "a.txt").read_text() == "abcdef\n[truncated 5 bytes]\n"
+    assert stored.size_bytes == len((tmp_path / "logs" / "a.txt").read_bytes())
+
+    stored = store_json(str(tmp_path), "run.json", RUN)
+    assert json.loads((tmp_path / "run.json").read_text()) == RUN and not stored.truncated
@@ -0,0 +1,54 @@
+import pytest
+
+from databricks_cdk.jobs.repair_run import RunNotRepairableError, handler
+from tests.fake_databricks import FakeDatabricksServer
+
+
+def add_failed_run(server: FakeDatabricksServer) -> dict:
+    tasks = [
+        {"task_key": "a"},
+        {"task_key": "b", "depends_on": [{"task_key": "a"}]},
+        {"task_key": "c", "depends_on": [{"task_key": "b"}]},
+        {"task_key": "d"},
+    ]
+    job_id = server.state.add_job({"name": "job", "tasks": tasks})["job_id"]
+    run = server.state.add_run(job_id, tasks, frozen=True)
+    run["state"] = {"life_cycle_state": "TERMINATED", "result_state": "FAILED"}
+    results = {"a": "SUCCESS", "b": "FAILED", "c": "UPSTREAM_FAILED", "d": "SUCCESS"}
+    for task in run["tasks"]:
+        task["state"] = {"life_cycle_state": "TERMINATED", "result_state": results[task["task_key"]]}
+    return run
+
+
+def test_repair_run(fake_server):
+    run = add_failed_run(fake_server)
+    task_run_ids = {t["task_key"]: t["run_id"] for t in run["tasks"]}
+
+    response = handler({"workspace_url": fake_server.url, "run_id": run["run_id"]}, None)
+
+    assert response["rerun_tasks"] == ["b", "c"]
+    assert response["repair_id"] == run["repair_history"][-1]["id"]
+    new_task_run_ids = {t["task_key"]: t["run_id"] for t in run["tasks"]}
+    assert [k for k in task_run_ids if task_run_ids[k] != new_task_run_ids[k]] == ["b", "c"]
+
+
+def test_repair_run_twice_uses_latest_repair(fake_server):
+    run = add_failed_run(fake_server)
+    handler({"workspace_url": fake_server.url, "run_id": run["run_id"]}, None)
+    run["state"] = {"life_cycle_state": "TERMINATED", "result_state": "FAILED"}
+
+    event = {"workspace_url": fake_server.url, "run_id": run["run_id"], "rerun_tasks": ["a"]}
+    event["rerun_dependent_tasks"] = True
+    response = handler(event, None)
+
+    assert response["rerun_tasks"] == ["a"]
+    assert len(run["repair_history"]) == 3
+    assert len(run["repair_history"][-1]["task_run_ids"]) == 3
+
+
+def test_repair_active_run(fake_server):
+    run = add_failed_run(fake_server)
+    run["state"] = {"life_cycle_state": "RUNNING"}
+
+    with pytest.raises(RunNotRepairableError):
+        handler({"workspace_url": fake_server.url, "run_id": run["run_id"]}, None)
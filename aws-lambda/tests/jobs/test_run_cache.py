@@ -0,0 +1,237 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from databricks_cdk.jobs.job_status import handler as job_status_handler
+from databricks_cdk.jobs.repair_run import handler as repair_run_handler
+from databricks_cdk.jobs.run_cache import CachedRun, DynamoDbRunCacheBackend, InMemoryRunCacheBackend, RunStatusCache
+
+URL = "https://localhost/api/2.1/jobs/runs/get"
+
+
+class CountingFetch:
+    def __init__(self, life_cycle_state: str = "RUNNING", delay: float = 0.0):
+        self.life_cycle_state = life_cycle_state
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> dict:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {"run_id": 1, "state": {"life_cycle_state": self.life_cycle_state}}
+
+
+def test_concurrent_lookups_share_one_fetch():
+    cache = RunStatusCache(ttl_seconds=0)
+    fetch = CountingFetch(delay=0.2)
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        runs = list(executor.map(lambda _: cache.get_run(URL, 1, fetch), range(10)))
+
+    assert fetch.calls == 1
+    assert all(run["state"]["life_cycle_state"] == "RUNNING" for run in runs)
+
+
+def test_fetch_error_reaches_all_waiters():
+    cache = RunStatusCache(ttl_seconds=0)
+
+    def fetch():
+        time.sleep(0.1)
+        raise RuntimeError("unavailable")
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(cache.get_run, URL, 1, fetch) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result()
+    assert cache.get_run(URL, 1, CountingFetch()) is not None
+
+
+def test_running_runs_expire():
+    cache = RunStatusCache(ttl_seconds=0.1)
+    fetch = CountingFetch()
+
+    cache.get_run(URL, 1, fetch)
+    cache.get_run(URL, 1, fetch)
+    assert fetch.calls == 1
+
+    time.sleep(0.15)
+    cache.get_run(URL, 1, fetch)
+    assert fetch.calls == 2
+
+
+def test_terminal_runs_are_kept():
+    cache = RunStatusCache(ttl_seconds=0)
+    fetch = CountingFetch("TERMINATED")
+
+    for _ in range(3):
+        cache.get_run(URL, 1, fetch)
+
+    assert fetch.calls == 1
+    cache.invalidate(URL, 1)
+    cache.get_run(URL, 1, fetch)
+    assert fetch.calls == 2
+
+
+def test_terminal_runs_expire_locally_without_backend():
+    cache = RunStatusCache(ttl_seconds=0, local_terminal_ttl_seconds=0.1)
+    fetch = CountingFetch("TERMINATED")
+
+    cache.get_run(URL, 1, fetch)
+    cache.get_run(URL, 1, fetch)
+    assert fetch.calls == 1
+
+    time.sleep(0.15)
+    cache.get_run(URL, 1, fetch)
+    assert fetch.calls == 2
+
+
+def test_invalidate_reaches_other_containers():
+    backend = InMemoryRunCacheBackend()
+    status, repair = RunStatusCache(backend, ttl_seconds=60), RunStatusCache(backend, ttl_seconds=60)
+    fetch = CountingFetch("TERMINATED")
+    assert status.get_run(URL, 1, fetch, minimal=True)["state"]["life_cycle_state"] == "TERMINATED"
+    assert repair.get_run(URL, 1, fetch, minimal=True)["state"]["life_cycle_state"] == "TERMINATED"
+
+    fetch.life_cycle_state = "PENDING"
+    repair.invalidate(URL, 1)
+
+    assert status.get_run(URL, 1, fetch, minimal=True)["state"]["life_cycle_state"] == "PENDING"
+    assert fetch.calls == 2
+
+
+def test_containers_share_the_backend():
+    backend = InMemoryRunCacheBackend()
+    first, second = RunStatusCache(backend, ttl_seconds=60), RunStatusCache(backend, ttl_seconds=60)
+    fetch = CountingFetch()
+
+    first.get_run(URL, 1, fetch, minimal=True)
+    second.get_run(URL, 1, fetch, minimal=True)
+
+    assert fetch.calls == 1
+
+
+def test_container_waits_for_lease_holder():
+    backend = InMemoryRunCacheBackend()
+    first, second = RunStatusCache(backend, ttl_seconds=60), RunStatusCache(backend, ttl_seconds=60)
+    first_fetch, second_fetch = CountingFetch(delay=0.3), CountingFetch()
+
+    with patch("databricks_cdk.jobs.run_cache.LEASE_POLL_SECONDS", 0.01):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(first.get_run, URL, 1, first_fetch, True)
+            time.sleep(0.1)
+            run = executor.submit(second.get_run, URL, 1, second_fetch, True).result()
+
+    assert (first_fetch.calls, second_fetch.calls) == (1, 0)
+    assert run["state"]["life_cycle_state"] == "RUNNING"
+
+
+def test_expired_lease_is_taken_over():
+    backend = InMemoryRunCacheBackend()
+    assert backend.try_lease((URL, 1), 0.1)
+    fetch = CountingFetch()
+
+    with patch("databricks_cdk.jobs.run_cache.LEASE_SECONDS", 0.1), patch(
+        "databricks_cdk.jobs.run_cache.LEASE_POLL_SECONDS", 0.01
+    ):
+        RunStatusCache(backend, ttl_seconds=60).get_run(URL, 1, fetch, minimal=True)
+
+    assert fetch.calls == 1
+
+
+def test_whole_runs_skip_the_backend():
+    backend = InMemoryRunCacheBackend()
+    first, second = RunStatusCache(backend, ttl_seconds=60), RunStatusCache(backend, ttl_seconds=60)
+    run = {"run_id": 1, "state": {"life_cycle_state": "TERMINATED"}, "tasks": [{"task_key": "a"}]}
+    fetch = CountingFetch("TERMINATED")
+
+    assert first.get_run(URL, 1, lambda: run) == run
+    assert backend.get((URL, 1)).run == {"run_id": 1, "state": {"life_cycle_state": "TERMINATED"}}
+    assert first.get_run(URL, 1, fetch) == run
+    assert second.get_run(URL, 1, fetch, minimal=True) == backend.get((URL, 1)).run
+    assert fetch.calls == 0
+
+    second.get_run(URL, 1, fetch)
+    assert fetch.calls == 1
+
+
+@pytest.mark.parametrize("operation", ["get_item", "put_item", "update_item"])
+def test_dynamodb_errors_fall_back_to_databricks(operation):
+    backend = DynamoDbRunCacheBackend("runs")
+    backend.client = MagicMock()
+    backend.client.get_item.return_value = {}
+    getattr(backend.client, operation).side_effect = ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}}, "Operation"
+    )
+    fetch = CountingFetch()
+
+    run = RunStatusCache(backend, ttl_seconds=60).get_run(URL, 1, fetch, minimal=True)
+
+    assert run["state"]["life_cycle_state"] == "RUNNING"
+    assert fetch.calls == 1
+
+
+def test_dynamodb_skips_large_runs():
+    backend = DynamoDbRunCacheBackend("runs")
+    backend.client = MagicMock()
+    cached = CachedRun(run={"run_id": 1, "state": {"state_message": "x" * 400 * 1024}}, fetched_at=0, terminal=False)
+
+    backend.put((URL, 1), cached)
+
+    backend.client.put_item.assert_not_called()
+
+
+def test_dynamodb_lease_taken():
+    backend = DynamoDbRunCacheBackend("runs")
+    backend.client = MagicMock()
+    backend.client.update_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "taken"}}, "UpdateItem"
+    )
+
+    assert backend.try_lease((URL, 1), 5) is False
+
+
+def test_dynamodb_round_trip():
+    backend = DynamoDbRunCacheBackend("runs")
+    backend.client = MagicMock()
+    cache = RunStatusCache(backend, ttl_seconds=60)
+
+    cache.get_run(URL, 1, CountingFetch("TERMINATED"))
+
+    item = backend.client.put_item.call_args.kwargs["Item"]
+    assert item["cache_key"] == {"S": f"{URL}#1"}
+    assert item["terminal"] == {"BOOL": True}
+    backend.client.get_item.return_value = {"Item": item}
+    assert backend.get((URL, 1)).run["state"]["life_cycle_state"] == "TERMINATED"
+
+
+def test_job_status_polls_of_same_run_are_coalesced(fake_server, run_cache):
+    run_cache.ttl_seconds = 60
+    run = fake_server.state.add_run(None, [{"task_key": "a"}], frozen=True)
+    event = {"workspace_url": fake_server.url, "run_ids": [run["run_id"]] * 5}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(lambda _: job_status_handler(event, None), range(4)))
+
+    assert all(r["counts"] == {"PENDING": 5} for r in responses)
+    assert fake_server.call_count("GET", "/api/2.1/jobs/runs/get") == 1
+
+
+def test_repair_invalidates_terminal_run(fake_server, run_cache):
+    run_cache.ttl_seconds = 60
+    tasks = [{"task_key": "a"}]
+    run = fake_server.state.add_run(None, tasks, frozen=True)
+    run["state"] = {"life_cycle_state": "TERMINATED", "result_state": "FAILED"}
+    run["tasks"][0]["state"] = {"life_cycle_state": "TERMINATED", "result_state": "FAILED"}
+    event = {"workspace_url": fake_server.url, "run_id": run["run_id"]}
+    assert job_status_handler(event, None)["state"]["life_cycle_state"] == "TERMINATED"
+
+    repair_run_handler(event, None)
+
+    assert job_status_handler(event, None)["state"]["life_cycle_state"] != "TERMINATED"
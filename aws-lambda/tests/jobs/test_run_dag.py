@@ -0,0 +1,116 @@
+import pytest
+
+from databricks_cdk.jobs.run_dag import MAX_STATUS_ERRORS, InvalidDagError, handler
+from tests.fake_databricks import FakeDatabricksServer, FaultRule
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    return {"databricks_cdk.jobs.run_dag.POLL_MIN_DELAY_SECONDS": 0.01}
+
+
+def diamond_event(server: FakeDatabricksServer, **fields) -> dict:
+    job_ids = {key: server.state.add_job({"name": key})["job_id"] for key in "abcd"}
+    depends_on = {"a": [], "b": ["a"], "c": ["a"], "d": ["b", "c"]}
+    nodes = [{"key": k, "job_args": {"job_id": job_ids[k]}, "depends_on": depends_on[k]} for k in "abcd"]
+    return {"workspace_url": server.url, "nodes": nodes, **fields}
+
+
+def test_run_dag(fake_server):
+    response = handler(diamond_event(fake_server), None)
+
+    assert response["status"] == "SUCCESS"
+    assert response["still_running"] is False
+    runs = response["checkpoint"]["nodes"]
+    assert {k: r["status"] for k, r in runs.items()} == {k: "SUCCESS" for k in "abcd"}
+    assert runs["a"]["run_id"] < runs["b"]["run_id"] < runs["d"]["run_id"]
+    assert runs["a"]["run_id"] < runs["c"]["run_id"] < runs["d"]["run_id"]
+
+
+def test_run_dag_resumes_from_checkpoint(fake_server):
+    fake_server.state.run_pending_seconds = 3600
+    response = handler(diamond_event(fake_server, max_parallelism=1, max_wait_seconds=0), None)
+
+    assert response["still_running"] is True
+    assert {k: r["status"] for k, r in response["checkpoint"]["nodes"].items()} == {
+        "a": "RUNNING",
+        "b": "PENDING",
+        "c": "PENDING",
+        "d": "PENDING",
+    }
+
+    response = handler(response, None)
+    assert response["checkpoint"]["invocations"] == 2
+    assert fake_server.call_count("POST", "/api/2.1/jobs/run-now") == 1
+
+    fake_server.state.run_pending_seconds = 0
+    response = handler({**response, "max_wait_seconds": None}, None)
+    assert response["status"] == "SUCCESS"
+    assert fake_server.call_count("POST", "/api/2.1/jobs/run-now") == 4
+
+
+def test_run_dag_limits_parallelism(fake_server):
+    fake_server.state.run_pending_seconds = 3600
+    event = diamond_event(fake_server, max_parallelism=2, max_wait_seconds=0)
+    event["nodes"] += [{"key": "e", "job_args": {"job_id": event["nodes"][0]["job_args"]["job_id"]}}]
+
+    response = handler(event, None)
+
+    statuses = {k: r["status"] for k, r in response["checkpoint"]["nodes"].items()}
+    assert statuses == {"a": "RUNNING", "b": "PENDING", "c": "PENDING", "d": "PENDING", "e": "RUNNING"}
+
+
+def test_run_dag_skips_after_failure(fake_server):
+    fake_server.state.run_result_state = "FAILED"
+    response = handler(diamond_event(fake_server), None)
+
+    assert response["status"] == "FAILED"
+    statuses = {k: r["status"] for k, r in response["checkpoint"]["nodes"].items()}
+    assert statuses == {"a": "FAILED", "b": "SKIPPED", "c": "SKIPPED", "d": "SKIPPED"}
+    assert fake_server.call_count("POST", "/api/2.1/jobs/run-now") == 1
+
+
+def test_run_dag_submit_error(fake_server):
+    event = diamond_event(fake_server, fail_fast=False)
+    event["nodes"][1]["job_args"]["job_id"] = 12345
+
+    response = handler(event, None)
+
+    runs = response["checkpoint"]["nodes"]
+    assert response["status"] == "FAILED"
+    assert runs["b"]["status"] == "FAILED"
+    assert runs["b"]["error"] is not None
+    assert runs["c"]["status"] == "SUCCESS"
+    assert runs["d"]["status"] == "SKIPPED"
+
+
+@pytest.mark.parametrize("status_code", [404, 400])
+def test_run_dag_fails_node_without_status(fake_server, status_code):
+    fake_server.state.run_pending_seconds = 3600
+    event = diamond_event(fake_server, max_wait_seconds=0)
+    response = handler(event, None)
+    fake_server.faults.append(FaultRule(status_code=status_code, path_pattern="/runs/get"))
+
+    for _ in range(MAX_STATUS_ERRORS):
+        response = handler(response, None)
+        if not response["still_running"]:
+            break
+
+    runs = response["checkpoint"]["nodes"]
+    assert response["status"] == "FAILED"
+    assert runs["a"]["status"] == "FAILED" and runs["a"]["error"] is not None
+    assert response["checkpoint"]["invocations"] == (2 if status_code == 404 else 1 + MAX_STATUS_ERRORS)
+
+
+@pytest.mark.parametrize(
+    "nodes,message",
+    [
+        ([{"key": "a", "depends_on": ["b"]}, {"key": "b", "depends_on": ["a"]}], "dependency cycle"),
+        ([{"key": "a", "depends_on": ["x"]}], "unknown node 'x'"),
+        ([{"key": "a"}, {"key": "a"}], "used more than once"),
+    ],
+)
+def test_run_dag_invalid(nodes, message):
+    nodes = [{"job_args": {"job_id": 1}, **n} for n in nodes]
+    with pytest.raises(InvalidDagError, match=message):
+        handler({"workspace_url": "https://localhost", "nodes": nodes}, None)
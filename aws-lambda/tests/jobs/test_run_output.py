@@ -0,0 +1,71 @@
+import pytest
+
+from databricks_cdk.handler import handler
+from tests.fake_databricks import FakeDatabricksServer
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    return {"databricks_cdk.utils.HOST_REQUESTS_PER_SECOND": 1000}
+
+
+@pytest.fixture(scope="function", autouse=True)
+def lambda_method(monkeypatch):
+    monkeypatch.setenv("LAMBDA_METHOD", "run-output")
+
+
+def add_run(server: FakeDatabricksServer) -> dict:
+    job_id = server.state.add_job({"name": "job", "tasks": []})["job_id"]
+    run = server.state.add_run(job_id, [{"task_key": "a"}, {"task_key": "b"}, {"task_key": "c"}])
+    tasks = {t["task_key"]: t["run_id"] for t in run["tasks"]}
+    server.state.run_outputs[tasks["a"]] = {"notebook_output": {"result": "ok", "truncated": False}}
+    server.state.run_outputs[tasks["b"]] = {"logs": "line\n" * 10_000, "logs_truncated": False}
+    server.state.run_outputs[tasks["c"]] = {"error": "Failed", "error_trace": "Traceback"}
+    return run
+
+
+def test_run_output(fake_server, tmp_path):
+    run = add_run(fake_server)
+    event = {"workspace_url": fake_server.url, "run_id": run["run_id"], "destination": str(tmp_path)}
+    event["max_stored_bytes"] = 20_000
+
+    response = handler(event, None)
+
+    a, b, c = response["tasks"]
+    assert a["task_key"] == "a" and a["notebook_output"]["value"] == "ok"
+    assert b["logs"]["value"] is None and b["logs"]["size_bytes"] == 50_000 and b["logs"]["truncated"]
+    with open(b["logs"]["stored"]["uri"]) as f:
+        assert f.read().startswith("line\n") and b["logs"]["stored"]["truncated_bytes"] == 30_000
+    assert c["error"] == "Failed" and c["error_trace"]["value"] == "Traceback"
+
+
+def test_run_output_without_destination(fake_server):
+    run = add_run(fake_server)
+
+    response = handler({"workspace_url": fake_server.url, "run_id": run["run_id"], "max_inline_bytes": 100}, None)
+
+    logs = response["tasks"][1]["logs"]
+    assert logs["truncated"] and logs["stored"] is None
+    assert logs["value"].startswith("line\n" * 20) and "truncated 49900 bytes" in logs["value"]
+
+
+@pytest.mark.parametrize("destination", [False, True])
+def test_run_output_total_inline_budget(fake_server, tmp_path, destination):
+    job_id = fake_server.state.add_job({"name": "job", "tasks": []})["job_id"]
+    run = fake_server.state.add_run(job_id, [{"task_key": str(i)} for i in range(20)])
+    for task in run["tasks"]:
+        fake_server.state.run_outputs[task["run_id"]] = {"logs": "x" * 3000, "error_trace": "y" * 3000}
+    event = {"workspace_url": fake_server.url, "run_id": run["run_id"], "max_total_inline_bytes": 10_000}
+    if destination:
+        event["destination"] = str(tmp_path)
+
+    response = handler(event, None)
+
+    values = [t[k] for t in response["tasks"] for k in ("logs", "error_trace")]
+    inline = sum(len(v["value"]) for v in values if v["value"] is not None and not v["truncated"])
+    assert 9_000 <= inline <= 10_000
+    if destination:
+        assert sum(v["stored"] is not None for v in values) == 37
+    else:
+        assert all(len(v["value"]) < 3100 for v in values)
+        assert sum(v["truncated"] for v in values) == 37
@@ -0,0 +1,47 @@
+import pytest
+
+from databricks_cdk.jobs.submit_job import JobArgs, get_idempotency_token, handler
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    return {"databricks_cdk.utils.HOST_REQUESTS_PER_SECOND": 1000}
+
+
+def test_submit_single_job(fake_server):
+    job_id = fake_server.state.add_job({"name": "job", "tasks": []})["job_id"]
+
+    response = handler({"workspace_url": fake_server.url, "job_args": {"job_id": job_id}}, None)
+
+    assert response["run_id"] in fake_server.state.runs
+
+
+def test_submit_jobs(fake_server):
+    job_ids = [fake_server.state.add_job({"name": f"job-{i}", "tasks": []})["job_id"] for i in range(20)]
+    event = {
+        "workspace_url": fake_server.url,
+        "job_args": [{"job_id": job_id} for job_id in job_ids] + [{"job_id": 999999}],
+        "max_concurrency": 5,
+        "idempotency_seed": "execution-1",
+    }
+
+    response = handler(event, None)
+
+    assert response["submitted"] == 20 and response["failed"] == 1
+    assert [r["job_id"] for r in response["runs"]] == job_ids + [999999]
+    assert all(fake_server.state.runs[r["run_id"]]["job_id"] == r["job_id"] for r in response["runs"][:20])
+    assert response["runs"][20]["run_id"] is None
+    assert response["runs"][20]["error"].startswith("400")
+
+    # a retried invocation gets the same runs
+    assert handler(event, None)["runs"][:20] == response["runs"][:20]
+    assert len(fake_server.state.runs) == 20
+
+
+def test_get_idempotency_token():
+    args = JobArgs(job_id=1, notebook_params={"a": "1"})
+
+    assert get_idempotency_token(args, 0, "seed") == get_idempotency_token(args, 0, "seed")
+    assert get_idempotency_token(args, 0, "seed") != get_idempotency_token(args, 1, "seed")
+    assert get_idempotency_token(args, 0) != get_idempotency_token(args, 0)
+    assert get_idempotency_token(args.copy(update={"idempotency_token": "token"}), 0) == "token"
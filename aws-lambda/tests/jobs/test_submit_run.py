@@ -0,0 +1,56 @@
+import pytest
+
+from databricks_cdk.jobs.submit_run import SubmitRunEvent, get_submit_body, handler
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    return {
+        "databricks_cdk.jobs.job_status.WAIT_MIN_DELAY_SECONDS": 0.05,
+        "databricks_cdk.jobs.job_status.WAIT_MAX_DELAY_SECONDS": 0.1,
+    }
+
+
+def submit_event(url: str, **fields) -> dict:
+    return {
+        "workspace_url": url,
+        "run_name": "fix",
+        "tasks": [
+            {
+                "task_key": "a",
+                "notebook_task": {"notebook_path": "/fix"},
+                "new_cluster": {"spark_version": "13.3.x-scala2.12", "num_workers": 1, "aws_attributes": {}},
+            },
+            {"task_key": "b", "notebook_task": {"notebook_path": "/check"}, "depends_on": ["a"]},
+        ],
+        **fields,
+    }
+
+
+def test_get_submit_body():
+    event = SubmitRunEvent(**submit_event("https://workspace", idempotency_seed="execution-1"))
+
+    body = get_submit_body(event)
+
+    assert body["tasks"][1]["depends_on"] == [{"task_key": "a"}]
+    assert body["idempotency_token"] == get_submit_body(event)["idempotency_token"]
+    assert "wait" not in body and "workspace_url" not in body
+
+
+def test_submit_run(fake_server, lambda_context):
+    response = handler(submit_event(fake_server.url, idempotency_seed="execution-1"), lambda_context(60))
+
+    run = fake_server.state.runs[response["run_id"]]
+    assert run["run_name"] == "fix" and [t["task_key"] for t in run["tasks"]] == ["a", "b"]
+    assert handler(submit_event(fake_server.url, idempotency_seed="execution-1"), None) == response
+    assert len(fake_server.state.runs) == 1
+
+
+def test_submit_run_and_wait(fake_server, lambda_context):
+    fake_server.state.run_running_seconds = 0.2
+
+    response = handler(submit_event(fake_server.url, wait=True), lambda_context(60))
+
+    assert response["state"]["life_cycle_state"] == "TERMINATED"
+    assert response["still_running"] is False
+    assert "tasks" not in response
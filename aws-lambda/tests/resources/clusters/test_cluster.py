@@ -0,0 +1,124 @@
+from unittest.mock import patch
+
+import pytest
+
+from databricks_cdk.resources.clusters.cluster import (
+    AutoScale,
+    AwsAttributes,
+    Cluster,
+    ClusterProperties,
+    create_or_update_cluster,
+    get_cluster_changes,
+)
+
+WORKSPACE_URL = "https://dbc-test.cloud.databricks.com"
+
+CLUSTER = Cluster(
+    cluster_name="test",
+    spark_version="13.3.x-scala2.12",
+    num_workers=2,
+    node_type_id="m5.large",
+    spark_conf={"spark.a": "1", "spark.b": "2"},
+    custom_tags={"team": "data"},
+    aws_attributes=AwsAttributes(availability="SPOT_WITH_FALLBACK"),
+    idempotency_token="token",
+)
+
+# clusters/get response of CLUSTER, with the fields databricks adds
+CURRENT = {
+    "cluster_id": "1234-567890-abcdef",
+    "cluster_name": "test",
+    "spark_version": "13.3.x-scala2.12",
+    "num_workers": 2,
+    "node_type_id": "m5.large",
+    "driver_node_type_id": "m5.large",
+    "spark_conf": {"spark.b": "2", "spark.a": "1"},
+    "custom_tags": {"team": "data"},
+    "default_tags": {"Vendor": "Databricks", "ClusterName": "test"},
+    "aws_attributes": {"availability": "SPOT_WITH_FALLBACK", "zone_id": "auto", "first_on_demand": 1},
+    "autotermination_minutes": 120,
+    "enable_elastic_disk": True,
+    "state": "RUNNING",
+    "cluster_source": "API",
+}
+
+
+def test_get_cluster_changes_no_changes():
+    assert get_cluster_changes(CURRENT, CLUSTER) == {}
+
+
+def test_get_cluster_changes():
+    desired = CLUSTER.copy(
+        update={
+            "num_workers": 3,
+            "spark_conf": {"spark.a": "1"},
+            "aws_attributes": AwsAttributes(availability="ON_DEMAND"),
+            "init_scripts": [{"s3": {"destination": "s3://bucket/init.sh"}}],
+        }
+    )
+
+    changes = get_cluster_changes(CURRENT, desired)
+
+    assert sorted(changes) == ["aws_attributes", "init_scripts", "num_workers", "spark_conf"]
+    assert changes["num_workers"] == {"current": 2, "desired": 3}
+
+
+@pytest.mark.parametrize(
+    "field,current_value",
+    [
+        ("custom_tags", {"team": "data"}),
+        ("cluster_log_conf", {"s3": {"destination": "s3://logs"}}),
+        ("instance_pool_id", "pool"),
+        ("driver_instance_pool_id", "driver-pool"),
+        ("docker_image", {"url": "image"}),
+        ("data_security_mode", "SINGLE_USER"),
+    ],
+)
+def test_get_cluster_changes_removed_field(field, current_value):
+    current = {**CURRENT, field: current_value}
+    desired = CLUSTER.copy(update={field: None})
+
+    assert get_cluster_changes(current, desired) == {field: {"current": current_value, "desired": None}}
+
+
+def test_get_cluster_changes_ignores_server_filled_fields():
+    desired = CLUSTER.copy(update={"node_type_id": None})
+
+    assert get_cluster_changes(CURRENT, desired) == {}
+
+
+def test_get_cluster_changes_autoscale():
+    desired = CLUSTER.copy(update={"num_workers": None, "autoscale": AutoScale(min_workers=1, max_workers=4)})
+    current = {**CURRENT, "num_workers": 3, "autoscale": {"min_workers": 1, "max_workers": 4}}
+
+    assert get_cluster_changes(current, desired) == {}
+    assert list(get_cluster_changes(current, CLUSTER)) == ["num_workers", "autoscale"]
+
+
+@patch("databricks_cdk.resources.clusters.cluster.post_request")
+@patch("databricks_cdk.resources.clusters.cluster.get_cluster_by_id")
+def test_update_cluster_without_changes_does_not_edit(patched_get_cluster_by_id, patched_post_request):
+    patched_get_cluster_by_id.return_value = CURRENT
+
+    response = create_or_update_cluster(
+        ClusterProperties(workspace_url=WORKSPACE_URL, cluster=CLUSTER), CURRENT["cluster_id"]
+    )
+
+    assert response.physical_resource_id == CURRENT["cluster_id"]
+    assert response.changed_fields == []
+    patched_post_request.assert_not_called()
+
+
+@patch("databricks_cdk.resources.clusters.cluster.post_request")
+@patch("databricks_cdk.resources.clusters.cluster.get_cluster_by_id")
+def test_update_cluster_with_changes(patched_get_cluster_by_id, patched_post_request):
+    patched_get_cluster_by_id.return_value = CURRENT
+    cluster = CLUSTER.copy(update={"custom_tags": {"team": "platform"}})
+
+    response = create_or_update_cluster(
+        ClusterProperties(workspace_url=WORKSPACE_URL, cluster=cluster), CURRENT["cluster_id"]
+    )
+
+    assert response.changed_fields == ["custom_tags"]
+    assert patched_post_request.call_args.args[0] == f"{WORKSPACE_URL}/api/2.0/clusters/edit"
+    assert patched_post_request.call_args.kwargs["body"]["cluster_id"] == CURRENT["cluster_id"]
@@ -0,0 +1,162 @@
+from unittest.mock import patch
+
+import pytest
+
+from databricks_cdk.resources.clusters.cluster import (
+    Cluster,
+    ClusterProperties,
+    create_or_update_cluster,
+    delete_cluster,
+    get_cluster_by_name,
+)
+from databricks_cdk.resources.clusters.cluster_index import (
+    get_cluster_id_by_name,
+    get_cluster_index,
+    invalidate_cluster_index,
+)
+
+WORKSPACE_URL = "https://dbc-test.cloud.databricks.com"
+
+
+@pytest.fixture(autouse=True)
+def empty_cluster_index():
+    invalidate_cluster_index()
+    yield
+    invalidate_cluster_index()
+
+
+def pages(*clusters_per_page):
+    responses = []
+    for i, clusters in enumerate(clusters_per_page):
+        response = {"clusters": [{"cluster_id": c_id, "cluster_name": name} for c_id, name in clusters]}
+        if i < len(clusters_per_page) - 1:
+            response["next_page_token"] = f"page-{i + 1}"
+        responses.append(response)
+    return responses
+
+
+@patch("databricks_cdk.resources.clusters.cluster_index.get_request")
+def test_get_cluster_index_pages_with_filter(patched_get_request):
+    patched_get_request.side_effect = pages([("1", "a"), ("2", "b")], [("3", "c"), ("4", "a")])
+
+    assert get_cluster_index(WORKSPACE_URL) == {"a": "1", "b": "2", "c": "3"}
+
+    assert patched_get_request.call_count == 2
+    first_params = patched_get_request.call_args_list[0].kwargs["params"]
+    assert first_params == {"page_size": 100, "filter_by.cluster_sources": ["UI", "API"], "page_token": "page-1"}
+    assert patched_get_request.call_args_list[0].args[0] == f"{WORKSPACE_URL}/api/2.1/clusters/list"
+
+
+@patch("databricks_cdk.resources.clusters.cluster_index.get_request")
+def test_get_cluster_id_by_name_is_cached(patched_get_request):
+    patched_get_request.return_value = {"clusters": [{"cluster_id": "1", "cluster_name": "a"}]}
+
+    assert get_cluster_id_by_name("a", WORKSPACE_URL) == "1"
+    assert get_cluster_id_by_name("a", WORKSPACE_URL) == "1"
+    assert get_cluster_id_by_name("a", "https://other.cloud.databricks.com") == "1"
+    assert patched_get_request.call_count == 2
+
+    invalidate_cluster_index(WORKSPACE_URL)
+    get_cluster_id_by_name("a", WORKSPACE_URL)
+    assert patched_get_request.call_count == 3
+
+
+@patch("databricks_cdk.resources.clusters.cluster_index._recently_rebuilt.ttl_seconds", 0)
+@patch("databricks_cdk.resources.clusters.cluster_index.get_request")
+def test_get_cluster_id_by_name_rebuilds_index_on_miss(patched_get_request):
+    patched_get_request.side_effect = [
+        {"clusters": [{"cluster_id": "1", "cluster_name": "a"}]},
+        {"clusters": [{"cluster_id": "1", "cluster_name": "a"}, {"cluster_id": "2", "cluster_name": "b"}]},
+        {"clusters": [{"cluster_id": "1", "cluster_name": "a"}, {"cluster_id": "2", "cluster_name": "b"}]},
+    ]
+
+    assert get_cluster_id_by_name("a", WORKSPACE_URL) == "1"
+    assert get_cluster_id_by_name("b", WORKSPACE_URL) == "2"
+    assert get_cluster_id_by_name("b", WORKSPACE_URL) == "2"
+    assert patched_get_request.call_count == 2
+
+    assert get_cluster_id_by_name("c", WORKSPACE_URL) is None
+    assert patched_get_request.call_count == 3
+
+
+@patch("databricks_cdk.resources.clusters.cluster_index.get_request")
+def test_get_cluster_id_by_name_misses_dont_rebuild_recent_index(patched_get_request):
+    patched_get_request.return_value = {"clusters": [{"cluster_id": "1", "cluster_name": "a"}]}
+
+    for _ in range(5):
+        assert get_cluster_id_by_name("missing", WORKSPACE_URL) is None
+    assert get_cluster_id_by_name("a", WORKSPACE_URL) == "1"
+
+    assert patched_get_request.call_count == 1
+
+
+@patch("databricks_cdk.resources.clusters.cluster_index._cluster_index.ttl_seconds", 0)
+@patch("databricks_cdk.resources.clusters.cluster_index.get_request")
+def test_cluster_index_expires(patched_get_request):
+    patched_get_request.return_value = {"clusters": []}
+
+    get_cluster_index(WORKSPACE_URL)
+    get_cluster_index(WORKSPACE_URL)
+
+    assert patched_get_request.call_count == 2
+
+
+@patch("databricks_cdk.resources.clusters.cluster.get_cluster_by_id")
+@patch("databricks_cdk.resources.clusters.cluster_index.get_request")
+def test_get_cluster_by_name_refreshes_stale_index(patched_get_request, patched_get_cluster_by_id):
+    patched_get_request.side_effect = [
+        {"clusters": [{"cluster_id": "1", "cluster_name": "a"}]},
+        {"clusters": [{"cluster_id": "2", "cluster_name": "a"}]},
+    ]
+    patched_get_cluster_by_id.side_effect = lambda cluster_id, url: (
+        {"cluster_id": "2", "cluster_name": "a"} if cluster_id == "2" else None
+    )
+
+    assert get_cluster_by_name("a", WORKSPACE_URL) == {"cluster_id": "2", "cluster_name": "a"}
+    assert get_cluster_by_name("a", WORKSPACE_URL) == {"cluster_id": "2", "cluster_name": "a"}
+    assert patched_get_request.call_count == 2
+
+
+def cluster_properties(cluster_name: str) -> ClusterProperties:
+    return ClusterProperties(
+        workspace_url=WORKSPACE_URL,
+        cluster=Cluster(cluster_name=cluster_name, spark_version="13.3.x-scala2.12", aws_attributes={}),
+    )
+
+
+@patch("databricks_cdk.resources.clusters.cluster.post_request")
+@patch("databricks_cdk.resources.clusters.cluster_index.get_request")
+def test_create_cluster_updates_index(patched_get_request, patched_post_request):
+    patched_get_request.return_value = {"clusters": [{"cluster_id": "2", "cluster_name": "other"}]}
+    patched_post_request.return_value = {"cluster_id": "1"}
+
+    assert get_cluster_id_by_name("test", WORKSPACE_URL) is None
+    create_or_update_cluster(cluster_properties("test"), None)
+
+    assert get_cluster_id_by_name("test", WORKSPACE_URL) == "1"
+    assert get_cluster_index(WORKSPACE_URL) == {"other": "2", "test": "1"}
+    assert patched_get_request.call_count == 1
+
+
+@patch("databricks_cdk.resources.clusters.cluster.get_cluster_by_id")
+@patch("databricks_cdk.resources.clusters.cluster.post_request")
+@patch("databricks_cdk.resources.clusters.cluster_index.get_request")
+def test_edit_and_delete_cluster_update_index(patched_get_request, patched_post_request, patched_get_cluster_by_id):
+    patched_get_request.return_value = {
+        "clusters": [{"cluster_id": "1", "cluster_name": "old"}, {"cluster_id": "2", "cluster_name": "other"}]
+    }
+    patched_get_cluster_by_id.return_value = {
+        "cluster_id": "1",
+        "cluster_name": "old",
+        "spark_version": "13.3.x-scala2.12",
+        "state": "TERMINATED",
+    }
+    get_cluster_index(WORKSPACE_URL)
+
+    create_or_update_cluster(cluster_properties("new"), "1")
+    assert get_cluster_index(WORKSPACE_URL) == {"new": "1", "other": "2"}
+
+    patched_get_cluster_by_id.return_value = {"cluster_id": "1", "cluster_name": "new"}
+    delete_cluster(cluster_properties("new"), "1")
+    assert get_cluster_index(WORKSPACE_URL) == {"other": "2"}
+    assert patched_get_request.call_count == 1
@@ -0,0 +1,125 @@
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from databricks_cdk.resources.clusters.cluster import (
+    Cluster,
+    ClusterNotReadyError,
+    ClusterProperties,
+    create_or_update_cluster,
+    wait_for_cluster_state,
+)
+from databricks_cdk.resources.handler import handler
+from databricks_cdk.utils import ResumeLater, lambda_deadline
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    return {
+        "databricks_cdk.resources.clusters.cluster.WAIT_MIN_DELAY_SECONDS": 0.05,
+        "databricks_cdk.resources.clusters.cluster.WAIT_MAX_DELAY_SECONDS": 0.1,
+    }
+
+
+def cluster_properties(url: str) -> ClusterProperties:
+    return ClusterProperties(
+        workspace_url=url,
+        cluster=Cluster(cluster_name="test", spark_version="13.3.x-scala2.12", aws_attributes={}),
+        wait_for_state="RUNNING",
+    )
+
+
+def test_create_cluster_waits_for_running(fake_server):
+    fake_server.state.cluster_start_seconds = 0.3
+
+    response = create_or_update_cluster(cluster_properties(fake_server.url), None)
+
+    assert fake_server.state.clusters[response.physical_resource_id]["state"] == "RUNNING"
+    assert fake_server.call_count("POST", "/clusters/events") >= 1
+    # the cluster is only fetched again after the RUNNING event showed up
+    assert fake_server.call_count("GET", "/clusters/get") == 2
+
+
+def test_update_without_changes_does_not_wait(fake_server):
+    cluster_id = fake_server.state.add_cluster("test", spark_version="13.3.x-scala2.12", state="TERMINATED")[
+        "cluster_id"
+    ]
+
+    create_or_update_cluster(cluster_properties(fake_server.url), cluster_id)
+
+    assert fake_server.call_count("POST", "/clusters/events") == 0
+
+
+def test_wait_for_failed_cluster(fake_server):
+    cluster = fake_server.state.add_cluster("test", state="TERMINATED", termination_reason={"code": "CLOUD_FAILURE"})
+
+    with pytest.raises(ClusterNotReadyError, match="CLOUD_FAILURE"):
+        wait_for_cluster_state(cluster["cluster_id"], fake_server.url)
+
+
+def test_wait_timeout(fake_server):
+    cluster = fake_server.state.add_cluster("test", state="PENDING", frozen=True)
+
+    with pytest.raises(TimeoutError):
+        wait_for_cluster_state(cluster["cluster_id"], fake_server.url, timeout_seconds=0.3)
+
+
+def test_wait_stops_at_lambda_deadline(fake_server, lambda_context):
+    fake_server.state.cluster_start_seconds = 60
+
+    with patch("databricks_cdk.utils.DEADLINE_MARGIN_SECONDS", 0), lambda_deadline(lambda_context(0.3)):
+        with pytest.raises(ResumeLater) as e:
+            create_or_update_cluster(cluster_properties(fake_server.url), None)
+
+    assert e.value.response.physical_resource_id in fake_server.state.clusters
+    assert e.value.started_at is not None
+
+
+@patch("databricks_cdk.resources.handler.cfnresponse.send")
+@patch("databricks_cdk.resources.handler.boto3.client")
+def test_handler_continues_asynchronously(patched_boto3_client, patched_send, fake_server, lambda_context):
+    fake_server.state.cluster_start_seconds = 0.5
+    event = {
+        "RequestType": "Create",
+        "LogicalResourceId": "Cluster",
+        "ResourceProperties": json.loads(cluster_properties(fake_server.url).json()),
+    }
+
+    started_at = time.time()
+    with patch("databricks_cdk.utils.DEADLINE_MARGIN_SECONDS", 0):
+        handler(event, lambda_context(0.1))
+
+    patched_send.assert_not_called()
+    invoke = patched_boto3_client.return_value.invoke.call_args.kwargs
+    assert invoke["InvocationType"] == "Event"
+    continued_event = json.loads(invoke["Payload"])
+    assert continued_event["Continuation"]["attempt"] == 1
+    assert started_at <= continued_event["Continuation"]["started_at"] < started_at + 0.1
+    cluster_id = continued_event["Continuation"]["response"]["physical_resource_id"]
+
+    handler(continued_event, lambda_context(60))
+
+    assert patched_send.call_args.args[2] == "SUCCESS"
+    assert patched_send.call_args.kwargs["physicalResourceId"] == cluster_id
+    assert fake_server.call_count("POST", "/clusters/create") == 1
+
+
+@pytest.mark.parametrize("start_state,timeout_seconds", [("TERMINATED", 60), ("RUNNING", 0.2)])
+@patch("databricks_cdk.resources.handler.cfnresponse.send")
+def test_handler_fails_with_created_cluster_id(patched_send, fake_server, start_state, timeout_seconds, lambda_context):
+    fake_server.state.cluster_start_state = start_state
+    fake_server.state.cluster_start_seconds = 0.1 if start_state == "TERMINATED" else 60
+    properties = cluster_properties(fake_server.url).copy(update={"wait_timeout_seconds": timeout_seconds})
+    event = {
+        "RequestType": "Create",
+        "LogicalResourceId": "Cluster",
+        "ResourceProperties": json.loads(properties.json()),
+    }
+
+    handler(event, lambda_context(60))
+
+    (cluster_id,) = fake_server.state.clusters
+    assert patched_send.call_args.args[2] == "FAILED"
+    assert patched_send.call_args.kwargs["physicalResourceId"] == cluster_id
@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+from databricks_cdk.resources.jobs.job import (
+    JobProperties,
+    JobSettings,
+    JobTaskSettings,
+    NotebookTask,
+    create_or_update_job,
+    get_job_settings_fingerprint,
+    get_job_settings_update,
+)
+
+WORKSPACE_URL = "https://dbc-test.cloud.databricks.com"
+
+JOB = JobSettings(
+    name="job",
+    job_clusters=[],
+    tasks=[
+        JobTaskSettings(task_key="b", notebook_task=NotebookTask(notebook_path="/b"), depends_on=["a"]),
+        JobTaskSettings(task_key="a", notebook_task=NotebookTask(notebook_path="/a"), existing_cluster_id="1"),
+    ],
+    max_concurrent_runs=1,
+)
+
+# jobs/get response of JOB, with the fields databricks adds
+CURRENT = {
+    "job_id": 123,
+    "created_time": 1700000000000,
+    "settings": {
+        "name": "job",
+        "format": "MULTI_TASK",
+        "timeout_seconds": 0,
+        "max_concurrent_runs": 1,
+        "email_notifications": {},
+        "webhook_notifications": {},
+        "tasks": [
+            {
+                "task_key": "a",
+                "notebook_task": {"notebook_path": "/a", "source": "WORKSPACE"},
+                "existing_cluster_id": "1",
+                "run_if": "ALL_SUCCESS",
+                "timeout_seconds": 0,
+                "email_notifications": {},
+            },
+            {
+                "task_key": "b",
+                "depends_on": [{"task_key": "a"}],
+                "notebook_task": {"notebook_path": "/b", "source": "WORKSPACE"},
+                "run_if": "ALL_SUCCESS",
+                "timeout_seconds": 0,
+                "email_notifications": {},
+            },
+        ],
+    },
+}
+
+
+def test_get_job_settings_fingerprint():
+    fingerprint = get_job_settings_fingerprint(JOB.dict())
+
+    assert fingerprint == get_job_settings_fingerprint(CURRENT["settings"])
+    changed = JOB.copy(update={"max_concurrent_runs": 2})
+    assert get_job_settings_fingerprint(changed.dict()) != fingerprint
+
+
+def test_get_job_settings_fingerprint_unparsable_settings():
+    assert get_job_settings_fingerprint({"tasks": [{"task_key": "a"}]}) is None
+
+
+@patch("databricks_cdk.resources.jobs.job.post_request")
+@patch("databricks_cdk.resources.jobs.job.get_job_by_id", return_value=CURRENT)
+def test_create_or_update_job_unchanged(patched_get_job_by_id, patched_post_request):
+    response = create_or_update_job(JobProperties(workspace_url=WORKSPACE_URL, job=JOB), physical_resource_id="123")
+
+    patched_post_request.assert_not_called()
+    assert response.job_id == 123
+    assert response.settings_fingerprint == get_job_settings_fingerprint(JOB.dict())
+
+
+def test_get_job_settings_update():
+    job = JOB.copy(
+        update={
+            "name": "renamed",
+            "tasks": [
+                JOB.tasks[1],
+                JobTaskSettings(task_key="c", notebook_task=NotebookTask(notebook_path="/c"), depends_on=["a"]),
+            ],
+        }
+    )
+    current = {**CURRENT["settings"], "schedule": {"quartz_cron_expression": "0 0 * * * ?", "timezone_id": "UTC"}}
+
+    new_settings, fields_to_remove = get_job_settings_update(current, job.dict())
+
+    assert sorted(new_settings) == ["name", "tasks"]
+    assert new_settings["name"] == "renamed"
+    assert [t["task_key"] for t in new_settings["tasks"]] == ["c"]
+    assert fields_to_remove == ["schedule", "tasks/b"]
+
+
+@patch("databricks_cdk.resources.jobs.job.post_request")
+@patch("databricks_cdk.resources.jobs.job.get_job_by_id", return_value=CURRENT)
+def test_create_or_update_job_changed(patched_get_job_by_id, patched_post_request):
+    job = JOB.copy(update={"name": "renamed"})
+
+    response = create_or_update_job(JobProperties(workspace_url=WORKSPACE_URL, job=job), physical_resource_id="123")
+
+    patched_post_request.assert_called_once_with(
+        f"{WORKSPACE_URL}/api/2.1/jobs/update",
+        body={"job_id": 123, "new_settings": {"name": "renamed"}, "fields_to_remove": []},
+    )
+    assert response.settings_fingerprint == get_job_settings_fingerprint(job.dict())
+
+
+@patch("databricks_cdk.resources.jobs.job.post_request")
+@patch("databricks_cdk.resources.jobs.job.get_job_by_id", return_value=CURRENT)
+def test_create_or_update_job_full_reset(patched_get_job_by_id, patched_post_request):
+    job = JOB.copy(update={"name": "renamed"})
+
+    create_or_update_job(
+        JobProperties(workspace_url=WORKSPACE_URL, job=job, full_reset=True), physical_resource_id="123"
+    )
+
+    patched_post_request.assert_called_once()
+    url, body = patched_post_request.call_args.args[0], patched_post_request.call_args.kwargs["body"]
+    assert url == f"{WORKSPACE_URL}/api/2.1/jobs/reset"
+    assert body["job_id"] == 123 and body["new_settings"]["name"] == "renamed"
@@ -0,0 +1,69 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from databricks_cdk.resources.handler import DatabricksEvent, process_event
+from databricks_cdk.resources.jobs.job import JobProperties, JobSettings, delete_job
+from databricks_cdk.utils import ResumeLater, lambda_deadline
+from tests.fake_databricks import FakeDatabricksServer
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    return {"databricks_cdk.resources.jobs.job.CANCEL_MIN_DELAY_SECONDS": 0.05}
+
+
+def add_job_with_runs(server: FakeDatabricksServer, runs: int) -> int:
+    job_id = server.state.add_job({"name": "job", "tasks": []})["job_id"]
+    for _ in range(runs):
+        server.state.add_run(job_id, [{"task_key": "a"}], frozen=True)
+    return job_id
+
+
+def job_properties(url: str) -> JobProperties:
+    return JobProperties(
+        workspace_url=url, job=JobSettings(name="job", tasks=[], job_clusters=[]), cancel_runs_on_delete=True
+    )
+
+
+def test_delete_job_cancels_active_runs(fake_server):
+    job_id = add_job_with_runs(fake_server, 30)
+
+    delete_job(job_properties(fake_server.url), str(job_id))
+
+    assert job_id not in fake_server.state.jobs
+    assert fake_server.call_count("POST", "/api/2.1/jobs/runs/cancel") == 30
+    assert all(r["state"]["result_state"] == "CANCELED" for r in fake_server.state.runs.values())
+
+
+def test_delete_job_without_cancel(fake_server):
+    job_id = add_job_with_runs(fake_server, 2)
+
+    delete_job(job_properties(fake_server.url).copy(update={"cancel_runs_on_delete": False}), str(job_id))
+
+    assert job_id not in fake_server.state.jobs
+    assert fake_server.call_count("POST", "/api/2.1/jobs/runs/cancel") == 0
+
+
+def test_delete_job_resumes_after_deadline(fake_server, lambda_context):
+    job_id = add_job_with_runs(fake_server, 2)
+    properties = job_properties(fake_server.url)
+    started_at = time.time() - 1
+
+    with lambda_deadline(lambda_context(15.01)), pytest.raises(ResumeLater) as e:
+        delete_job(properties, str(job_id), started_at=started_at)
+    assert e.value.response.physical_resource_id == str(job_id)
+    assert e.value.started_at == started_at
+    assert job_id in fake_server.state.jobs
+
+    event = DatabricksEvent(
+        RequestType="Delete",
+        ResourceProperties=properties.dict(),
+        PhysicalResourceId=str(job_id),
+        Continuation={"response": e.value.response.dict(), "started_at": 0, "attempt": 1},
+    )
+    with patch("databricks_cdk.resources.jobs.job.time.time", return_value=0):
+        assert process_event(event).physical_resource_id == str(job_id)
+    assert job_id not in fake_server.state.jobs
+    assert fake_server.call_count("POST", "/api/2.1/jobs/runs/cancel") == 2
@@ -0,0 +1,59 @@
+import pytest
+
+from databricks_cdk.resources.jobs.job import JobProperties, JobSettings, create_or_update_job
+from databricks_cdk.resources.jobs.job_index import (
+    DuplicateJobNameError,
+    get_job_id_by_name,
+    get_job_ids_by_name,
+    invalidate_job_index,
+)
+
+
+@pytest.fixture(scope="function")
+def fake_server_patches() -> dict:
+    return {"databricks_cdk.resources.jobs.job_index.JOBS_PAGE_SIZE": 2}
+
+
+@pytest.fixture(scope="function", autouse=True)
+def empty_job_index():
+    invalidate_job_index()
+    yield
+    invalidate_job_index()
+
+
+def test_get_job_ids_by_name(fake_server):
+    for name in ["a", "b", "A", "a", "c", "a"]:
+        fake_server.state.add_job({"name": name})
+
+    job_ids = get_job_ids_by_name("a", fake_server.url)
+
+    assert len(job_ids) == 3
+    assert get_job_ids_by_name("a", fake_server.url) == job_ids
+    assert fake_server.call_count("GET", "/api/2.1/jobs/list") == 2
+    assert get_job_id_by_name("b", fake_server.url) is not None
+    assert get_job_id_by_name("d", fake_server.url) is None
+    with pytest.raises(DuplicateJobNameError):
+        get_job_id_by_name("a", fake_server.url)
+
+
+def test_create_or_update_job_adopts_existing(fake_server):
+    job_id = fake_server.state.add_job({"name": "job", "tasks": [], "max_concurrent_runs": 2})["job_id"]
+    properties = JobProperties(
+        workspace_url=fake_server.url, job=JobSettings(name="job", tasks=[], job_clusters=[]), adopt_existing=True
+    )
+
+    response = create_or_update_job(properties, physical_resource_id=None)
+
+    assert response.job_id == job_id
+    assert list(fake_server.state.jobs) == [job_id]
+    assert "max_concurrent_runs" not in fake_server.state.jobs[job_id]["settings"]
+
+
+def test_create_or_update_job_without_adoption_creates_duplicate(fake_server):
+    fake_server.state.add_job({"name": "job", "tasks": []})
+    properties = JobProperties(workspace_url=fake_server.url, job=JobSettings(name="job", tasks=[], job_clusters=[]))
+
+    create_or_update_job(properties, physical_resource_id=None)
+
+    assert len(fake_server.state.jobs) == 2
+    assert fake_server.call_count("GET", "/api/2.1/jobs/list") == 0
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from databricks_cdk.resources.jobs.job import JobProperties, JobSettings, create_or_update_job
+from databricks_cdk.resources.jobs.validation import JobValidationError, find_cycle_tasks, main, validate_job_settings
+
+
+def job(*tasks: dict, job_clusters=()) -> JobSettings:
+    return JobSettings.parse_obj({"name": "job", "tasks": list(tasks), "job_clusters": list(job_clusters)})
+
+
+def task(key: str, *depends_on: str, **fields) -> dict:
+    return {"task_key": key, "depends_on": list(depends_on), "notebook_task": {"notebook_path": "/a"}, **fields}
+
+
+JOB_CLUSTER = {"job_cluster_key": "cluster", "new_cluster": {"spark_version": "13.3.x-scala2.12", "aws_attributes": {}}}
+
+
+def test_valid_job():
+    assert (
+        validate_job_settings(job(task("a", job_cluster_key="cluster"), task("b", "a"), job_clusters=[JOB_CLUSTER]))
+        == []
+    )
+
+
+def test_all_errors_are_reported():
+    settings = job(
+        task("a", "missing", job_cluster_key="unknown"),
+        task("b", "b", existing_cluster_id="1", job_cluster_key="cluster"),
+        task("c", spark_python_task={"python_file": "a.py"}),
+        {"task_key": "a"},
+        job_clusters=[JOB_CLUSTER, JOB_CLUSTER],
+    )
+
+    assert validate_job_settings(settings) == [
+        "Task key 'a' is used more than once",
+        "Job cluster key 'cluster' is used more than once",
+        "Task 'a' uses job cluster 'unknown' that is not in job_clusters",
+        "Task 'a' depends on unknown task 'missing'",
+        "Task 'b' has more than one of ['existing_cluster_id', 'job_cluster_key']",
+        "Task 'b' depends on itself",
+        "Task 'c' should have exactly one task type, found ['notebook_task', 'spark_python_task']",
+        "Task 'a' should have exactly one task type, found none",
+    ]
+
+
+def test_find_cycle_tasks():
+    settings = job(task("a"), task("b", "a", "d"), task("c", "b"), task("d", "c"), task("e", "d"), task("f", "a"))
+
+    assert find_cycle_tasks(settings.tasks) == ["b", "c", "d", "e"]
+
+
+def test_find_cycle_tasks_large_chain():
+    settings = job(task("0"), *[task(str(i), str(i - 1)) for i in range(1, 20_000)])
+
+    assert find_cycle_tasks(settings.tasks) == []
+
+
+def test_create_or_update_job_validates_before_requests():
+    properties = JobProperties(workspace_url="https://workspace", job=job(task("a", "b"), task("b", "a")))
+
+    with pytest.raises(JobValidationError) as e:
+        create_or_update_job(properties, physical_resource_id="123")
+    assert e.value.errors == ["Tasks ['a', 'b'] are part of, or depend on, a dependency cycle"]
+
+
+def test_cli(tmp_path, capsys):
+    template = {
+        "Resources": {
+            "Job": {
+                "Type": "AWS::CloudFormation::CustomResource",
+                "Properties": {
+                    "action": "job",
+                    "job": {
+                        "name": "job",
+                        "job_clusters": [],
+                        "tasks": [task("a", "b", existing_cluster_id={"Fn::GetAtt": ["Cluster", "cluster_id"]})],
+                    },
+                },
+            },
+            "Other": {"Type": "AWS::S3::Bucket", "Properties": {}},
+        }
+    }
+    (tmp_path / "stack.template.json").write_text(json.dumps(template))
+    (tmp_path / "job.json").write_text(json.dumps(job(task("a")).dict()))
+
+    assert main([str(tmp_path / "job.json")]) == 0
+    assert main([str(tmp_path / "stack.template.json"), str(tmp_path / "job.json")]) == 1
+    assert "stack.template.json:Job:\n  - Task 'a' depends on unknown task 'b'" in capsys.readouterr().err
@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+from benchmarks import diffs, load_test
+from benchmarks.actions import run
+from benchmarks.harness import compare
+from databricks_cdk import utils
+
+
+def test_run_action_benchmarks():
+    results = run(scale=0.01, repeats=1, trace_memory=False, only="^(cluster|user):")
+
+    assert set(results) == {f"{a}:{t}" for a in ("cluster", "user") for t in ("Create", "Update", "Delete")}
+    assert all(r.error is None for r in results.values())
+    assert results["cluster:Update"].calls_by_endpoint == {
+        "GET /api/2.0/clusters/get": 1,
+        "POST /api/2.0/clusters/edit": 1,
+    }
+    assert results["user:Update"].http_calls == 1
+
+
+def test_compare_reports_extra_calls():
+    results = run(scale=0.01, repeats=1, trace_memory=False, only="^cluster:Update$")
+    baseline = {k: v.copy(update={"http_calls": v.http_calls - 1}) for k, v in results.items()}
+
+    assert compare(baseline, results, max_time_regression=100) == ["cluster:Update: http calls 1 -> 2"]
+
+
+def test_load_test_reports_throttling():
+    report = load_test.run(
+        invocations=20,
+        concurrency=10,
+        scenarios="^cluster:Update$",
+        requests_per_second=5,
+        burst=5,
+        retry_settings=load_test.RetrySettings(attempts=2, min_wait=0, max_wait=0.01, multiplier=0.01),
+    )
+
+    assert report.invocations == 20
+    assert report.http_429 > 0
+    assert report.gave_up_on_429 > 0
+    assert report.retry_amplification > 1
+    assert report.latency_p50 <= report.latency_p95 <= report.latency_p99 <= report.latency_max
+    assert utils._do_request.retry.stop.max_attempt_number == 5
+
+
+def test_diff_benchmarks():
+    # every run takes 10ms on this clock, so 20,000 extrapolates linearly from 100 to 2s
+    timer = itertools.count(step=0.01).__next__
+    results = diffs.run(sizes=[50, 100, 20_000], repeats=1, max_seconds=1, timer=timer)
+
+    assert set(results) == {f"{case}[{size}]" for case in diffs.CASES for size in (50, 100, 20_000)}
+    assert all(not results[f"{case}[100]"].skipped for case in diffs.CASES)
+    assert all(results[f"{case}[20000]"].skipped for case in diffs.CASES)
+    assert all(r.wall_seconds == pytest.approx(0.01) for r in results.values() if not r.skipped)
+    assert all(r.allocated_blocks > 0 for r in results.values() if not r.skipped)
+    assert set(diffs.scaling_exponents(results)) == set(diffs.CASES)
@@ -0,0 +1,107 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from databricks_cdk.resources.clusters.cluster import (
+    Cluster,
+    ClusterProperties,
+    create_or_update_cluster,
+    delete_cluster,
+    get_cluster_by_id,
+)
+from databricks_cdk.utils import _do_request, get_request, get_workspace_client, post_request
+from tests.fake_databricks import FakeDatabricksServer, FaultRule, LatencyProfile, RateLimit
+
+
+def test_cluster_lifecycle(fake_server):
+    properties = ClusterProperties(
+        workspace_url=fake_server.url,
+        cluster=Cluster(cluster_name="test", spark_version="13.3.x-scala2.12", aws_attributes={}),
+    )
+
+    response = create_or_update_cluster(properties, None)
+    assert get_cluster_by_id(response.physical_resource_id, fake_server.url)["cluster_name"] == "test"
+
+    properties.cluster.num_workers = 2
+    create_or_update_cluster(properties, response.physical_resource_id)
+    assert fake_server.state.clusters[response.physical_resource_id]["num_workers"] == 2
+
+    delete_cluster(properties, response.physical_resource_id)
+    assert get_cluster_by_id(response.physical_resource_id, fake_server.url) is None
+    assert fake_server.call_count("POST", "/clusters/") == 3
+
+
+def test_jobs_list_pagination(fake_server):
+    for i in range(25):
+        fake_server.state.add_job({"name": f"job-{i}"})
+
+    names = []
+    page_token = None
+    while True:
+        params = {"limit": 10, **({"page_token": page_token} if page_token else {})}
+        response = get_request(f"{fake_server.url}/api/2.1/jobs/list", params=params)
+        names += [j["settings"]["name"] for j in response["jobs"]]
+        if not response["has_more"]:
+            break
+        page_token = response["next_page_token"]
+
+    assert len(names) == 25
+    assert fake_server.call_count("GET", "/jobs/list") == 3
+
+
+def test_run_lifecycle(fake_server):
+    fake_server.state.run_running_seconds = 60
+    job_id = post_request(f"{fake_server.url}/api/2.1/jobs/create", body={"name": "job", "tasks": [{"task_key": "a"}]})[
+        "job_id"
+    ]
+
+    run_id = post_request(f"{fake_server.url}/api/2.1/jobs/run-now", body={"job_id": job_id})["run_id"]
+    run = get_request(f"{fake_server.url}/api/2.1/jobs/runs/get", params={"run_id": run_id})
+    assert run["state"]["life_cycle_state"] == "RUNNING"
+
+    post_request(f"{fake_server.url}/api/2.1/jobs/runs/cancel", body={"run_id": run_id})
+    run = get_request(f"{fake_server.url}/api/2.1/jobs/runs/get", params={"run_id": run_id})
+    assert run["state"]["result_state"] == "CANCELED"
+
+
+@patch.object(_do_request.retry, "sleep")
+def test_retry_on_injected_rate_limit(patched_sleep, fake_server):
+    fake_server.faults.append(FaultRule(status_code=429, path_pattern="/clusters/list", count=2))
+
+    response = get_request(f"{fake_server.url}/api/2.0/clusters/list")
+
+    assert response == {"clusters": []}
+    assert [r.status_code for r in fake_server.records] == [429, 429, 200]
+
+
+def test_injected_server_error_is_raised(fake_server):
+    fake_server.faults.append(FaultRule(status_code=503, method="GET"))
+
+    with pytest.raises(requests.HTTPError):
+        get_request(f"{fake_server.url}/api/2.0/clusters/list")
+
+
+def test_rate_limit_and_latency():
+    with FakeDatabricksServer(
+        rate_limit=RateLimit(requests_per_second=0.001, burst=1),
+        latency=[LatencyProfile(distribution="fixed", mean_ms=20)],
+    ) as server:
+        first = requests.get(f"{server.url}/api/2.0/clusters/list")
+        second = requests.get(f"{server.url}/api/2.0/clusters/list")
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "1"
+    assert all(r.latency_seconds >= 0.02 for r in server.records)
+
+
+@patch("databricks_cdk.utils.get_client_secret", return_value="secret")
+@patch("databricks_cdk.utils.get_client_id", return_value="client-id")
+def test_sdk_client(patched_client_id, patched_client_secret, fake_server):
+    client = get_workspace_client(fake_server.url)
+
+    client.experiments.create_experiment(name="/Shared/experiment")
+
+    assert [e["name"] for e in fake_server.state.experiments.values()] == ["/Shared/experiment"]
+    assert fake_server.call_count("POST", "/oidc/v1/token") == 1
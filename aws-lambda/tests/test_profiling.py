@@ -0,0 +1,71 @@
+import os
+from unittest.mock import patch
+
+from databricks_cdk.profiling import get_profiling_options, profile_invocation
+
+
+def test_get_profiling_options_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("PROFILING", raising=False)
+
+    options = get_profiling_options({"run_id": 1})
+
+    assert not options.enabled
+
+
+def test_get_profiling_options_from_env(monkeypatch):
+    monkeypatch.setenv("PROFILING", "cpu")
+    monkeypatch.setenv("PROFILING_TOP_N", "5")
+
+    options = get_profiling_options()
+
+    assert options.cpu
+    assert not options.memory
+    assert options.top_n == 5
+
+
+def test_get_profiling_options_event_overrides_env(monkeypatch):
+    monkeypatch.setenv("PROFILING", "cpu")
+
+    assert get_profiling_options({"profiling": "memory"}).memory
+    assert not get_profiling_options({"profiling": "memory"}).cpu
+    assert not get_profiling_options({"profiling": False}).enabled
+    assert get_profiling_options({"ResourceProperties": {"profiling": "true"}}).memory
+
+
+def test_profile_invocation_disabled(monkeypatch, tmp_path):
+    monkeypatch.delenv("PROFILING", raising=False)
+    monkeypatch.setenv("PROFILING_OUTPUT_DIR", str(tmp_path))
+
+    with profile_invocation("test") as result:
+        sum(range(100))
+
+    assert result is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_profile_invocation_writes_results(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILING_OUTPUT_DIR", str(tmp_path))
+
+    with profile_invocation("test", {"profiling": "cpu,memory"}) as result:
+        data = [str(i) for i in range(1000)]
+
+    assert len(data) == 1000
+    assert len(result.files) == 2
+    assert all(f.startswith(str(tmp_path)) for f in result.files)
+    assert "Peak traced memory" in result.summary
+    assert "cumulative" in result.summary
+
+
+@patch("databricks_cdk.profiling.boto3")
+def test_profile_invocation_uploads_to_s3(patched_boto3, monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILING_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILING_S3_PREFIX", "s3://bucket/profiles/")
+
+    with profile_invocation("test", {"profiling": "memory"}) as result:
+        pass
+
+    assert len(result.files) == 1
+    assert result.files[0].startswith("s3://bucket/profiles/test-")
+    upload_args = patched_boto3.client.return_value.upload_file.call_args.args
+    assert upload_args[1] == "bucket"
+    assert upload_args[2].startswith("profiles/test-")
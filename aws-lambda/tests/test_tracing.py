@@ -0,0 +1,104 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import requests
+from requests.models import Response
+
+from databricks_cdk.tracing import (
+    NOOP_TRACER,
+    InMemoryExporter,
+    JsonFileExporter,
+    LocalTracer,
+    create_tracer_from_env,
+    get_tracer,
+    set_tracer,
+    start_span,
+)
+
+
+@pytest.fixture(scope="function")
+def exporter():
+    exporter = InMemoryExporter()
+    set_tracer(LocalTracer(exporter))
+    yield exporter
+    set_tracer(None)
+
+
+def test_tracing_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("TRACING", raising=False)
+    set_tracer(None)
+
+    assert get_tracer() is NOOP_TRACER
+    with start_span("test", key="value") as span:
+        span.set_attribute("other", 1)
+
+    set_tracer(None)
+
+
+def test_create_tracer_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRACING", "file")
+    monkeypatch.setenv("TRACING_FILE", str(tmp_path / "traces.jsonl"))
+
+    tracer = create_tracer_from_env()
+
+    assert isinstance(tracer, LocalTracer)
+    assert isinstance(tracer.exporter, JsonFileExporter)
+
+
+def test_nested_spans(exporter):
+    with start_span("parent", action="cluster") as parent:
+        with start_span("child") as child:
+            child.add_event("wait", {"seconds": 10})
+
+    child_span, parent_span = exporter.spans
+    assert parent_span.name == "parent"
+    assert parent_span.attributes == {"action": "cluster"}
+    assert parent_span.parent_id is None
+    assert child_span.parent_id == parent.span_id
+    assert child_span.trace_id == parent.trace_id
+    assert child_span.events[0]["name"] == "wait"
+
+
+def test_span_records_exception(exporter):
+    with pytest.raises(ValueError):
+        with start_span("failing"):
+            raise ValueError("boom")
+
+    assert exporter.spans[0].status == "ERROR"
+    assert exporter.spans[0].events[0]["attributes"] == {"type": "ValueError", "message": "boom"}
+
+
+def test_json_file_exporter(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    set_tracer(LocalTracer(JsonFileExporter(str(path))))
+    try:
+        with start_span("test", key="value"):
+            pass
+    finally:
+        set_tracer(None)
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["attributes"] == {"key": "value"}
+
+
+@patch("requests.adapters.HTTPAdapter.send")
+def test_requests_are_traced(patched_send, exporter):
+    response = Response()
+    response.status_code = 200
+    response.headers["Content-Length"] = "2"
+    patched_send.return_value = response
+
+    with start_span("dispatch"):
+        requests.get("https://test.cloud.databricks.com/api/2.0/clusters/list", params={"page_token": "abc"})
+
+    http_span, dispatch_span = exporter.spans
+    assert http_span.name == "HTTP GET"
+    assert http_span.parent_id == dispatch_span.span_id
+    assert http_span.attributes == {
+        "http.method": "GET",
+        "http.url": "https://test.cloud.databricks.com/api/2.0/clusters/list",
+        "http.status_code": 200,
+        "http.response_content_length": 2,
+    }
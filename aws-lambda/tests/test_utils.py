@@ -1,3 +1,4 @@
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -6,6 +7,8 @@ from requests.exceptions import HTTPError
 from requests.models import Response
 
 from databricks_cdk.utils import (
+    RateLimiter,
+    TtlCache,
     _do_request,
     delete_request,
     get_account_client,
@@ -102,7 +105,9 @@ def test_post_request(patched__do_request):
     expected_body = {"test", "value"}
     post_request(expected_url, expected_body)
 
-    patched__do_request.assert_called_once_with(method="POST", url=expected_url, body=expected_body, params=None)
+    patched__do_request.assert_called_once_with(
+        method="POST", url=expected_url, body=expected_body, params=None, session=None
+    )
 
 
 @patch("databricks_cdk.utils._do_request")
@@ -129,7 +134,9 @@ def test_get_request(patched__do_request):
     expected_body = {"test", "value"}
     get_request(expected_url, expected_body)
 
-    patched__do_request.assert_called_once_with(method="GET", url=expected_url, body=expected_body, params=None)
+    patched__do_request.assert_called_once_with(
+        method="GET", url=expected_url, body=expected_body, params=None, session=None
+    )
 
 
 @patch("databricks_cdk.utils._do_request")
@@ -215,3 +222,30 @@ def test_get_account_client(
         host="https://accounts.cloud.databricks.com",
         account_id=patched_get_account_id.return_value,
     )
+
+
+@patch("databricks_cdk.utils.time.monotonic")
+def test_ttl_cache(patched_monotonic):
+    patched_monotonic.return_value = 0
+    cache: TtlCache[str] = TtlCache(ttl_seconds=10)
+    cache.set("a", "1")
+    cache.set("b", "2")
+
+    patched_monotonic.return_value = 9
+    assert cache.get("a") == "1"
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
+
+    patched_monotonic.return_value = 10
+    assert cache.get("b") is None
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(requests_per_second=100, burst=5)
+
+    start = time.monotonic()
+    for _ in range(15):
+        limiter.acquire()
+
+    assert 0.08 <= time.monotonic() - start < 1
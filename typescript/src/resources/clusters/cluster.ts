@@ -90,6 +90,11 @@ export interface DatabricksCluster {
 export interface ClusterProperties {
     workspaceUrl: string
     cluster: DatabricksCluster
+    /**
+     * Wait until the cluster reaches this state, usually RUNNING, before the resource is reported as done
+     */
+    waitForState?: string
+    waitTimeoutSeconds?: number
 }
 
 export interface ClusterProps extends ClusterProperties {
@@ -103,7 +108,9 @@ export class Cluster extends CustomResource {
             properties: {
                 action: "cluster",
                 workspace_url: props.workspaceUrl,
-                cluster: props.cluster
+                cluster: props.cluster,
+                wait_for_state: props.waitForState,
+                wait_timeout_seconds: props.waitTimeoutSeconds,
             }
         });
     }
@@ -357,6 +357,16 @@ export class DatabricksDeployLambda extends IDatabricksDeployLambda {
             logRetention: aws_logs.RetentionDays.THREE_MONTHS,
         });
         this.serviceToken = this.lambda.functionArn;
+
+        // Lets the lambda invoke itself to continue waiting on slow resources, like clusters that are starting.
+        // A separate policy, the default policy of the role can't refer to the function that depends on it.
+        this.lambdaRole.attachInlinePolicy(new aws_iam.Policy(this, "SelfInvokePolicy", {
+            statements: [new aws_iam.PolicyStatement({
+                effect: aws_iam.Effect.ALLOW,
+                actions: ["lambda:InvokeFunction"],
+                resources: [this.lambda.functionArn],
+            })],
+        }));
     }
 
     public static fromServiceToken(scope: Construct, id: string, serviceToken: string): IDatabricksDeployLambda {
@@ -137,6 +137,16 @@ export interface JobEmailNotifications {
     no_alert_for_skipped_runs?: boolean
 }
 
+export interface JobWebhook {
+    id: string
+}
+
+export interface JobWebhookNotifications {
+    on_start?: Array<JobWebhook>
+    on_success?: Array<JobWebhook>
+    on_failure?: Array<JobWebhook>
+}
+
 export interface JobTaskSettings {
     task_key: string
     description?: string
@@ -179,6 +189,7 @@ export interface JobSettings {
     tasks: Array<JobTaskSettings>
     job_clusters?: Array<JobCluster>
     email_notifications?: JobEmailNotifications
+    webhook_notifications?: JobWebhookNotifications
     timeout_seconds?: number
     schedule?: JobCronSchedule
     max_concurrent_runs?: number
@@ -189,6 +200,20 @@ export interface JobSettings {
 export interface JobProperties {
     workspaceUrl: string
     job: JobSettings
+    /**
+     * Replace all job settings on updates, by default only the changed fields, tasks and job clusters are updated
+     */
+    fullReset?: boolean
+    /**
+     * Take over an existing job with the same name instead of creating a duplicate, for example after the stack was
+     * recreated. Fails when more than one job has this name.
+     */
+    adoptExisting?: boolean
+    /**
+     * Cancel the active runs of the job, and wait until they stopped, before the job is deleted
+     */
+    cancelRunsOnDelete?: boolean
+    cancelTimeoutSeconds?: number
 }
 
 export interface JobProps extends JobProperties {
@@ -203,6 +228,10 @@ export class Job extends CustomResource {
                 action: "job",
                 workspace_url: props.workspaceUrl,
                 job: props.job,
+                full_reset: props.fullReset,
+                adopt_existing: props.adoptExisting,
+                cancel_runs_on_delete: props.cancelRunsOnDelete,
+                cancel_timeout_seconds: props.cancelTimeoutSeconds,
             }
         });
     }
@@ -1,4 +1,4 @@
-import {aws_iam, aws_lambda, aws_logs, Duration} from "aws-cdk-lib";
+import {aws_dynamodb, aws_events, aws_events_targets, aws_iam, aws_lambda, aws_logs, Duration, RemovalPolicy} from "aws-cdk-lib";
 import {Construct} from "constructs";
 
 export interface StepFunctionsLambdasProps {
@@ -8,6 +8,33 @@ export interface StepFunctionsLambdasProps {
     readonly databricksPassParam?: string
     readonly databricksAccountParam?: string
     readonly lambdaCode: aws_lambda.DockerImageCode
+    /**
+     * Timeout of the lambdas. Defaults to 15 seconds. In wait mode job-status, submit-run and run-dag poll until
+     * STATUS_DEADLINE_MARGIN_SECONDS (3 seconds) before the timeout, and return still_running to loop on after that.
+     * A longer timeout means fewer invocations for long runs. Also raise it when jobs are submitted in batches
+     */
+    readonly timeout?: Duration
+    /**
+     * Arn of the bucket full run responses and run outputs are written to, when the events ask for it
+     */
+    readonly outputBucketArn?: string
+    /**
+     * Complete waitForTaskToken tasks from databricks webhook notifications instead of polling job-status. Adds the
+     * table the task tokens are kept in, the job-callback lambda with a function url to use as notification
+     * destination, and the callback-sweep lambda that checks the registered runs every 15 minutes as safety net.
+     * The notification destination has to use basic auth with username "databricks" and the password in the
+     * SecureString parameter of callbackPasswordParam, other requests to the function url are rejected
+     */
+    readonly enableCallbacks?: boolean
+    /**
+     * Parameter with the basic auth password of the notification destination. Defaults to /databricks/callback/password
+     */
+    readonly callbackPasswordParam?: string
+    /**
+     * Share the run status cache of the lambdas through a dynamodb table, so concurrent executions polling the same
+     * runs make one databricks request per interval. Without it the cache is only shared within a warm lambda
+     */
+    readonly enableSharedRunCache?: boolean
 }
 
 interface LambdaProps {
@@ -21,6 +48,15 @@ export class StepFunctionsLambdas extends Construct {
     readonly props: StepFunctionsLambdasProps;
     readonly submitJobLambda: aws_lambda.IFunction;
     readonly jobStatusLambda: aws_lambda.IFunction;
+    readonly runOutputLambda: aws_lambda.IFunction;
+    readonly submitRunLambda: aws_lambda.IFunction;
+    readonly repairRunLambda: aws_lambda.IFunction;
+    readonly runDagLambda: aws_lambda.IFunction;
+    readonly callbackTable?: aws_dynamodb.ITable;
+    readonly runCacheTable?: aws_dynamodb.ITable;
+    readonly jobCallbackLambda?: aws_lambda.IFunction;
+    readonly jobCallbackUrl?: aws_lambda.FunctionUrl;
+    readonly callbackSweepLambda?: aws_lambda.IFunction;
     readonly lambdaRole: aws_iam.IRole;
 
     constructor(scope: Construct, id: string, props: StepFunctionsLambdasProps) {
@@ -41,6 +77,40 @@ export class StepFunctionsLambdas extends Construct {
             ]
         }));
 
+        if (this.props.outputBucketArn) {
+            this.lambdaRole.addToPrincipalPolicy(new aws_iam.PolicyStatement({
+                effect: aws_iam.Effect.ALLOW,
+                actions: ["s3:PutObject"],
+                resources: [`${this.props.outputBucketArn}/*`]
+            }));
+        }
+
+        if (this.props.enableCallbacks) {
+            this.callbackTable = new aws_dynamodb.Table(this, "CallbackTable", {
+                partitionKey: {name: "run_id", type: aws_dynamodb.AttributeType.STRING},
+                sortKey: {name: "workspace_url", type: aws_dynamodb.AttributeType.STRING},
+                billingMode: aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+                timeToLiveAttribute: "expires_at",
+                removalPolicy: RemovalPolicy.DESTROY,
+            });
+            this.callbackTable.grantReadWriteData(this.lambdaRole);
+            this.lambdaRole.addToPrincipalPolicy(new aws_iam.PolicyStatement({
+                effect: aws_iam.Effect.ALLOW,
+                actions: ["states:SendTaskSuccess", "states:SendTaskFailure"],
+                resources: ["*"]
+            }));
+        }
+
+        if (this.props.enableSharedRunCache) {
+            this.runCacheTable = new aws_dynamodb.Table(this, "RunCacheTable", {
+                partitionKey: {name: "cache_key", type: aws_dynamodb.AttributeType.STRING},
+                billingMode: aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+                timeToLiveAttribute: "expires_at",
+                removalPolicy: RemovalPolicy.DESTROY,
+            });
+            this.runCacheTable.grantReadWriteData(this.lambdaRole);
+        }
+
         this.submitJobLambda = this.generateLambda({
             functionName: "DatabricksSubmitJob",
             lambdaMethod: "submit-job"
@@ -49,19 +119,59 @@ export class StepFunctionsLambdas extends Construct {
             functionName: "DatabricksJobStatus",
             lambdaMethod: "job-status"
         });
+        this.runOutputLambda = this.generateLambda({
+            functionName: "DatabricksRunOutput",
+            lambdaMethod: "run-output"
+        });
+        this.submitRunLambda = this.generateLambda({
+            functionName: "DatabricksSubmitRun",
+            lambdaMethod: "submit-run"
+        });
+        this.repairRunLambda = this.generateLambda({
+            functionName: "DatabricksRepairRun",
+            lambdaMethod: "repair-run"
+        });
+        this.runDagLambda = this.generateLambda({
+            functionName: "DatabricksRunDag",
+            lambdaMethod: "run-dag"
+        });
+
+        if (this.props.enableCallbacks) {
+            const jobCallbackLambda = this.generateLambda({
+                functionName: "DatabricksJobCallback",
+                lambdaMethod: "job-callback"
+            });
+            // Databricks can't sign requests, the lambda checks the basic auth credentials of the notification
+            // destination instead, and reads the run state from databricks itself
+            this.jobCallbackUrl = jobCallbackLambda.addFunctionUrl({authType: aws_lambda.FunctionUrlAuthType.NONE});
+            this.jobCallbackLambda = jobCallbackLambda;
+            this.callbackSweepLambda = this.generateLambda({
+                functionName: "DatabricksCallbackSweep",
+                lambdaMethod: "callback-sweep"
+            });
+            new aws_events.Rule(this, "CallbackSweepSchedule", {
+                schedule: aws_events.Schedule.rate(Duration.minutes(15)),
+                targets: [new aws_events_targets.LambdaFunction(this.callbackSweepLambda)]
+            });
+        }
     }
 
     private generateLambda(lambdaProps: LambdaProps) {
-        return new aws_lambda.DockerImageFunction(this, "Lambda", {
+        return new aws_lambda.DockerImageFunction(this, lambdaProps.functionName, {
             functionName: lambdaProps.functionName,
             code: this.props.lambdaCode,
-            timeout: Duration.seconds(15),
+            timeout: this.props.timeout || Duration.seconds(15),
             role: this.lambdaRole,
             environment: {
                 LAMBDA_METHOD: lambdaProps.lambdaMethod,
                 USER_PARAM: this.props.databricksUserParam || "/databricks/deploy/user",
                 PASS_PARAM: this.props.databricksPassParam || "/databricks/deploy/password",
-                ACCOUNT_PARAM: this.props.databricksAccountParam || "/databricks/account-id"
+                ACCOUNT_PARAM: this.props.databricksAccountParam || "/databricks/account-id",
+                ...(this.callbackTable ? {
+                    CALLBACK_TABLE: this.callbackTable.tableName,
+                    CALLBACK_PASSWORD_PARAM: this.props.callbackPasswordParam || "/databricks/callback/password"
+                } : {}),
+                ...(this.runCacheTable ? {RUN_CACHE_TABLE: this.runCacheTable.tableName} : {})
             },
             logRetention: aws_logs.RetentionDays.THREE_MONTHS,
         });